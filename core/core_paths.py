@@ -5,6 +5,8 @@ IMAGE_FOLDER = PROJECT_ROOT / "images"
 DATA_DIR = PROJECT_ROOT / "data"
 MEDIA_ROOT = Path(__file__).parents[1] / "media"
 DATA_FILE_PATH: Path = Path(__file__).parents[1] / "robocross" / "workout_data.json"
+EXERCISE_DB_PATH: Path = DATA_DIR / "exercises.sqlite3"
+CACHE_DIR = PROJECT_ROOT / "cache"
 
 def image_path(file_name: str) -> Path or None:
     """Searches image directory for path"""
@@ -0,0 +1,156 @@
+"""Whole-image analysis with NumPy.
+
+The alpha and RGB planes are processed in bulk rather than pixel by pixel: the bounding box of the visible
+(non-transparent) pixels and the transparent padding on each edge, and whether every visible pixel is grey
+(R = G = B). A 4K image takes a few milliseconds on top of decoding it, and results are cached per file until the
+file changes.
+"""
+from __future__ import annotations
+
+import logging
+
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from core.logging_utils import get_logger
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+LOGGER = get_logger(name=__name__, level=logging.INFO)
+
+ANALYSIS_CACHE_SIZE = 256
+CHUNK_PIXELS = 1 << 17  # Pixels per block of the colour check
+
+
+class Padding(NamedTuple):
+    """Fully transparent rows/columns on each edge."""
+    top: int
+    bottom: int
+    left: int
+    right: int
+
+    @property
+    def minimum(self) -> int:
+        return min(self)
+
+
+class ImageAnalysis(NamedTuple):
+    width: int
+    height: int
+    bounding_box: tuple[int, int, int, int] | None  # (left, top, right, bottom) of the visible pixels, None if none
+    has_transparency: bool  # At least one fully transparent pixel
+    is_greyscale: bool  # Every visible pixel has R = G = B
+
+    @property
+    def padding(self) -> Padding:
+        if self.bounding_box is None:
+            return Padding(top=self.height, bottom=self.height, left=self.width, right=self.width)
+        left, top, right, bottom = self.bounding_box
+        return Padding(top=top, bottom=self.height - bottom, left=left, right=self.width - right)
+
+    def has_padding(self, min_padding: int) -> bool:
+        """True if every edge has at least min_padding transparent rows/columns."""
+        return self.padding.minimum >= min_padding
+
+    @property
+    def is_monochrome_transparent(self) -> bool:
+        """Grey artwork on a transparent background, which can be tinted."""
+        return self.has_transparency and self.bounding_box is not None and self.is_greyscale
+
+
+def _has_colour(pixels: np.ndarray) -> bool:
+    """True if any visible pixel of a uint32 RGBA plane has R != G or G != B.
+
+    Runs over blocks of rows with preallocated buffers, which stay in cache and let a colour image stop at its first
+    coloured block. Low 16 bits of pixel ^ (pixel >> 8): R ^ G and G ^ B.
+    """
+    rows = max(1, CHUNK_PIXELS // max(1, pixels.shape[1]))
+    difference = np.empty((rows, pixels.shape[1]), dtype=np.uint32)
+    coloured = np.empty((rows, pixels.shape[1]), dtype=bool)
+    visible = np.empty_like(coloured)
+    for start in range(0, pixels.shape[0], rows):
+        block = pixels[start:start + rows]
+        n = len(block)
+        np.right_shift(block, 8, out=difference[:n])
+        np.bitwise_xor(difference[:n], block, out=difference[:n])
+        np.bitwise_and(difference[:n], 0xFFFF, out=difference[:n])
+        np.not_equal(difference[:n], 0, out=coloured[:n])
+        np.greater_equal(block, 1 << 24, out=visible[:n])
+        np.logical_and(coloured[:n], visible[:n], out=coloured[:n])
+        if coloured[:n].any():
+            return True
+    return False
+
+
+def analyse_pixels(rgba: np.ndarray) -> ImageAnalysis:
+    """Analyse an (height, width, 4) uint8 RGBA array.
+
+    Each pixel is read as one little-endian uint32 (R | G << 8 | B << 16 | A << 24), so every test is a pass over a
+    contiguous plane instead of strided access to the interleaved channels.
+    """
+    height, width = rgba.shape[:2]
+    pixels = np.ascontiguousarray(rgba).view("<u4").reshape(height, width)
+    visible = pixels >= 1 << 24  # Alpha > 0
+    rows = np.flatnonzero(visible.any(axis=1))
+    if not len(rows):
+        return ImageAnalysis(width=width, height=height, bounding_box=None, has_transparency=bool(visible.size),
+                             is_greyscale=True)
+    columns = np.flatnonzero(visible.any(axis=0))
+    top, bottom, left, right = int(rows[0]), int(rows[-1]) + 1, int(columns[0]), int(columns[-1]) + 1
+    return ImageAnalysis(
+        width=width,
+        height=height,
+        bounding_box=(left, top, right, bottom),
+        has_transparency=not visible.all(),
+        is_greyscale=not _has_colour(pixels[top:bottom, left:right]),  # Only the bounding box has visible pixels
+    )
+
+
+def analyse_image(image: "Image.Image") -> ImageAnalysis:
+    """Analyse a PIL image of any mode."""
+    if "A" not in image.getbands() and "transparency" not in image.info:
+        # Opaque: no padding, and only the colour check is left
+        width, height = image.size
+        if image.mode in ("1", "L", "I", "F"):
+            is_greyscale = True
+        else:
+            rgb = np.asarray(image.convert("RGB"))
+            is_greyscale = not ((rgb[..., 0] ^ rgb[..., 1]) | (rgb[..., 1] ^ rgb[..., 2])).any()
+        return ImageAnalysis(width=width, height=height, bounding_box=(0, 0, width, height), has_transparency=False,
+                             is_greyscale=is_greyscale)
+    return analyse_pixels(np.asarray(image if image.mode == "RGBA" else image.convert("RGBA")))
+
+
+@lru_cache(maxsize=ANALYSIS_CACHE_SIZE)
+def _analyse_file(path: str, mtime_ns: int, size: int) -> ImageAnalysis | None:
+    try:
+        with Image.open(path) as image:
+            return analyse_image(image)
+    except Exception as exception:  # Unreadable images are treated as plain images
+        LOGGER.debug(f"Cannot analyse {path}: {exception}")
+        return None
+
+
+def analyse_image_file(path: Path) -> ImageAnalysis | None:
+    """Analyse an image file, cached until the file changes.
+
+    Args:
+        path (Path): Image file.
+
+    Returns:
+        ImageAnalysis | None: None if PIL is missing or the file cannot be read.
+    """
+    if not HAS_PIL:
+        return None
+    try:
+        stat = Path(path).stat()
+    except OSError:
+        return None
+    return _analyse_file(str(path), stat.st_mtime_ns, stat.st_size)
@@ -1,37 +1,136 @@
-from core.core_paths import image_path
+"""Image recolouring.
+
+The kernels work on whole NumPy pixel arrays rather than pixel by pixel: the fill reads each RGBA pixel as one uint32
+(see core.image_analysis), and the tint and background composite look every value up in per-channel tables, which
+match PIL's Image.blend and Image.alpha_composite exactly. The file functions load an image, apply a kernel and save
+the result atomically, so an interrupted batch (see robocross.category_images) never leaves a truncated file that
+looks up to date.
+"""
+from __future__ import annotations
+
+import io
+import logging
+
 from pathlib import Path
-from PIL import Image, ImageColor, ImageDraw
 
+import numpy as np
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+from core.core_paths import image_path
+from core.logging_utils import get_logger
+from core.persistence import atomic_write_bytes
+
+LOGGER = get_logger(name=__name__, level=logging.INFO)
 
 RED = (255, 0, 0)
 LIGHT_GREY = (216, 216, 216)
 
 
-def tint_image(path: Path, output_path: Path, rgb: tuple[int, int, int], factor=0.3):
-    try:
-        image = Image.open(path.as_posix())
-        image = image.convert("RGB")
-        rgb_string = ", ".join(str(x) for x in rgb)
-        tint_rgb = ImageColor.getrgb(f"rgb({rgb_string})")
+def _packed(rgba: np.ndarray) -> np.ndarray:
+    """(height, width) uint32 view of an (height, width, 4) uint8 RGBA array: R | G << 8 | B << 16 | A << 24."""
+    return np.ascontiguousarray(rgba, dtype=np.uint8).view("<u4")[..., 0]
+
+
+def fill_foreground_pixels(rgba: np.ndarray, rgb: tuple[int, int, int]) -> np.ndarray:
+    """Every visible pixel (alpha > 0) of an RGBA array set to an opaque colour, transparent pixels unchanged.
+
+    Args:
+        rgba (np.ndarray): (height, width, 4) uint8 array.
+        rgb (tuple[int, int, int]): Fill colour.
+
+    Returns:
+        np.ndarray: New (height, width, 4) uint8 array.
+    """
+    pixels = _packed(rgba)
+    colour = np.array([*rgb, 255], dtype=np.uint8).view("<u4")[0]
+    return np.where(pixels >= 1 << 24, colour, pixels).view(np.uint8).reshape(rgba.shape)
+
+
+def fill_background_pixels(rgba: np.ndarray, rgb: tuple[int, int, int]) -> np.ndarray:
+    """An RGBA array composited over an opaque colour (as Image.alpha_composite).
+
+    Args:
+        rgba (np.ndarray): (height, width, 4) uint8 array.
+        rgb (tuple[int, int, int]): Background colour.
+
+    Returns:
+        np.ndarray: New opaque (height, width, 4) uint8 array.
+    """
+    # One table per channel, indexed by alpha << 8 | value: 64K entries instead of per-pixel arithmetic
+    alpha = np.arange(256, dtype=np.uint32)[:, None]
+    values = np.arange(256, dtype=np.uint32)[None, :]
+    index = rgba[..., 3].astype(np.uint16) << 8
+    result = np.empty_like(rgba)
+    for channel, background in enumerate(rgb):
+        table = ((values * alpha + background * (255 - alpha) + 127) // 255).astype(np.uint8).ravel()
+        result[..., channel] = table[index | rgba[..., channel]]
+    result[..., 3] = 255
+    return result
 
-        tinted_image = Image.new("RGB", image.size, tint_rgb)
-        blended_image = Image.blend(image, tinted_image, factor)
-        blended_image.save(output_path.as_posix())
-        blended_image.show()
-        print(f"Image tinted and saved to {output_path}")
 
-    except FileNotFoundError:
-        print(f"Error: Image not found at {path}")
-    except Exception as e:
-        print(f"An error occurred: {e}")
+def tint_pixels(pixels: np.ndarray, rgb: tuple[int, int, int], factor: float = 0.3) -> np.ndarray:
+    """Pixels blended towards a colour (as Image.blend with a plain image of that colour).
+
+    Args:
+        pixels (np.ndarray): (height, width, 3) uint8 RGB array.
+        rgb (tuple[int, int, int]): Tint colour.
+        factor (float): 0 keeps the image, 1 is the plain colour.
+
+    Returns:
+        np.ndarray: New (height, width, 3) uint8 array.
+    """
+    # Each output value depends only on the input value of its channel: one 256-entry table per channel
+    values = np.arange(256, dtype=np.float32)
+    result = np.empty_like(pixels)
+    for channel, colour in enumerate(rgb):
+        table = np.clip(values + (np.float32(colour) - values) * np.float32(factor), 0, 255).astype(np.uint8)
+        result[..., channel] = table[pixels[..., channel]]
+    return result
+
+
+def load_pixels(path: Path, mode: str = "RGBA") -> np.ndarray:
+    """An image file as a (height, width, channels) uint8 array."""
+    with Image.open(path) as image:
+        return np.asarray(image.convert(mode))
+
+
+def save_pixels(pixels: np.ndarray, output_path: Path, text: dict[str, str] | None = None) -> None:
+    """Save a uint8 pixel array atomically, in the format of the output suffix.
+
+    Args:
+        pixels (np.ndarray): (height, width, 3 or 4) uint8 array.
+        output_path (Path): Output file.
+        text (dict[str, str] | None): PNG text chunks, ignored by other formats.
+    """
+    output_path = Path(output_path)
+    image_format = Image.registered_extensions()[output_path.suffix.lower()]
+    options = {}
+    if text and image_format == "PNG":
+        options["pnginfo"] = PngInfo()
+        for key, value in text.items():
+            options["pnginfo"].add_text(key, value)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format=image_format, **options)
+    atomic_write_bytes(output_path, buffer.getvalue())
+
+
+def tint_image(path: Path, output_path: Path, rgb: tuple[int, int, int], factor=0.3):
+    """Blend an image towards a color. The result is RGB.
+
+    Args:
+        path: Path to the image file.
+        output_path: Output path.
+        rgb: Tint color.
+        factor: 0 keeps the image, 1 is the plain color.
+    """
+    save_pixels(tint_pixels(load_pixels(path, mode="RGB"), rgb, factor), output_path)
+    LOGGER.debug(f"Image tinted and saved to {output_path}")
 
 
 def fill_background(path: Path, output_path: Path, rgb: tuple[int, int, int]):
     """Fill the background of a transparent image."""
-    image = Image.open(path).convert("RGBA")
-    background = Image.new("RGBA", image.size, rgb + (255,))
-    result = Image.alpha_composite(background, image)
-    result.save(output_path)
+    save_pixels(fill_background_pixels(load_pixels(path), rgb), output_path)
 
 
 def fill_foreground(path: Path, output_path: Path, rgb: tuple[int, int, int]) -> None:
@@ -40,17 +139,9 @@ def fill_foreground(path: Path, output_path: Path, rgb: tuple[int, int, int]) ->
     Args:
         path: Path to the image file.
         output_path: Output path.
-        rgb: Color to fill with, as an RGBA tuple (e.g., (255, 0, 0, 255) for red).
+        rgb: Color to fill with, as an RGB tuple (e.g., (255, 0, 0) for red).
     """
-    img = Image.open(path).convert("RGBA")
-    pixels = img.load()
-    width, height = img.size
-    rgba = (*list(rgb), 255)
-    for x in range(width):
-        for y in range(height):
-            if pixels[x, y][3] > 0:  # Check if pixel is not fully transparent
-                pixels[x, y] = rgba
-    img.save(output_path)
+    save_pixels(fill_foreground_pixels(load_pixels(path), rgb), output_path)
 
 def resize(path: Path, new_width = 320, text_suffix: str = ""):
     # Open the image
@@ -78,4 +169,4 @@ if __name__ == "__main__":
     # fill_foreground(path=image_path("save.png"), rgb=LIGHT_GREY, output_path=IMAGE_FOLDER / "save_grey.png")
     # my_image = image_path('splashscreen.png')
     # print(my_image)
-    # resize(path=my_image, new_width=640, text_suffix="_640")
\ No newline at end of file
+    # resize(path=my_image, new_width=640, text_suffix="_640")
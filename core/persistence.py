@@ -0,0 +1,245 @@
+"""Crash-safe file persistence.
+
+Whole documents are written to a temp file in the same directory, fsynced and atomically renamed over the target,
+so a crash leaves either the old or the new file, never a truncated one.
+
+JournaledDocument adds an append-only change journal next to a JSON document: small edits append one record
+instead of rewriting the document, loaders replay the journal, and the journal is periodically compacted back into
+the document. The journal starts with a hash of the document it applies to, so a journal left behind when the
+document is replaced (a crash between writing the document and deleting the journal) is recognised and ignored.
+Document hashes are remembered per file stat, so appending to the journal does not read the whole document again.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from pathlib import Path
+from typing import Any, Sequence
+
+from core.logging_utils import get_logger
+
+LOGGER = get_logger(name=__name__, level=logging.INFO)
+
+JOURNAL_SUFFIX = ".journal"
+DEFAULT_COMPACT_AFTER = 64
+
+
+def _fsync_directory(directory: Path) -> None:
+    """Persist a rename (not supported on Windows, where the rename is already durable)."""
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write a file via temp file + fsync + atomic rename.
+
+    Args:
+        path (Path): Target file.
+        data (bytes): New contents.
+    """
+    path = Path(path)
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with temp_path.open("wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+    _fsync_directory(path.parent)
+
+
+def atomic_write_json(path: Path, data: Any, indent: int | None = 4) -> None:
+    """Write a JSON file atomically."""
+    atomic_write_bytes(path, json.dumps(data, indent=indent).encode("utf-8"))
+
+
+_DIGESTS: dict[Path, tuple[tuple[int, int, int], str]] = {}  # Document -> (stat key, digest)
+_DIGESTS_LOCK = threading.Lock()
+
+
+def _document_digest(document_bytes: bytes) -> str:
+    return hashlib.blake2b(document_bytes, digest_size=16).hexdigest()
+
+
+def _file_key(path: Path) -> tuple[int, int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def _remember_digest(path: Path, digest: str) -> None:
+    with _DIGESTS_LOCK:
+        _DIGESTS[path.resolve()] = (_file_key(path), digest)
+
+
+def _current_digest(path: Path) -> str:
+    """Digest of a document, read and hashed only if the file changed since it was last hashed."""
+    key = _file_key(path)
+    with _DIGESTS_LOCK:
+        known = _DIGESTS.get(path.resolve())
+    if known is not None and known[0] == key:
+        return known[1]
+    digest = _document_digest(path.read_bytes())
+    _remember_digest(path, digest)
+    return digest
+
+
+def _apply(document: dict, op: Sequence) -> None:
+    """Apply one journal operation: ["set", keys, value] or ["del", keys]."""
+    action, keys = op[0], op[1]
+    parent = document
+    for key in keys[:-1]:
+        parent = parent.setdefault(key, {})
+    if action == "set":
+        parent[keys[-1]] = op[2]
+    elif action == "del":
+        parent.pop(keys[-1], None)
+    else:
+        raise ValueError(f"Unknown journal operation: {action}")
+
+
+class JournaledDocument:
+    """JSON document with an append-only change journal.
+
+    The first journal line is {"base": <document hash>}. Each further line is one JSON record {"ops": [...]} applied
+    as a unit. Operations address nested keys, e.g. ["set", ["cardio", "burpees"], {...}] or
+    ["del", ["cardio", "burpees"]]. A partly written last line (a crash mid-append) is ignored on replay, and so is a
+    journal whose base is not the current document.
+    """
+
+    def __init__(self, path: Path, compact_after: int = DEFAULT_COMPACT_AFTER, indent: int | None = 4):
+        """Initialise the document.
+
+        Args:
+            path (Path): JSON document. The journal is kept next to it with a .journal suffix.
+            compact_after (int): Number of journal records after which the journal is folded into the document.
+            indent (int | None): JSON indentation used when the document is rewritten.
+        """
+        self.path = Path(path)
+        self.journal_path = self.path.with_name(self.path.name + JOURNAL_SUFFIX)
+        self.compact_after = compact_after
+        self.indent = indent
+
+    def __repr__(self) -> str:
+        return f"JournaledDocument | {self.path.name}"
+
+    def stat_key(self) -> tuple[int, int]:
+        """(mtime_ns, size) covering both the document and its journal."""
+        stat = self.path.stat()
+        mtime_ns, size = stat.st_mtime_ns, stat.st_size
+        if self.journal_path.exists():
+            journal_stat = self.journal_path.stat()
+            mtime_ns = max(mtime_ns, journal_stat.st_mtime_ns)
+            size += journal_stat.st_size
+        return mtime_ns, size
+
+    def read_bytes(self) -> bytes:
+        """Raw document followed by the raw journal, as accepted by replay()."""
+        raw = self.path.read_bytes()
+        if self.journal_path.exists():
+            raw += b"\0" + self.journal_path.read_bytes()
+        return raw
+
+    def replay(self, raw: bytes) -> dict:
+        """Parse raw bytes from read_bytes() into the current document."""
+        document_bytes, _, journal_bytes = raw.partition(b"\0")
+        document = json.loads(document_bytes)
+        for line_number, line in enumerate(journal_bytes.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                LOGGER.warning(f"Ignoring incomplete record {line_number} in {self.journal_path.name}")
+                continue
+            if "base" in record:
+                if record["base"] != _document_digest(document_bytes):
+                    LOGGER.warning(f"Ignoring {self.journal_path.name}: superseded by {self.path.name}")
+                    break
+                continue
+            for op in record["ops"]:
+                _apply(document, op)
+        return document
+
+    def load(self) -> dict:
+        """Load the document with the journal replayed."""
+        return self.replay(self.read_bytes())
+
+    def _journal_record_count(self) -> int:
+        if not self.journal_path.exists():
+            return 0
+        with self.journal_path.open("rb") as f:
+            return sum(1 for line in f if line.startswith(b'{"ops"'))
+
+    def _journal_is_current(self) -> bool:
+        """True if the journal applies to the current document (journals without a base predate the marker)."""
+        with self.journal_path.open("rb") as f:
+            first_line = f.readline()
+        try:
+            base = json.loads(first_line).get("base")
+        except (json.JSONDecodeError, AttributeError):
+            return True
+        return base is None or base == _current_digest(self.path)
+
+    def append(self, ops: Sequence[Sequence]) -> None:
+        """Append one journal record and compact if the journal has grown past compact_after records.
+
+        Args:
+            ops (Sequence[Sequence]): Operations applied together, e.g. [["del", [...]], ["set", [...], value]].
+        """
+        line = json.dumps({"ops": list(ops)}).encode("utf-8") + b"\n"
+        if self.journal_path.exists() and not self._journal_is_current():
+            self.journal_path.unlink()  # Left behind by a replaced document, whose contents it must not touch
+        with self.journal_path.open("ab") as f:
+            if not f.tell():
+                line = json.dumps({"base": _current_digest(self.path)}).encode("utf-8") + b"\n" + line
+            elif not self._ends_with_newline():
+                line = b"\n" + line  # Start fresh after a partly written record
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        if self._journal_record_count() >= self.compact_after:
+            self.compact()
+
+    def _ends_with_newline(self) -> bool:
+        with self.journal_path.open("rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def set(self, keys: Sequence[str], value: Any) -> None:
+        self.append([["set", list(keys), value]])
+
+    def delete(self, keys: Sequence[str]) -> None:
+        self.append([["del", list(keys)]])
+
+    def write(self, document: dict) -> None:
+        """Replace the whole document atomically, discarding the journal it supersedes.
+
+        The document is written first, so a crash in between keeps the journaled edits until the new document is in
+        place. A journal left behind after that no longer matches the document and is ignored.
+        """
+        self._write_document(document)
+        self.journal_path.unlink(missing_ok=True)
+
+    def _write_document(self, document: dict) -> None:
+        document_bytes = json.dumps(document, indent=self.indent).encode("utf-8")
+        atomic_write_bytes(self.path, document_bytes)
+        _remember_digest(self.path, _document_digest(document_bytes))
+
+    def compact(self) -> None:
+        """Fold the journal into the document."""
+        if self.journal_path.exists():
+            self._write_document(self.load())
+            # Should this not happen, the journal no longer matches the compacted document and is ignored
+            self.journal_path.unlink(missing_ok=True)
+            LOGGER.debug(f"Compacted {self.journal_path.name}")
@@ -1,11 +1,18 @@
+"""Robocross package.
+
+Importing the package does no file I/O: the catalog-backed attributes (WORKOUT_CATEGORIES, get_catalog, WorkoutData)
+are resolved on first access through the module __getattr__.
+"""
 from __future__ import annotations
 
-import json
-from pathlib import Path
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Mapping
 
-from core.core_paths import DATA_FILE_PATH
 from robocross.robocross_enums import WorkoutType
-from robocross.workout_data import WorkoutData
+
+if TYPE_CHECKING:
+    from robocross.catalog_cache import get_catalog
+    from robocross.workout_data import WorkoutData
 
 
 REST_PERIOD: str = "rest period"
@@ -23,23 +30,37 @@ SCROLL_PANEL_WIDTH: int = 320
 IMAGE_PADDING: int = 20  # Padding/margin for workout images in pixels
 TOOL_TIP_SIZE: int = 32  # Font size for transport button tooltips
 
-def get_workout_data() -> dict:
-    """Get workout data"""
-    with DATA_FILE_PATH.open("r") as f:
-        data = json.load(f)
-    return data
+def get_workout_data() -> Mapping:
+    """Get workout data (read-only view of the shared catalog)."""
+    from robocross.catalog_cache import get_catalog
+
+    return get_catalog().hierarchical_data
 
 def get_workout_categories() -> list[str]:
     """Get workout categories."""
-    return list(get_workout_data().keys())
+    from robocross.catalog_cache import get_catalog
+
+    return get_catalog().categories
+
+def __getattr__(name: str) -> Any:
+    """Resolve catalog-backed attributes on first access, keeping package import free of file I/O."""
+    if name == "WORKOUT_CATEGORIES":  # Workout categories - loaded dynamically from workout data
+        return get_workout_categories()
+    if name == "get_catalog":
+        from robocross.catalog_cache import get_catalog
+
+        return get_catalog
+    if name == "WorkoutData":
+        from robocross.workout_data import WorkoutData
 
-# Workout categories - loaded dynamically from workout data
-WORKOUT_CATEGORIES = get_workout_categories()
+        return WorkoutData
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_category_color(category: str) -> str:
     """Get the color for a given category name."""
     return CATEGORY_COLORS.get(category.lower(), '#95A5A6')
 
+@lru_cache(maxsize=None)
 def get_contrast_text_color(bg_color: str) -> str:
     """
     Determine if text should be white or black based on background color luminance.
@@ -0,0 +1,230 @@
+"""Headless bulk routine generation.
+
+Expands a parameter matrix (every combination of the given values, times a list of seeds) into routines, generated
+in parallel worker processes, and streams one session per line (JSON Lines) in the same schema as saved session
+files, so each line can be loaded by the app as is. Progress and throughput go to stderr.
+
+The catalog snapshot is compiled once by the parent process; each worker maps the same read-only snapshot file.
+
+Usage:
+    python -m robocross.bulk_generate --length 30 45 --interval 45 60 --categories cardio,strength \\
+        --categories cardio,combat --equipment mat,dumbbell --seeds 30 --seed 2024 -o programmes.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable, Iterator, NamedTuple, TextIO
+
+from core.logging_utils import get_logger
+from robocross.catalog_cache import get_catalog
+from robocross.intensity_profile import PROFILES
+from robocross.robocross_enums import Equipment
+from robocross.routine import Routine
+from robocross.sampling import new_seed, spawn_seeds
+
+LOGGER = get_logger(name=__name__, level=logging.INFO)
+
+PROGRESS_INTERVAL = 1.0  # seconds
+DEFAULT_NAME = "{workout_structure} {workout_length} min #{index}"
+
+
+class Job(NamedTuple):
+    index: int
+    params: dict  # Routine.params
+    seed: int
+    workout_cycles: int
+    workout_name: str
+
+
+def expand_matrix(matrix: dict[str, list], seeds: list[int]) -> Iterator[tuple[dict, int]]:
+    """Every combination of the matrix values, for every seed.
+
+    Args:
+        matrix (dict[str, list]): Routine parameter name -> values to generate, e.g. {"workout_length": [30, 45]}.
+        seeds (list[int]): Seeds to generate each combination with.
+
+    Returns:
+        Iterator[tuple[dict, int]]: (parameters, seed) pairs.
+    """
+    keys = list(matrix)
+    for values in itertools.product(*(matrix[key] for key in keys)):
+        for seed in seeds:
+            yield dict(zip(keys, values)), seed
+
+
+def make_jobs(matrix: dict[str, list], seeds: list[int], workout_cycles: int = 1,
+              name_template: str = DEFAULT_NAME) -> list[Job]:
+    """Resolve the matrix into jobs with complete, validated routine parameters."""
+    jobs = []
+    for index, (params, seed) in enumerate(expand_matrix(matrix, seeds)):
+        routine_params = Routine.from_params(params, seed=seed).params  # Fills in defaults, rejects bad names
+        jobs.append(Job(index=index, params=routine_params, seed=seed, workout_cycles=workout_cycles,
+                        workout_name=name_template.format(index=index, seed=seed, **routine_params)))
+    return jobs
+
+
+def generate_session(job: Job) -> dict[str, Any]:
+    """Build one routine and return it as session data."""
+    routine = Routine.from_params(job.params, seed=job.seed)
+    routine.get_workout_list()
+    return {
+        "workout_name": job.workout_name,
+        "workout_cycles": job.workout_cycles,
+        "workouts": [item.to_workout().to_dict() for item in routine.schedule],
+        "rest_time": routine.rest_time,
+        "rest_times": [item.rest for item in routine.schedule],
+        "saved_at": datetime.now().strftime("%Y/%m/%d %H:%M:%S"),
+        "routine": {"seed": routine.seed, "params": routine.params},
+    }
+
+
+def _generate_line(job: Job) -> str:
+    """Worker task, serializing in the worker to keep the parent free for writing."""
+    return json.dumps(generate_session(job))
+
+
+def quiet_routine_logging(level: int = logging.WARNING) -> None:
+    """Raise the level of the other robocross loggers, so per-routine messages do not bury the progress lines."""
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("robocross.") and name != __name__:
+            logging.getLogger(name).setLevel(level)
+
+
+def _init_worker() -> None:
+    get_catalog()  # Map the shared snapshot once per process
+    quiet_routine_logging()
+
+
+def generate(jobs: list[Job], output: TextIO, workers: int | None = None, chunksize: int = 16) -> int:
+    """Generate routines in parallel and write them to output as JSON Lines, in job order.
+
+    Args:
+        jobs (list[Job]): Jobs from make_jobs().
+        output (TextIO): Stream receiving one session per line.
+        workers (int | None): Worker processes, defaults to the CPU count. 1 generates in this process.
+        chunksize (int): Jobs sent to a worker at a time.
+
+    Returns:
+        int: Number of routines written.
+    """
+    get_catalog()  # Compile the snapshot before the workers start, rather than in every worker at once
+    workers = workers or os.cpu_count() or 1
+    start = last_report = time.perf_counter()
+    written = 0
+
+    def report(final: bool = False) -> None:
+        elapsed = time.perf_counter() - start
+        rate = written / elapsed if elapsed else 0.0
+        LOGGER.info(f"{'Done' if final else 'Progress'}: {written}/{len(jobs)} routines, {elapsed:.1f} s, "
+                    f"{rate:.0f} routines/s")
+
+    def write(lines: Iterable[str]) -> None:
+        nonlocal written, last_report
+        for line in lines:
+            output.write(line + "\n")
+            written += 1
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL:
+                report()
+                last_report = now
+
+    if workers == 1:
+        write(map(_generate_line, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            write(executor.map(_generate_line, jobs, chunksize=chunksize))
+    output.flush()
+    report(final=True)
+    return written
+
+
+def _csv(value: str) -> list[str]:
+    return [x.strip() for x in value.split(",") if x.strip()]
+
+
+def _weights(value: str) -> dict[str, int]:
+    """Parse "cardio=60,strength=40" into {"cardio": 60, "strength": 40}."""
+    weights = {}
+    for item in _csv(value):
+        category, _, weight = item.partition("=")
+        weights[category] = int(weight)
+    return weights
+
+
+def _equipment_filter(value: str) -> list[str]:
+    """Available equipment ("mat,dumbbell", "all" or "none") -> names of the excluded equipment."""
+    if value == "all":
+        return []
+    available = set() if value == "none" else set(_csv(value))
+    unknown = available - set(Equipment.__members__)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown equipment: {', '.join(sorted(unknown))}")
+    return [x.name for x in Equipment if x.name not in available]
+
+
+def build_matrix(args: argparse.Namespace) -> dict[str, list]:
+    """Combine the matrix file (if any) with the command line axes, which take precedence."""
+    matrix = json.loads(Path(args.matrix).read_text()) if args.matrix else {}
+    axes = {
+        "workout_length": args.length,
+        "interval": args.interval,
+        "rest_time": args.rest_time,
+        "workout_structure": args.structure,
+        "selected_categories": args.categories,
+        "category_weights": args.weights,
+        "equipment_filter": args.equipment,
+        "best_of": args.best_of,
+        "intensity_profile": args.profile,
+    }
+    matrix.update({key: values for key, values in axes.items() if values})
+    return matrix
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate routines for every combination of parameters.")
+    parser.add_argument("--matrix", help="JSON file mapping Routine parameters to lists of values")
+    parser.add_argument("--length", type=int, nargs="+", help="workout lengths (minutes)")
+    parser.add_argument("--interval", type=int, nargs="+", help="exercise intervals (seconds)")
+    parser.add_argument("--rest-time", type=int, nargs="+", help="minimum rest times (seconds)")
+    parser.add_argument("--structure", nargs="+", choices=("Random", "Sequence", "Balanced", "Profile"),
+                        help="workout structures")
+    parser.add_argument("--categories", type=_csv, action="append", help="category set, e.g. cardio,strength")
+    parser.add_argument("--weights", type=_weights, action="append",
+                        help="category weights, e.g. cardio=60,strength=40")
+    parser.add_argument("--equipment", type=_equipment_filter, action="append",
+                        help="available equipment set, e.g. mat,dumbbell (or all, none)")
+    parser.add_argument("--profile", nargs="+", choices=tuple(PROFILES), help="intensity profiles (Profile structure)")
+    parser.add_argument("--best-of", type=int, nargs="+", help="candidates each routine is the best of")
+    parser.add_argument("--seeds", type=int, default=1, help="routines per combination (default 1)")
+    parser.add_argument("--seed", type=int, help="base seed the per-routine seeds are derived from (random if omitted)")
+    parser.add_argument("--cycles", type=int, default=1, help="circuit cycles recorded in each session")
+    parser.add_argument("--name", default=DEFAULT_NAME, help=f"workout name template (default '{DEFAULT_NAME}')")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("-o", "--output", help="JSON Lines output file (default: stdout)")
+    args = parser.parse_args(argv)
+    quiet_routine_logging()
+
+    base_seed = new_seed() if args.seed is None else args.seed
+    jobs = make_jobs(build_matrix(args), spawn_seeds(base_seed, args.seeds), workout_cycles=args.cycles,
+                     name_template=args.name)
+    LOGGER.info(f"{len(jobs)} routines, base seed {base_seed}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            generate(jobs, output, workers=args.workers)
+    else:
+        generate(jobs, sys.stdout, workers=args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
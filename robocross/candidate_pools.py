@@ -0,0 +1,66 @@
+"""Candidate pools: the exercises a routine may draw from.
+
+The pools are resolved from the catalog once, when the routine is created, and are immutable afterwards, so every
+generation strategy (and every re-roll) draws from the same tuples instead of querying the catalog per slot.
+"""
+from __future__ import annotations
+
+import logging
+import time
+
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Sequence
+
+from core.logging_utils import get_logger
+from robocross.exercise_catalog import ExerciseRecord
+from robocross.robocross_enums import AerobicType
+from robocross.workout_data import WorkoutData
+
+LOGGER = get_logger(name=__name__, level=logging.DEBUG)
+
+WARM_UP_CATEGORY = AerobicType.cardio.name
+COOL_DOWN_CATEGORY = AerobicType.flexibility.name
+
+
+class CandidatePools(NamedTuple):
+    """Exercises available to a routine."""
+    by_category: Mapping[str, tuple[ExerciseRecord, ...]]  # Selected categories, every filter applied
+    warm_up: tuple[ExerciseRecord, ...]  # Warm up exercises (nope list and equipment filter only), if enabled
+    cool_down: tuple[ExerciseRecord, ...]  # Cool down exercises (nope list and equipment filter only), if enabled
+
+    @classmethod
+    def build(cls, workout_data: WorkoutData, categories: Sequence[str], warm_up: bool = False,
+              cool_down: bool = False) -> CandidatePools:
+        """Resolve the pools.
+
+        Args:
+            workout_data (WorkoutData): Filtered view of the catalog.
+            categories (Sequence[str]): Selected categories.
+            warm_up (bool): Resolve the warm up pool.
+            cool_down (bool): Resolve the cool down pool.
+
+        Returns:
+            CandidatePools: The pools, logged with their sizes and construction time.
+        """
+        start = time.perf_counter()
+        pools = cls(
+            by_category=MappingProxyType(
+                {category: tuple(workout_data.get_records_by_category(category)) for category in categories}),
+            warm_up=tuple(workout_data.get_all_records_by_category(WARM_UP_CATEGORY)) if warm_up else (),
+            cool_down=tuple(workout_data.get_all_records_by_category(COOL_DOWN_CATEGORY)) if cool_down else (),
+        )
+        LOGGER.info(f"{pools} in {(time.perf_counter() - start) * 1000:.2f} ms")
+        return pools
+
+    def __repr__(self) -> str:
+        sizes = ", ".join(f"{category}: {len(pool)}" for category, pool in self.by_category.items())
+        return f"CandidatePools | {sizes}, warm up: {len(self.warm_up)}, cool down: {len(self.cool_down)}"
+
+    def category(self, category: str) -> tuple[ExerciseRecord, ...]:
+        """Exercises of a category, empty if the category is not selected."""
+        return self.by_category.get(category, ())
+
+    @property
+    def combined(self) -> tuple[ExerciseRecord, ...]:
+        """Exercises of every selected category."""
+        return tuple(record for pool in self.by_category.values() for record in pool)
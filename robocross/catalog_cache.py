@@ -0,0 +1,143 @@
+"""Process-wide shared exercise catalog.
+
+The exercise store (the workout data file, or a SQLite database, see exercise_store) is read once and the resulting
+ExerciseCatalog is handed out to every consumer. The cache is keyed on the file's modification time and size, falling
+back to a content hash so that touching the file without changing it does not trigger a rebuild. A SQLite store is
+keyed on its id and revision instead, so checking it costs one small query and an edit never rehashes the database.
+
+Catalogs are served from a memory-mapped binary snapshot (see catalog_snapshot) when one matches the data file, so a
+warm start neither reads nor parses the JSON. The snapshot is recompiled whenever the data file changes, and the JSON
+is used directly if the snapshot cannot be written or the data cannot be represented in one.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+from core.logging_utils import get_logger
+from core.persistence import JournaledDocument
+from robocross.catalog_snapshot import (
+    CatalogSnapshot, SnapshotError, SourceStamp, compile_snapshot, snapshot_path_for, write_snapshot)
+from robocross.exercise_catalog import ExerciseCatalog
+from robocross.exercise_store import SqliteExerciseStore, get_store, is_sqlite_path
+from robocross.schema import log_issues, validate_catalog
+
+LOGGER = get_logger(name=__name__, level=logging.INFO)
+
+
+class _CacheEntry(NamedTuple):
+    stat_key: tuple[int, int]
+    content_hash: str
+    catalog: ExerciseCatalog
+
+
+_CACHE: dict[Path, _CacheEntry] = {}
+_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _sqlite_store(path: Path) -> SqliteExerciseStore:
+    return SqliteExerciseStore(path, seed_path=None)
+
+
+def _source_version(path: Path) -> tuple[tuple[int, int], str | None]:
+    """Stat key and, for a SQLite store, the content hash (a workout data file has to be read to hash it)."""
+    if is_sqlite_path(path):
+        store_id, revision = _sqlite_store(path).version()
+        return (revision, 0), hashlib.sha256(f"{store_id}:{revision}".encode()).hexdigest()
+    return JournaledDocument(path).stat_key(), None
+
+
+def _parse_source(path: Path, raw: bytes) -> dict:
+    """Hierarchical data from a SQLite store, or from a workout data file with its journal replayed."""
+    if is_sqlite_path(path):
+        return _sqlite_store(path).load()
+    return JournaledDocument(path).replay(raw)
+
+
+def _open_snapshot(path: Path) -> CatalogSnapshot | None:
+    try:
+        return CatalogSnapshot(snapshot_path_for(path))
+    except SnapshotError:
+        return None
+
+
+def _load_catalog(path: Path, stat_key: tuple[int, int], raw: bytes, content_hash: str,
+                  snapshot: CatalogSnapshot | None) -> ExerciseCatalog:
+    """Load the catalog from a current snapshot, recompiling the snapshot from the JSON if it is stale."""
+    stamp = SourceStamp(*stat_key, sha256=bytes.fromhex(content_hash))
+    snapshot_path = snapshot_path_for(path)
+    if snapshot and snapshot.source_stamp.sha256 == stamp.sha256:
+        # Source touched but unchanged: keep the compiled contents, update the stamp
+        try:
+            write_snapshot(snapshot_path, snapshot.restamped(stamp))
+        except OSError as e:
+            LOGGER.warning(f"Cannot update catalog snapshot {snapshot_path.name}: {e}")
+        return ExerciseCatalog.from_snapshot(snapshot)
+
+    validation = validate_catalog(_parse_source(path, raw), content_hash=content_hash)
+    log_issues(validation.issues, source=path.name)
+    loaded_data = validation.data
+    try:
+        write_snapshot(snapshot_path, compile_snapshot(loaded_data, stamp))
+        LOGGER.debug(f"Compiled catalog snapshot {snapshot_path.name}")
+        return ExerciseCatalog.from_snapshot(CatalogSnapshot(snapshot_path))
+    except (SnapshotError, OSError) as e:
+        LOGGER.warning(f"Catalog snapshot unavailable, using {path.name}: {e}")
+        return ExerciseCatalog.from_json_data(loaded_data)
+
+
+def get_catalog(path: Path | None = None) -> ExerciseCatalog:
+    """Get the shared catalog for a workout data file, reloading it only if the file has changed.
+
+    Args:
+        path (Path | None): Path to the workout data file or SQLite store. Defaults to the configured store.
+
+    Returns:
+        ExerciseCatalog: Read-only catalog shared by all callers.
+    """
+    path = path or get_store().path
+    with _LOCK:
+        entry = _CACHE.get(path)
+        stat_key, known_hash = _source_version(path)
+        if entry and entry.stat_key == stat_key and known_hash in (None, entry.content_hash):
+            return entry.catalog
+
+        # Warm start: a snapshot stamped with the current stat is trusted without reading the source
+        snapshot = _open_snapshot(path) if entry is None else None
+        if (snapshot and snapshot.source_stamp[:2] == stat_key
+                and known_hash in (None, snapshot.source_stamp.sha256.hex())):
+            catalog = ExerciseCatalog.from_snapshot(snapshot)
+            _CACHE[path] = _CacheEntry(stat_key=stat_key, content_hash=snapshot.source_stamp.sha256.hex(),
+                                       catalog=catalog)
+            LOGGER.debug(f"Loaded {catalog} from {snapshot.path.name}")
+            return catalog
+
+        raw = b"" if known_hash else JournaledDocument(path).read_bytes()
+        content_hash = known_hash or hashlib.sha256(raw).hexdigest()
+        if entry and entry.content_hash == content_hash:
+            _CACHE[path] = entry._replace(stat_key=stat_key)
+            return entry.catalog
+
+        catalog = _load_catalog(path=path, stat_key=stat_key, raw=raw, content_hash=content_hash, snapshot=snapshot)
+        _CACHE[path] = _CacheEntry(stat_key=stat_key, content_hash=content_hash, catalog=catalog)
+        LOGGER.debug(f"Loaded {catalog} from {path.name}")
+        return catalog
+
+
+def invalidate(path: Path | None = None) -> None:
+    """Drop the cached catalog so that the next get_catalog() call reloads it.
+
+    Args:
+        path (Path | None): Path to the workout data file. If None, all cached catalogs are dropped.
+    """
+    with _LOCK:
+        if path is None:
+            _CACHE.clear()
+        else:
+            _CACHE.pop(path, None)
@@ -0,0 +1,421 @@
+"""Compact binary snapshot of the exercise catalog.
+
+The workout data file is compiled into a versioned snapshot made of a string table and fixed-width records holding
+enum ordinals and bitmasks. Snapshots are memory-mapped and decoded lazily, so opening one costs the same however
+large the exercise library is.
+
+Keys the records have no field for (such as "time"), and key orders other than the usual ones, are kept in an extras
+string: a JSON array of the exercise's keys in source order and an object of the values of the unknown keys. So any
+validated exercise round-trips exactly.
+
+Layout (little-endian):
+    header
+    string offsets      (string_count + 1) x u32, into the string blob
+    category table      category_count x u32 string ids
+    records             record_count x RECORD
+    ordinal table       ordinal_count x u32, equipment and target ordinals in source order
+    sub-workout table   sub_count x u32 string ids
+    string blob         UTF-8
+
+Usage:
+    python -m robocross.catalog_snapshot [source] [--output path]
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import struct
+
+from pathlib import Path
+from typing import Iterator, NamedTuple, Sequence
+
+from core.core_paths import CACHE_DIR, DATA_FILE_PATH
+from core.logging_utils import get_logger
+from core.persistence import JournaledDocument, atomic_write_bytes
+from robocross.exercise_catalog import ExerciseRecord
+from robocross.robocross_enums import AerobicType, Equipment, Intensity, Target
+
+import numpy as np
+
+LOGGER = get_logger(name=__name__, level=logging.INFO)
+
+MAGIC = b"RXCS"
+FORMAT_VERSION = 3
+SNAPSHOT_SUFFIX = ".rxcs"
+
+# magic, version, reserved, record_count, category_count, string_count, ordinal_count, sub_count,
+# source mtime_ns, source size, source sha256, schema hash
+HEADER = struct.Struct("<4sHHIIIIIqQ32s8s")
+# name, description, category index, intensity ordinal, flags, equipment mask, target mask,
+# equipment start, equipment count, target start, target count, sub-workout start, sub-workout count, energy,
+# extras string id (NO_EXTRAS if none)
+RECORD = struct.Struct("<IIHBBIIIBIBIHdI")
+U32 = struct.Struct("<I")
+RECORD_DTYPE = np.dtype([
+    ("name", "<u4"), ("description", "<u4"), ("category", "<u2"), ("intensity", "u1"), ("flags", "u1"),
+    ("equipment", "<u4"), ("target", "<u4"), ("equipment_start", "<u4"), ("equipment_count", "u1"),
+    ("target_start", "<u4"), ("target_count", "u1"), ("sub_start", "<u4"), ("sub_count", "<u2"),
+    ("energy", "<f8"), ("extras", "<u4"),
+])
+assert RECORD_DTYPE.itemsize == RECORD.size
+NO_INTENSITY = 0xFF
+NO_EXTRAS = 0xFFFFFFFF
+
+EQUIPMENT_MEMBERS: tuple[Equipment, ...] = tuple(Equipment)
+TARGET_MEMBERS: tuple[Target, ...] = tuple(Target)
+INTENSITY_MEMBERS: tuple[Intensity, ...] = tuple(Intensity)
+
+# Record flags
+HAS_DESCRIPTION = 1 << 0
+HAS_EQUIPMENT = 1 << 1
+HAS_INTENSITY = 1 << 2
+HAS_TARGET = 1 << 3
+HAS_ENERGY = 1 << 4
+ENERGY_IS_INT = 1 << 5
+HAS_SUB_WORKOUTS = 1 << 6
+SUB_WORKOUTS_FIRST = 1 << 7  # sub_workouts precedes energy in the source
+
+BASE_KEYS = ("description", "equipment", "intensity", "target")
+RECORD_KEYS = frozenset(BASE_KEYS) | {"energy", "sub_workouts"}
+KEY_ORDERS = {
+    (): 0,
+    ("energy",): HAS_ENERGY,
+    ("sub_workouts",): HAS_SUB_WORKOUTS,
+    ("energy", "sub_workouts"): HAS_ENERGY | HAS_SUB_WORKOUTS,
+    ("sub_workouts", "energy"): HAS_ENERGY | HAS_SUB_WORKOUTS | SUB_WORKOUTS_FIRST,
+}
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot cannot be read, or the source data cannot be represented in one."""
+
+
+class SourceStamp(NamedTuple):
+    mtime_ns: int
+    size: int
+    sha256: bytes
+
+
+def _schema_hash() -> bytes:
+    """Fingerprint of the enum definitions the ordinals refer to."""
+    names = "|".join(",".join(member.name for member in members)
+                     for members in (EQUIPMENT_MEMBERS, TARGET_MEMBERS, INTENSITY_MEMBERS))
+    return hashlib.sha256(f"{FORMAT_VERSION}:{names}".encode()).digest()[:8]
+
+
+SCHEMA_HASH = _schema_hash()
+
+
+def snapshot_path_for(source: Path) -> Path:
+    """Default snapshot location for a workout data file."""
+    path_hash = hashlib.sha1(str(source.resolve()).encode()).hexdigest()[:8]
+    return CACHE_DIR / f"{source.stem}-{path_hash}{SNAPSHOT_SUFFIX}"
+
+
+def _ordinals_and_mask(ordinals: dict, values: Sequence) -> tuple[list[int], int]:
+    result = []
+    mask = 0
+    for value in values:
+        ordinal = ordinals.get(value)
+        if ordinal is None:
+            raise SnapshotError(f"Unknown enum name (data not validated?): {value!r}")
+        result.append(ordinal)
+        mask |= 1 << ordinal  # == member.bit
+    return result, mask
+
+
+def compile_snapshot(loaded_data: dict, stamp: SourceStamp) -> bytes:
+    """Compile hierarchical workout data {category: {exercise name: exercise data}} into a snapshot.
+
+    Args:
+        loaded_data (dict): Parsed workout data file.
+        stamp (SourceStamp): Stat and hash of the source file, stored so staleness can be detected.
+
+    Returns:
+        bytes: Snapshot contents.
+
+    Raises:
+        SnapshotError: If the data uses anything the snapshot cannot represent exactly.
+    """
+    if len(EQUIPMENT_MEMBERS) > 32 or len(TARGET_MEMBERS) > 32 or len(INTENSITY_MEMBERS) >= NO_INTENSITY:
+        raise SnapshotError("Enum too large for snapshot record")
+    if not isinstance(loaded_data, dict):
+        raise SnapshotError("Workout data must be a JSON object")
+
+    equipment_ordinals = {member.name: i for i, member in enumerate(EQUIPMENT_MEMBERS)}
+    target_ordinals = {member.name: i for i, member in enumerate(TARGET_MEMBERS)}
+    intensity_ordinals = {member.name: i for i, member in enumerate(INTENSITY_MEMBERS)}
+
+    strings: dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        if not isinstance(value, str):
+            raise SnapshotError(f"Expected a string: {value!r}")
+        return strings.setdefault(value, len(strings))
+
+    categories = []
+    records = bytearray()
+    ordinal_table = []
+    sub_table = []
+    record_count = 0
+    for category_index, (category, exercises) in enumerate(loaded_data.items()):
+        if not isinstance(exercises, dict) or any(not isinstance(x, dict) or "aerobic_type" in x
+                                                  for x in exercises.values()):
+            raise SnapshotError("Only the hierarchical {category: {exercise: data}} layout is supported")
+        categories.append(intern(category))
+        for name, value in exercises.items():
+            keys = tuple(value)
+            base_keys = tuple(k for k in BASE_KEYS if k in value)
+            flags = KEY_ORDERS.get(keys[len(base_keys):]) if keys[:len(base_keys)] == base_keys else None
+            extras_sid = NO_EXTRAS
+            if flags is None:
+                # Unknown keys or an unusual order: record the key order, and the values without a field
+                extras = [keys, {key: value[key] for key in keys if key not in RECORD_KEYS}]
+                try:
+                    extras_sid = intern(json.dumps(extras, ensure_ascii=False, separators=(",", ":")))
+                except (TypeError, ValueError) as e:
+                    raise SnapshotError(f"Unsupported values for {name}: {e}") from e
+                flags = (HAS_ENERGY if "energy" in value else 0) | (HAS_SUB_WORKOUTS if "sub_workouts" in value else 0)
+
+            description_sid = 0
+            if "description" in value:
+                flags |= HAS_DESCRIPTION
+                description_sid = intern(value["description"])
+            name_sid = intern(name)
+
+            equipment_start, equipment_mask, equipment = len(ordinal_table), 0, []
+            if "equipment" in value:
+                flags |= HAS_EQUIPMENT
+                if not isinstance(value["equipment"], list) or len(value["equipment"]) > 0xFF:
+                    raise SnapshotError(f"Unsupported equipment for {name}")
+                equipment, equipment_mask = _ordinals_and_mask(equipment_ordinals, value["equipment"])
+                ordinal_table.extend(equipment)
+
+            target_start, target_mask, target = len(ordinal_table), 0, []
+            if "target" in value:
+                flags |= HAS_TARGET
+                if not isinstance(value["target"], list) or len(value["target"]) > 0xFF:
+                    raise SnapshotError(f"Unsupported target for {name}")
+                target, target_mask = _ordinals_and_mask(target_ordinals, value["target"])
+                ordinal_table.extend(target)
+
+            intensity = NO_INTENSITY
+            if "intensity" in value:
+                flags |= HAS_INTENSITY
+                intensity = intensity_ordinals.get(value["intensity"]) if isinstance(value["intensity"], str) else None
+                if intensity is None:
+                    raise SnapshotError(f"Unknown Intensity value for {name}: {value['intensity']!r}")
+
+            energy = 0.0
+            if "energy" in value:
+                energy = value["energy"]
+                if isinstance(energy, bool) or not isinstance(energy, (int, float)):
+                    raise SnapshotError(f"Unsupported energy for {name}: {energy!r}")
+                if isinstance(energy, int):
+                    if abs(energy) > 2 ** 53:
+                        raise SnapshotError(f"Unsupported energy for {name}: {energy!r}")
+                    flags |= ENERGY_IS_INT
+
+            sub_start, sub_workouts = len(sub_table), []
+            if "sub_workouts" in value:
+                sub_workouts = value["sub_workouts"]
+                if not isinstance(sub_workouts, list) or len(sub_workouts) > 0xFFFF:
+                    raise SnapshotError(f"Unsupported sub_workouts for {name}")
+                sub_table.extend(intern(x) for x in sub_workouts)
+
+            records += RECORD.pack(name_sid, description_sid, category_index, intensity, flags,
+                                   equipment_mask, target_mask, equipment_start, len(equipment),
+                                   target_start, len(target), sub_start, len(sub_workouts), float(energy),
+                                   extras_sid)
+            record_count += 1
+    if len(categories) > 0xFFFF:
+        raise SnapshotError("Too many categories for snapshot record")
+
+    blob = bytearray()
+    offsets = bytearray()
+    for value in strings:
+        offsets += U32.pack(len(blob))
+        blob += value.encode("utf-8")
+    offsets += U32.pack(len(blob))
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, record_count, len(categories), len(strings),
+                         len(ordinal_table), len(sub_table), stamp.mtime_ns, stamp.size, stamp.sha256, SCHEMA_HASH)
+    return b"".join((header, offsets, struct.pack(f"<{len(categories)}I", *categories), records,
+                     struct.pack(f"<{len(ordinal_table)}I", *ordinal_table),
+                     struct.pack(f"<{len(sub_table)}I", *sub_table), blob))
+
+
+def write_snapshot(path: Path, contents: bytes) -> None:
+    """Write a snapshot atomically, so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_bytes(path, contents)
+
+
+class _SnapshotRecords(Sequence):
+    """Records decoded from the snapshot on first access."""
+
+    def __init__(self, snapshot: CatalogSnapshot):
+        self._snapshot = snapshot
+        self._cache: list[ExerciseRecord | None] = [None] * snapshot.record_count
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        record = self._cache[index]
+        if record is None:
+            if index < 0:
+                index += len(self)
+            record = self._cache[index] = self._snapshot.decode_record(index)
+        return record
+
+
+class CatalogSnapshot:
+    """Read-only, memory-mapped catalog snapshot."""
+
+    def __init__(self, path: Path):
+        """Open a snapshot.
+
+        Args:
+            path (Path): Snapshot file.
+
+        Raises:
+            SnapshotError: If the file is not a snapshot this version can read.
+        """
+        self.path = path
+        try:
+            with path.open("rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Cannot open snapshot {path}: {e}") from e
+        view = memoryview(self._mmap)
+        if len(view) < HEADER.size:
+            raise SnapshotError(f"Truncated snapshot: {path}")
+        (magic, version, _, self.record_count, category_count, string_count, ordinal_count, sub_count,
+         mtime_ns, size, sha256, schema_hash) = HEADER.unpack_from(view)
+        if magic != MAGIC or version != FORMAT_VERSION or schema_hash != SCHEMA_HASH:
+            raise SnapshotError(f"Incompatible snapshot: {path}")
+        self.source_stamp = SourceStamp(mtime_ns=mtime_ns, size=size, sha256=sha256)
+
+        offset = HEADER.size
+        sections = []
+        for length in ((string_count + 1) * 4, category_count * 4, self.record_count * RECORD.size,
+                       ordinal_count * 4, sub_count * 4):
+            sections.append(view[offset:offset + length])
+            offset += length
+        self._offsets, categories, self._records, self._ordinals, self._subs = sections
+        self._blob = view[offset:]
+        if len(self._offsets) < 4 or len(self._subs) != sub_count * 4 or \
+                U32.unpack_from(self._offsets, string_count * 4)[0] != len(self._blob):
+            raise SnapshotError(f"Truncated snapshot: {path}")
+
+        self.categories: tuple[str, ...] = tuple(self.string(sid) for (sid,) in U32.iter_unpack(categories))
+        self.records: Sequence[ExerciseRecord] = _SnapshotRecords(self)
+
+    def __repr__(self) -> str:
+        return f"CatalogSnapshot | {self.path.name}, exercises: {self.record_count}"
+
+    def restamped(self, stamp: SourceStamp) -> bytes:
+        """Snapshot contents with the source stamp replaced, for a source that was touched but not changed."""
+        fields = list(HEADER.unpack_from(self._mmap))
+        fields[8:11] = stamp
+        return HEADER.pack(*fields) + self._mmap[HEADER.size:]
+
+    def string(self, sid: int) -> str:
+        start, end = struct.unpack_from("<II", self._offsets, sid * 4)
+        return str(self._blob[start:end], "utf-8")
+
+    def _ordinals_at(self, start: int, count: int) -> list[int]:
+        return [x for (x,) in U32.iter_unpack(self._ordinals[start * 4:(start + count) * 4])]
+
+    def _members_of(self, members: Sequence, start: int, count: int) -> tuple:
+        return tuple(members[x] for x in self._ordinals_at(start, count))
+
+    def decode_record(self, index: int) -> ExerciseRecord:
+        """Decode a single record."""
+        (name_sid, description_sid, category_index, intensity, flags, _, _, equipment_start, equipment_count,
+         target_start, target_count, sub_start, sub_count, energy, _) = RECORD.unpack_from(self._records,
+                                                                                           index * RECORD.size)
+        category = self.categories[category_index]
+        sub_workouts = None
+        if sub_count:
+            sub_workouts = tuple(self.string(sid) for (sid,) in
+                                 U32.iter_unpack(self._subs[sub_start * 4:(sub_start + sub_count) * 4]))
+        return ExerciseRecord(
+            index=index,
+            name=self.string(name_sid),
+            description=self.string(description_sid) if flags & HAS_DESCRIPTION else None,
+            equipment=self._members_of(EQUIPMENT_MEMBERS, equipment_start, equipment_count),
+            intensity=INTENSITY_MEMBERS[intensity] if flags & HAS_INTENSITY else None,
+            aerobic_type=AerobicType.__members__.get(category),
+            category=category,
+            target=self._members_of(TARGET_MEMBERS, target_start, target_count),
+            sub_workouts=sub_workouts,
+            energy=(int(energy) if flags & ENERGY_IS_INT else energy) if flags & HAS_ENERGY else None,
+        )
+
+    def raw_data(self, index: int) -> dict:
+        """Reconstruct the exercise data of a record exactly as it appears in the source file."""
+        fields = RECORD.unpack_from(self._records, index * RECORD.size)
+        flags = fields[4]
+        record = self.records[index]
+        value = {}
+        if flags & HAS_DESCRIPTION:
+            value["description"] = record.description
+        if flags & HAS_EQUIPMENT:
+            value["equipment"] = [x.name for x in record.equipment]
+        if flags & HAS_INTENSITY:
+            value["intensity"] = record.intensity.name
+        if flags & HAS_TARGET:
+            value["target"] = [x.name for x in record.target]
+        extra_keys = ("sub_workouts", "energy") if flags & SUB_WORKOUTS_FIRST else ("energy", "sub_workouts")
+        for key in extra_keys:
+            if key == "energy" and flags & HAS_ENERGY:
+                value["energy"] = record.energy
+            elif key == "sub_workouts" and flags & HAS_SUB_WORKOUTS:
+                value["sub_workouts"] = list(record.sub_workouts or [])
+        if fields[-1] != NO_EXTRAS:
+            keys, extra_values = json.loads(self.string(fields[-1]))
+            value = {key: extra_values[key] if key in extra_values else value[key] for key in keys}
+        return value
+
+    def names(self) -> Iterator[str]:
+        """Exercise names in record order, without decoding whole records."""
+        for fields in RECORD.iter_unpack(self._records):
+            yield self.string(fields[0])
+
+    def columns(self) -> np.ndarray:
+        """Zero-copy structured array over the fixed-width records."""
+        return np.frombuffer(self._records, dtype=RECORD_DTYPE)
+
+
+def build_snapshot(source: Path = DATA_FILE_PATH, output: Path | None = None) -> Path:
+    """Compile a workout data file into a snapshot.
+
+    Args:
+        source (Path): Workout data file.
+        output (Path | None): Snapshot path. Defaults to the cache location used by get_catalog().
+
+    Returns:
+        Path: The snapshot written.
+    """
+    document = JournaledDocument(source)
+    raw = document.read_bytes()
+    stamp = SourceStamp(*document.stat_key(), sha256=hashlib.sha256(raw).digest())
+    output = output or snapshot_path_for(source)
+    write_snapshot(output, compile_snapshot(document.replay(raw), stamp))
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the workout data file into a binary catalog snapshot.")
+    parser.add_argument("source", nargs="?", type=Path, default=DATA_FILE_PATH, help="workout data file")
+    parser.add_argument("--output", type=Path, default=None, help="snapshot path")
+    args = parser.parse_args()
+    snapshot = CatalogSnapshot(build_snapshot(source=args.source, output=args.output))
+    LOGGER.info(f"Built {snapshot}")
@@ -0,0 +1,218 @@
+"""Batch rendering of images in every category colour.
+
+Every (image x category colour) combination is rendered in parallel worker processes into an output tree,
+<output>/<category>/<input directory name>/<relative path>.png, where the relative path keeps its extension (foo.jpg
+renders to foo.jpg.png, so it does not collide with foo.png). Each PNG records how it was rendered (mode, colour and
+factor) in a text chunk. An output is up to date, and skipped, if it is newer than its source and was rendered the
+same way, so changing a colour in CATEGORY_COLORS re-renders only that category. With --monochrome-only, an image
+that is not monochrome gets a .skip marker holding the same record instead of an output, so it is not analysed again
+until it changes. Progress goes to stderr.
+
+Usage:
+    python -m robocross.category_images [images/icons media/images] [--mode fill|tint|background] \\
+        [--categories cardio,strength] [--monochrome-only] [--workers 4] [-o cache/category_images]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
+
+from PIL import Image
+
+from core.core_paths import CACHE_DIR, IMAGE_FOLDER, MEDIA_ROOT
+from core.image_analysis import analyse_pixels
+from core.image_utils import fill_background_pixels, fill_foreground_pixels, load_pixels, save_pixels, tint_pixels
+from core.logging_utils import get_logger
+from core.persistence import atomic_write_bytes
+from robocross import CATEGORY_COLORS
+
+LOGGER = get_logger(name=__name__, level=logging.INFO)
+
+MODES = ("fill", "tint", "background")
+DEFAULT_INPUTS = (IMAGE_FOLDER / "icons", MEDIA_ROOT / "images")
+DEFAULT_OUTPUT = CACHE_DIR / "category_images"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+RENDER_KEY = "robocross-render"  # PNG text chunk recording how an output was rendered
+PROGRESS_INTERVAL = 1.0  # seconds
+
+
+class RenderJob(NamedTuple):
+    source: Path
+    output: Path
+    mode: str
+    rgb: tuple[int, int, int]
+    factor: float
+    monochrome_only: bool
+
+    @property
+    def signature(self) -> str:
+        return f"{self.mode} #{bytes(self.rgb).hex()} {self.factor:g}"
+
+    @property
+    def skip_marker(self) -> Path:
+        """Written instead of the output when a monochrome_only job skips its image."""
+        return self.output.with_suffix(".skip")
+
+
+def hex_to_rgb(color: str) -> tuple[int, int, int]:
+    """"#3498DB" -> (52, 152, 219)."""
+    return tuple(bytes.fromhex(color.lstrip("#")))
+
+
+def find_images(inputs: Iterable[Path]) -> Iterator[tuple[Path, Path]]:
+    """Image files under the inputs (files or directories), with their path relative to the output category dir."""
+    for root in map(Path, inputs):
+        if root.is_file():
+            yield root, Path(root.name)
+            continue
+        for directory, _, file_names in os.walk(root):
+            for file_name in sorted(file_names):
+                if os.path.splitext(file_name)[1].lower() in IMAGE_EXTENSIONS:
+                    path = Path(directory, file_name)
+                    yield path, root.name / path.relative_to(root)
+
+
+def make_jobs(inputs: Iterable[Path], output_dir: Path, mode: str = "fill", colors: dict[str, str] = None,
+              factor: float = 0.3, monochrome_only: bool = False) -> list[RenderJob]:
+    """Every (image x category colour) combination.
+
+    Args:
+        inputs (Iterable[Path]): Image files or directories.
+        output_dir (Path): Root of the output tree.
+        mode (str): "fill" (recolour visible pixels), "tint" (blend towards the colour) or "background".
+        colors (dict[str, str]): Hex colour by category, defaults to CATEGORY_COLORS.
+        factor (float): Blend factor of the tint mode.
+        monochrome_only (bool): Only render images the player would tint (grey artwork on transparency).
+
+    Returns:
+        list[RenderJob]: Jobs, by image then category.
+    """
+    colors = CATEGORY_COLORS if colors is None else colors
+    return [RenderJob(source=source, output=output_dir / category / f"{relative}.png", mode=mode,
+                      rgb=hex_to_rgb(color), factor=factor if mode == "tint" else 0.0,
+                      monochrome_only=monochrome_only)
+            for source, relative in find_images(inputs) for category, color in colors.items()]
+
+
+def is_up_to_date(job: RenderJob) -> bool:
+    """True if the output, or the skip marker of a monochrome_only job, is newer than its source and was rendered the
+    same way (reads the PNG header only)."""
+    try:
+        source_mtime = job.source.stat().st_mtime_ns
+        marker = job.skip_marker
+        if job.monochrome_only and marker.is_file() and marker.stat().st_mtime_ns >= source_mtime \
+                and marker.read_text(encoding="utf-8") == job.signature:
+            return True
+        if job.output.stat().st_mtime_ns < source_mtime:
+            return False
+        with Image.open(job.output) as image:
+            return image.info.get(RENDER_KEY) == job.signature
+    except (OSError, SyntaxError):
+        return False
+
+
+def render(job: RenderJob) -> bool:
+    """Worker task: render one image in one colour.
+
+    Returns:
+        bool: False if the image was skipped for not being monochrome (its skip marker is written instead).
+    """
+    if job.mode == "tint":
+        pixels = tint_pixels(load_pixels(job.source, mode="RGB"), job.rgb, job.factor)
+    else:
+        rgba = load_pixels(job.source)
+        if job.monochrome_only and not analyse_pixels(rgba).is_monochrome_transparent:
+            job.skip_marker.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_bytes(job.skip_marker, job.signature.encode("utf-8"))
+            return False
+        kernel = fill_foreground_pixels if job.mode == "fill" else fill_background_pixels
+        pixels = kernel(rgba, job.rgb)
+    job.output.parent.mkdir(parents=True, exist_ok=True)
+    save_pixels(pixels, job.output, text={RENDER_KEY: job.signature})
+    job.skip_marker.unlink(missing_ok=True)
+    return True
+
+
+def render_all(jobs: list[RenderJob], workers: int | None = None, force: bool = False, chunksize: int = 4) -> int:
+    """Render every job whose output is out of date.
+
+    Args:
+        jobs (list[RenderJob]): Jobs from make_jobs().
+        workers (int | None): Worker processes, defaults to the CPU count. 1 renders in this process.
+        force (bool): Render up to date outputs as well.
+        chunksize (int): Jobs sent to a worker at a time.
+
+    Returns:
+        int: Number of images rendered.
+    """
+    start = last_report = time.perf_counter()
+    pending = jobs if force else [job for job in jobs if not is_up_to_date(job)]
+    workers = workers or os.cpu_count() or 1
+    rendered = skipped = done = 0
+
+    def report(final: bool = False) -> None:
+        LOGGER.info(f"{'Done' if final else 'Progress'}: {done}/{len(pending)} images, {rendered} rendered, "
+                    f"{skipped} not monochrome, {len(jobs) - len(pending)} up to date, "
+                    f"{time.perf_counter() - start:.1f} s")
+
+    def collect(results: Iterable[bool]) -> None:
+        nonlocal rendered, skipped, done, last_report
+        for result in results:
+            done += 1
+            rendered += result
+            skipped += not result
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL:
+                report()
+                last_report = now
+
+    if workers == 1 or len(pending) <= 1:
+        collect(map(render, pending))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            collect(executor.map(render, pending, chunksize=chunksize))
+    report(final=True)
+    return rendered
+
+
+def _csv(value: str) -> list[str]:
+    return [x.strip() for x in value.split(",") if x.strip()]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Render images in every category colour.")
+    parser.add_argument("inputs", type=Path, nargs="*", default=list(DEFAULT_INPUTS),
+                        help="image files or directories (default: the icons and media images)")
+    parser.add_argument("--mode", choices=MODES, default="fill",
+                        help="fill visible pixels (default), tint towards the colour, or fill the background")
+    parser.add_argument("--factor", type=float, default=0.3, help="tint blend factor (default 0.3)")
+    parser.add_argument("--categories", type=_csv, help="categories to render, e.g. cardio,strength (default: all)")
+    parser.add_argument("--monochrome-only", action="store_true",
+                        help="only render grey images on transparency, as the player tints (fill/background modes)")
+    parser.add_argument("--force", action="store_true", help="render up to date outputs as well")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_OUTPUT, help="output directory")
+    args = parser.parse_args(argv)
+
+    colors = CATEGORY_COLORS
+    if args.categories:
+        unknown = set(args.categories) - set(CATEGORY_COLORS)
+        if unknown:
+            parser.error(f"unknown categories: {', '.join(sorted(unknown))}")
+        colors = {category: CATEGORY_COLORS[category] for category in args.categories}
+    jobs = make_jobs(args.inputs, args.output, mode=args.mode, colors=colors, factor=args.factor,
+                     monochrome_only=args.monochrome_only)
+    LOGGER.info(f"{len(jobs)} renders, {len(colors)} colours")
+    render_all(jobs, workers=args.workers, force=args.force)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
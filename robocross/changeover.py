@@ -0,0 +1,265 @@
+"""Equipment changeover minimisation.
+
+Reorders a routine so that consecutive stations share as much equipment as possible. The cost of moving from one
+station to the next is the number of pieces of equipment picked up or put down (the symmetric difference of their
+equipment sets).
+
+Exercises with the same equipment set (and category, when the category pattern must be kept) are interchangeable for
+the cost, so the search runs over those groups rather than over individual exercises:
+
+- Short routines are solved exactly by dynamic programming over (exercises left in each group, current group).
+- Long routines start from a greedy nearest-neighbour order and are improved with 2-opt segment reversals (or, when
+  the category pattern is fixed, swaps between stations of the same category) until no move helps.
+
+Pinned first/last stations (warm up, cool down) stay in place, and a Sequence-mode category pattern can be kept.
+
+A routine can hold the same exercise more than once, and copies share an equipment group, so the cheapest order
+tends to put them side by side. Given a station key, copies are dealt apart within each group run, and any copies
+still adjacent are swapped with the station whose move costs the fewest extra changeovers.
+"""
+from __future__ import annotations
+
+import logging
+
+from collections import Counter
+from functools import lru_cache
+from typing import Callable, Hashable, Iterable, Sequence, TypeVar
+
+from core.logging_utils import get_logger
+from robocross.robocross_enums import Equipment
+
+LOGGER = get_logger(name=__name__, level=logging.INFO)
+
+T = TypeVar("T")
+
+DP_STATE_LIMIT = 200_000  # Largest (group counts x groups) state space solved exactly
+DP_MAX_STATIONS = 200  # The recursion is as deep as the routine is long
+MAX_IMPROVEMENT_PASSES = 50
+
+
+def changeover_cost(a: frozenset, b: frozenset) -> int:
+    """Pieces of equipment put down or picked up between two stations."""
+    return len(a ^ b)
+
+
+def total_changeover_cost(equipment_sets: Iterable[frozenset]) -> int:
+    """Changeover cost of a whole routine."""
+    total = 0
+    previous = None
+    for equipment_set in equipment_sets:
+        if previous is not None:
+            total += changeover_cost(previous, equipment_set)
+        previous = equipment_set
+    return total
+
+
+def _dp_order(counts: tuple[int, ...], group_sets: list[frozenset], group_categories: list[Hashable],
+              pattern: list[Hashable] | None, start: frozenset | None, end: frozenset | None) -> list[int]:
+    """Exact group order minimising the changeover cost."""
+    total = sum(counts)
+
+    @lru_cache(maxsize=None)
+    def best(remaining: tuple[int, ...], last: int) -> tuple[float, tuple[int, ...]]:
+        position = total - sum(remaining)
+        current = group_sets[last] if last >= 0 else start
+        if position == total:
+            return (changeover_cost(current, end) if current is not None and end is not None else 0), ()
+        best_cost, best_tail = float("inf"), ()  # Stays infinite on a dead end of the category pattern
+        for group, count in enumerate(remaining):
+            if not count or (pattern and group_categories[group] != pattern[position]):
+                continue
+            step = changeover_cost(current, group_sets[group]) if current is not None else 0
+            rest = remaining[:group] + (count - 1,) + remaining[group + 1:]
+            cost, tail = best(rest, group)
+            if step + cost < best_cost:
+                best_cost, best_tail = step + cost, (group,) + tail
+        return best_cost, best_tail
+
+    order = list(best(counts, -1)[1])
+    best.cache_clear()
+    return order
+
+
+def _greedy_order(groups: list[int], group_sets: list[frozenset], group_categories: list[Hashable],
+                  pattern: list[Hashable] | None, start: frozenset | None) -> list[int]:
+    """Nearest-neighbour order: always continue with the cheapest remaining station."""
+    remaining = list(groups)
+    order = []
+    current = start
+    for position in range(len(groups)):
+        candidates = [i for i, group in enumerate(remaining)
+                      if not pattern or group_categories[group] == pattern[position]]
+        if current is None:
+            pick = candidates[0]
+        else:
+            pick = min(candidates, key=lambda i: changeover_cost(current, group_sets[remaining[i]]))
+        order.append(remaining.pop(pick))
+        current = group_sets[order[-1]]
+    return order
+
+
+def _improve(order: list[int], group_sets: list[frozenset], group_categories: list[Hashable], keep_pattern: bool,
+             start: frozenset | None, end: frozenset | None) -> list[int]:
+    """2-opt reversals (or same-category swaps when the pattern is fixed) while they lower the cost."""
+    # Costs between groups, with the pinned start and end as two extra nodes (free if not pinned)
+    nodes = group_sets + [start, end]
+    matrix = [[changeover_cost(a, b) if a is not None and b is not None else 0 for b in nodes] for a in nodes]
+    path = [len(group_sets)] + order + [len(group_sets) + 1]
+
+    n = len(order)
+    for _ in range(MAX_IMPROVEMENT_PASSES):
+        improved = False
+        for i in range(1, n + 1):
+            for j in range(i + 1, n + 1):
+                a, b, c, d = path[i - 1], path[i], path[j], path[j + 1]
+                if keep_pattern:
+                    if group_categories[b] != group_categories[c]:
+                        continue
+                    if j == i + 1:
+                        delta = matrix[a][c] + matrix[b][d] - matrix[a][b] - matrix[c][d]
+                    else:
+                        b_next, c_previous = path[i + 1], path[j - 1]
+                        delta = (matrix[a][c] + matrix[c][b_next] + matrix[c_previous][b] + matrix[b][d]
+                                 - matrix[a][b] - matrix[b][b_next] - matrix[c_previous][c] - matrix[c][d])
+                    if delta < 0:
+                        path[i], path[j] = c, b
+                        improved = True
+                elif matrix[a][c] + matrix[b][d] < matrix[a][b] + matrix[c][d]:
+                    path[i:j + 1] = path[i:j + 1][::-1]
+                    improved = True
+        if not improved:
+            break
+    return path[1:-1]
+
+
+def _deal(order: list[int], members: list[list[T]], key: Callable[[T], Hashable], previous: Hashable) -> list[T]:
+    """Members for the group order, avoiding the key of the station before where the group allows it."""
+    remaining = [list(group_members) for group_members in members]
+    result = []
+    for group in order:
+        candidates = remaining[group]
+        copies = Counter(key(item) for item in candidates)
+        # The most repeated key that differs from the previous station, so later copies can still be kept apart
+        pick = max(range(len(candidates)),
+                   key=lambda i: (key(candidates[i]) != previous, copies[key(candidates[i])], -i))
+        result.append(candidates.pop(pick))
+        previous = key(result[-1])
+    return result
+
+
+def _separate(items: list[T], first: int, last: int, key: Callable[[T], Hashable], equipment_sets: list[frozenset],
+              category: Callable[[T], Hashable] | None) -> list[T]:
+    """Swap movable stations away from an identical neighbour, at the lowest extra changeover cost."""
+    items, sets = list(items), list(equipment_sets)
+
+    def clashes(position: int) -> bool:
+        return any(0 <= i < len(items) - 1 and key(items[i]) == key(items[i + 1]) for i in (position - 1, position))
+
+    def local_cost(positions: tuple[int, int]) -> int:
+        return sum(changeover_cost(sets[i - 1], sets[i]) for position in positions
+                   for i in (position, position + 1) if 0 < i < len(sets))
+
+    def swap(a: int, b: int) -> None:
+        items[a], items[b] = items[b], items[a]
+        sets[a], sets[b] = sets[b], sets[a]
+
+    for position in range(first, last):
+        # The later of two identical neighbours moves, or the one before a pinned last station
+        if not (position > 0 and key(items[position - 1]) == key(items[position])
+                or position == last - 1 < len(items) - 1 and key(items[last]) == key(items[position])):
+            continue
+        best_delta, best_other = None, None
+        for other in range(first, last):
+            if other == position or (category is not None and category(items[other]) != category(items[position])):
+                continue
+            before = local_cost((position, other))
+            swap(position, other)
+            if not clashes(position) and not clashes(other):
+                delta = local_cost((position, other)) - before
+                if best_delta is None or delta < best_delta:
+                    best_delta, best_other = delta, other
+            swap(position, other)
+        if best_other is not None:
+            swap(position, best_other)
+    return items
+
+
+def minimise_changeovers(items: Sequence[T], equipment: Callable[[T], Iterable[Equipment]],
+                         category: Callable[[T], Hashable] | None = None, pin_first: bool = False,
+                         pin_last: bool = False, keep_category_pattern: bool = False,
+                         key: Callable[[T], Hashable] | None = None) -> list[T]:
+    """Reorder items to minimise equipment changeovers.
+
+    Args:
+        items (Sequence[T]): Stations in their current order.
+        equipment (Callable[[T], Iterable[Equipment]]): Equipment used by a station.
+        category (Callable[[T], Hashable] | None): Category of a station, required to keep the category pattern.
+        pin_first (bool): Keep the first station in place (warm up).
+        pin_last (bool): Keep the last station in place (cool down).
+        keep_category_pattern (bool): Keep the category at every position (Sequence mode).
+        key (Callable[[T], Hashable] | None): Identity of a station. Stations with the same key are kept apart
+                                              where possible. None orders by equipment only.
+
+    Returns:
+        list[T]: The reordered items. Without a key, stations with the same equipment keep their relative order.
+    """
+    items = list(items)
+    first = 1 if pin_first and items else 0
+    last = len(items) - 1 if pin_last and len(items) > first else len(items)
+    movable = items[first:last]
+    if len(movable) < 2:
+        return items
+    keep_pattern = keep_category_pattern and category is not None
+
+    # Group interchangeable stations
+    group_index: dict[tuple, int] = {}
+    group_sets: list[frozenset] = []
+    group_categories: list[Hashable] = []
+    members: list[list[T]] = []
+    groups = []
+    for item in movable:
+        equipment_set = frozenset(equipment(item) or ())
+        item_category = category(item) if keep_pattern else None
+        group_key = (equipment_set, item_category)
+        if group_key not in group_index:
+            group_index[group_key] = len(group_sets)
+            group_sets.append(equipment_set)
+            group_categories.append(item_category)
+            members.append([])
+        members[group_index[group_key]].append(item)
+        groups.append(group_index[group_key])
+
+    pattern = [category(item) for item in movable] if keep_pattern else None
+    start = frozenset(equipment(items[0]) or ()) if first else None
+    end = frozenset(equipment(items[-1]) or ()) if last < len(items) else None
+
+    counts = tuple(len(group_members) for group_members in members)
+    state_count = len(counts)
+    for count in counts:
+        state_count *= count + 1
+
+    def routine_cost(order: list[int]) -> int:
+        return total_changeover_cost(([start] if start is not None else []) + [group_sets[group] for group in order]
+                                     + ([end] if end is not None else []))
+
+    if state_count <= DP_STATE_LIMIT and len(movable) <= DP_MAX_STATIONS:
+        order = _dp_order(counts, group_sets, group_categories, pattern, start, end)
+        method = "dynamic programming"
+    else:
+        # Improve both the greedy order and the current one, keeping the better
+        candidates = (_greedy_order(groups, group_sets, group_categories, pattern, start), list(groups))
+        order = min((_improve(candidate, group_sets, group_categories, keep_pattern, start, end)
+                     for candidate in candidates), key=routine_cost)
+        method = "2-opt"
+
+    if key is None:
+        queues = [iter(group_members) for group_members in members]
+        result = items[:first] + [next(queues[group]) for group in order] + items[last:]
+    else:
+        result = items[:first] + _deal(order, members, key, key(items[0]) if first else None) + items[last:]
+        result = _separate(result, first, last, key, [frozenset(equipment(item) or ()) for item in result],
+                           category=category if keep_pattern else None)
+    LOGGER.debug(f"Equipment changeovers {routine_cost(groups)} -> "
+                 f"{total_changeover_cost(frozenset(equipment(item) or ()) for item in result)} "
+                 f"({method}, {len(movable)} stations)")
+    return result
@@ -0,0 +1,229 @@
+"""Constraint-based routine construction.
+
+The "Balanced" workout structure fills slots with a greedy pass followed by local-search repair:
+
+- Greedy: each slot takes the feasible exercise that best serves the categories and body targets still short of
+  their quotas (random tie-breaks come from the routine's seeded stream).
+- Repair: every slot is revisited and swapped for the exercise that most reduces the remaining shortfall, until a
+  pass makes no improvement.
+
+Hard constraints (never broken while any alternative exists): no exercise repeats within min_repeat_spacing slots,
+no exercise above max_intensity, and no more than max_consecutive_high high intensity exercises in a row. Equipment
+availability is applied before solving, by building the pool from the routine's equipment filter.
+
+Soft constraints: slots per category follow the category weights, and each target gets at least its quota of slots.
+
+Slots can be fixed in advance (pinned or kept rows when a routine is re-rolled): they count towards the quotas and
+the hard constraints, but are never changed.
+
+Scoring is vectorised with NumPy over the whole pool, so a slot costs a handful of array operations regardless of
+how many exercises are eligible.
+"""
+from __future__ import annotations
+
+import logging
+
+from dataclasses import dataclass, field
+from typing import Mapping, Sequence
+
+import numpy as np
+
+from core.logging_utils import get_logger
+from robocross.exercise_catalog import ExerciseRecord
+from robocross.robocross_enums import Intensity, Target
+
+LOGGER = get_logger(name=__name__, level=logging.INFO)
+
+DEFAULT_REPEAT_SPACING = 4
+TARGET_QUOTA_SHARE = 0.5  # Default quota: half of a target's fair share of the slots
+CATEGORY_SCORE = 2.0
+TARGET_SCORE = 1.0
+REUSE_PENALTY = 0.25  # Per previous use, so the pool is spread out
+TIE_BREAK = 0.1  # Scale of the random noise added to scores
+MAX_REPAIR_PASSES = 4
+
+
+@dataclass(frozen=True)
+class RoutineConstraints:
+    """Constraints for the Balanced workout structure."""
+    min_repeat_spacing: int = DEFAULT_REPEAT_SPACING  # Slots between two uses of the same exercise
+    max_intensity: Intensity | None = None
+    max_consecutive_high: int | None = 2  # Longest run of high intensity exercises
+    target_quotas: Mapping[Target, int] = field(default_factory=dict)  # Minimum slots per target
+
+
+def default_target_quotas(targets: Sequence[Target], slot_count: int) -> dict[Target, int]:
+    """Give each target a share of the slots, so that no selected target is left out."""
+    if not targets:
+        return {}
+    quota = max(1, int(slot_count / len(targets) * TARGET_QUOTA_SHARE))
+    return {target: quota for target in targets}
+
+
+def apportion(weights: Mapping[str, float], total: int) -> dict[str, int]:
+    """Split total slots by weight (largest remainder), e.g. {"cardio": 60, "strength": 40}, 10 -> 6 and 4."""
+    weight_sum = sum(weights.values())
+    if weight_sum <= 0:
+        return {key: 0 for key in weights}
+    exact = {key: total * weight / weight_sum for key, weight in weights.items()}
+    counts = {key: int(value) for key, value in exact.items()}
+    by_remainder = sorted(exact, key=lambda key: exact[key] - counts[key], reverse=True)
+    for key in by_remainder[:total - sum(counts.values())]:
+        counts[key] += 1
+    return counts
+
+
+class BalancedSolver:
+    """Fills routine slots from an exercise pool under RoutineConstraints."""
+
+    def __init__(self, pool: Sequence[ExerciseRecord], category_weights: Mapping[str, float],
+                 constraints: RoutineConstraints = RoutineConstraints(), fixed_records: Sequence[ExerciseRecord] = ()):
+        """Prepare the pool.
+
+        Args:
+            pool (Sequence[ExerciseRecord]): Eligible exercises (already filtered by category, equipment, targets).
+            category_weights (Mapping[str, float]): Relative share of slots per category.
+            constraints (RoutineConstraints): Constraints to honour.
+            fixed_records (Sequence[ExerciseRecord]): Records that may be given as fixed slots to solve(), even if
+                                                      they are not eligible for the other slots.
+        """
+        self.constraints = constraints
+        if constraints.max_intensity is not None:
+            ceiling = constraints.max_intensity.value
+            pool = [record for record in pool if record.intensity.value <= ceiling]
+        pooled = {record.index for record in pool}
+        extras = [record for record in dict.fromkeys(fixed_records) if record.index not in pooled]
+        self.pool: list[ExerciseRecord] = list(pool) + extras
+        self.eligible = np.arange(len(self.pool)) < len(pool)  # Extras only ever fill fixed slots
+        self.row_of = {record.index: row for row, record in enumerate(self.pool)}
+
+        pool_categories = sorted({record.category for record in pool})
+        extra_categories = sorted({record.category for record in extras} - set(pool_categories))
+        self.categories: list[str] = pool_categories + extra_categories
+        self.category_weights = {category: category_weights.get(category, 0) for category in self.categories}
+        if not any(self.category_weights[category] for category in pool_categories):
+            # No weights for the pooled categories: equal shares
+            self.category_weights = {category: int(category in pool_categories) for category in self.categories}
+
+        category_index = {category: i for i, category in enumerate(self.categories)}
+        self.category_of = np.array([category_index[record.category] for record in self.pool], dtype=np.intp)
+        self.targets: list[Target] = list(Target)
+        self.target_matrix = np.zeros((len(self.pool), len(self.targets)), dtype=np.float64)
+        target_index = {target: i for i, target in enumerate(self.targets)}
+        for row, record in enumerate(self.pool):
+            for target in record.target:
+                self.target_matrix[row, target_index[target]] = 1.0
+        self.is_high = np.array([record.intensity is Intensity.high for record in self.pool], dtype=bool)
+
+    def __repr__(self) -> str:
+        return f"BalancedSolver | pool: {len(self.pool)}, categories: {', '.join(self.categories)}"
+
+    def _quota_vector(self) -> np.ndarray:
+        quotas = self.constraints.target_quotas
+        return np.array([quotas.get(target, 0) for target in self.targets], dtype=np.float64)
+
+    def _category_goal(self, slot_count: int) -> np.ndarray:
+        goal = apportion(self.category_weights, slot_count)
+        return np.array([goal[category] for category in self.categories], dtype=np.float64)
+
+    def _blocked(self, slots: list[int], position: int) -> np.ndarray:
+        """Pool rows that would break a hard constraint at a position, given the other slots."""
+        blocked = ~self.eligible
+        spacing = self.constraints.min_repeat_spacing
+        for j in range(max(0, position - spacing), min(len(slots), position + spacing + 1)):
+            if j != position and slots[j] >= 0:
+                blocked[slots[j]] = True
+
+        max_high = self.constraints.max_consecutive_high
+        if max_high is not None:
+            run = 1
+            j = position - 1
+            while j >= 0 and slots[j] >= 0 and self.is_high[slots[j]]:
+                run, j = run + 1, j - 1
+            j = position + 1
+            while j < len(slots) and slots[j] >= 0 and self.is_high[slots[j]]:
+                run, j = run + 1, j + 1
+            if run > max_high:
+                blocked |= self.is_high
+        return blocked
+
+    def solve(self, slot_count: int, rng: np.random.Generator,
+              fixed: Mapping[int, ExerciseRecord] | None = None) -> list[ExerciseRecord]:
+        """Fill slot_count slots.
+
+        Args:
+            slot_count (int): Number of slots.
+            rng (np.random.Generator): Random stream for tie-breaks.
+            fixed (Mapping[int, ExerciseRecord] | None): Records already in place by slot position, kept as they are.
+                                                        Each must be in the pool or the solver's fixed_records.
+
+        Returns:
+            list[ExerciseRecord]: One record per slot, empty if the pool is empty.
+        """
+        if not self.eligible.any() or slot_count <= 0:
+            return []
+        quota = self._quota_vector()
+        goal = self._category_goal(slot_count)
+        slots = [-1] * slot_count
+        category_count = np.zeros(len(self.categories))
+        target_count = np.zeros(len(self.targets))
+        use_count = np.zeros(len(self.pool))
+        for position, record in (fixed or {}).items():
+            row = self.row_of[record.index]
+            slots[position] = row
+            category_count[self.category_of[row]] += 1
+            target_count += self.target_matrix[row]
+            use_count[row] += 1
+        free = [position for position in range(slot_count) if slots[position] < 0]
+
+        # Greedy construction
+        for position in free:
+            category_need = (goal - category_count) / np.maximum(goal, 1.0)
+            target_need = np.maximum(quota - target_count, 0.0) / np.maximum(quota, 1.0)
+            score = (CATEGORY_SCORE * category_need[self.category_of]
+                     + TARGET_SCORE * (self.target_matrix @ target_need)
+                     - REUSE_PENALTY * use_count
+                     + TIE_BREAK * rng.random(len(self.pool)))
+            blocked = self._blocked(slots, position)
+            if blocked.all():
+                blocked = ~self.eligible  # Pool too small for the constraints: least bad choice
+            score[blocked] = -np.inf
+            row = int(np.argmax(score))
+            slots[position] = row
+            category_count[self.category_of[row]] += 1
+            target_count += self.target_matrix[row]
+            use_count[row] += 1
+
+        # Local-search repair of remaining shortfalls
+        for _ in range(MAX_REPAIR_PASSES):
+            improved = False
+            for position in rng.permutation(free).tolist():
+                current = slots[position]
+                category_deviation = np.abs(category_count - goal)
+                category_added = np.abs(category_count + 1 - goal) - category_deviation
+                current_category = self.category_of[current]
+                category_removed = abs(category_count[current_category] - 1 - goal[current_category]) \
+                    - category_deviation[current_category]
+                category_delta = np.where(self.category_of == current_category, 0.0,
+                                          category_removed + category_added[self.category_of])
+
+                without = target_count - self.target_matrix[current]
+                shortfall = np.maximum(quota - target_count, 0.0).sum()
+                target_delta = np.maximum(quota - (without + self.target_matrix), 0.0).sum(axis=1) - shortfall
+
+                delta = CATEGORY_SCORE * category_delta + TARGET_SCORE * target_delta
+                delta[self._blocked(slots, position)] = np.inf
+                row = int(np.argmin(delta))
+                if delta[row] < -1e-9:
+                    slots[position] = row
+                    category_count[self.category_of[current]] -= 1
+                    category_count[self.category_of[row]] += 1
+                    target_count += self.target_matrix[row] - self.target_matrix[current]
+                    improved = True
+            if not improved:
+                break
+
+        shortfall = {self.targets[i].name: int(x) for i, x in enumerate(quota - target_count) if x > 0}
+        if shortfall:
+            LOGGER.debug(f"Target quotas not met (slots short): {shortfall}")
+        return [self.pool[row] for row in slots]
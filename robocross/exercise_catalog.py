@@ -0,0 +1,266 @@
+"""Indexed in-memory exercise catalog."""
+from __future__ import annotations
+
+from functools import cached_property
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Sequence, TYPE_CHECKING
+
+from robocross.robocross_enums import Equipment, Intensity, AerobicType, Target
+from robocross.workout import Workout
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from robocross.catalog_snapshot import CatalogSnapshot
+    from robocross.exercise_search import ExerciseSearchIndex
+
+
+class ExerciseRecord(NamedTuple):
+    """Immutable catalog entry with every enum resolved once at load time.
+
+    Each catalog holds exactly one record per exercise, so routines and sessions reference records rather than
+    copying them (see ScheduledItem).
+    """
+    index: int
+    name: str
+    description: str
+    equipment: tuple[Equipment, ...]
+    intensity: Intensity
+    aerobic_type: AerobicType | None
+    category: str
+    target: tuple[Target, ...]
+    sub_workouts: tuple[str, ...] | None
+    energy: float | None
+
+    def to_workout(self, time: int) -> Workout:
+        """Create a new Workout from the record."""
+        return Workout(
+            name=self.name,
+            description=self.description,
+            equipment=list(self.equipment),
+            intensity=self.intensity,
+            aerobic_type=self.aerobic_type,
+            target=list(self.target),
+            time=time,
+            sub_workouts=list(self.sub_workouts) if self.sub_workouts else None,
+            energy=self.energy,
+        )
+
+
+NO_INTENSITY = 0xFF
+INTENSITY_ORDINALS: dict[Intensity, int] = {intensity: i for i, intensity in enumerate(Intensity)}
+
+
+class CatalogColumns(NamedTuple):
+    """Per-record filter columns: category index, intensity ordinal and equipment/target bitmasks."""
+    category: np.ndarray  # uint16, index into ExerciseCatalog.categories
+    intensity: np.ndarray  # uint8, NO_INTENSITY if unset
+    equipment: np.ndarray  # uint32, Equipment.mask_of()
+    target: np.ndarray  # uint32, Target.mask_of()
+
+
+class ExerciseCatalog:
+    """Exercise records with filter columns per category, equipment, target and intensity.
+
+    Filter queries evaluate as a single vectorised mask over uint32 bitmask columns, so the catalog is never walked
+    record by record.
+    """
+
+    def __init__(self, data: dict, hierarchical_data: dict | None = None):
+        """Build the catalog.
+
+        The data must have been validated (see schema.validate_catalog); enum names are not checked again.
+
+        Args:
+            data (dict): Flat exercise data {exercise name: exercise data} where exercise data includes 'aerobic_type'.
+            hierarchical_data (dict | None): The same data grouped as {category: {exercise name: exercise data}}.
+                                             Built from data if None.
+        """
+        if hierarchical_data is None:
+            hierarchical_data = {}
+            for exercise_name, exercise_data in data.items():
+                category = exercise_data.get('aerobic_type', 'unknown')
+                hierarchical_data.setdefault(category, {})[exercise_name] = exercise_data
+        # Read-only views, shared by every consumer of the catalog
+        self.data: Mapping[str, Mapping] = MappingProxyType(
+            {name: MappingProxyType(value) for name, value in data.items()})
+        self.hierarchical_data: Mapping[str, Mapping[str, Mapping]] = MappingProxyType({
+            category: MappingProxyType({name: MappingProxyType(value) for name, value in exercises.items()})
+            for category, exercises in hierarchical_data.items()
+        })
+        self.snapshot = None
+
+        records = []
+        for index, (name, value) in enumerate(data.items()):
+            category = value.get("aerobic_type")
+            sub_workouts = value.get("sub_workouts")
+            records.append(
+                ExerciseRecord(
+                    index=index,
+                    name=name,
+                    description=value.get("description"),
+                    equipment=tuple(Equipment[x] for x in value.get("equipment", ())),
+                    intensity=Intensity[value["intensity"]],
+                    aerobic_type=AerobicType.__members__.get(category),
+                    category=category,
+                    target=tuple(Target[x] for x in value.get("target", ())),
+                    sub_workouts=tuple(sub_workouts) if sub_workouts else None,
+                    energy=value.get("energy"),
+                )
+            )
+        self.records: Sequence[ExerciseRecord] = tuple(records)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: CatalogSnapshot) -> ExerciseCatalog:
+        """Build the catalog over a memory-mapped snapshot.
+
+        Records, names and the raw data views are decoded from the snapshot on first use.
+        """
+        catalog = cls.__new__(cls)
+        catalog.snapshot = snapshot
+        catalog.records = snapshot.records
+        return catalog
+
+    @classmethod
+    def from_json_data(cls, loaded_data: dict) -> ExerciseCatalog:
+        """Build the catalog from the validated contents of a workout data file.
+
+        Both hierarchical {category: {exercise: data}} and flat {exercise: data} layouts are supported.
+        """
+        if not loaded_data:
+            return cls(data={}, hierarchical_data={})
+
+        # Hierarchical: first value is a dict of dicts
+        # Flat: first value is a dict with 'aerobic_type' key
+        first_value = next(iter(loaded_data.values()))
+        if isinstance(first_value, dict) and 'aerobic_type' not in first_value:
+            data = {}
+            for category_name, exercises in loaded_data.items():
+                for exercise_name, exercise_data in exercises.items():
+                    data[exercise_name] = {**exercise_data, 'aerobic_type': category_name}
+            return cls(data=data, hierarchical_data=loaded_data)
+        return cls(data=loaded_data)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @cached_property
+    def by_name(self) -> dict[str, int]:
+        """Record index by exercise name."""
+        names = self.snapshot.names() if self.snapshot else (record.name for record in self.records)
+        return {name: index for index, name in enumerate(names)}
+
+    @cached_property
+    def data(self) -> Mapping[str, Mapping]:
+        """Read-only flat exercise data {exercise name: exercise data}."""
+        return MappingProxyType({name: MappingProxyType({**value, 'aerobic_type': category})
+                                 for category, exercises in self.hierarchical_data.items()
+                                 for name, value in exercises.items()})
+
+    @cached_property
+    def hierarchical_data(self) -> Mapping[str, Mapping[str, Mapping]]:
+        """Read-only exercise data grouped by category {category: {exercise name: exercise data}}."""
+        hierarchical_data = {category: {} for category in self.snapshot.categories}
+        for record in self.records:
+            hierarchical_data[record.category][record.name] = MappingProxyType(self.snapshot.raw_data(record.index))
+        return MappingProxyType({k: MappingProxyType(v) for k, v in hierarchical_data.items()})
+
+    @cached_property
+    def columns(self) -> CatalogColumns:
+        """NumPy filter columns, built on first query."""
+        if self.snapshot:
+            # Views straight onto the memory-mapped records
+            array = self.snapshot.columns()
+            return CatalogColumns(category=array["category"], intensity=array["intensity"],
+                                  equipment=array["equipment"], target=array["target"])
+
+        category_index = self._category_index
+        count = len(self.records)
+        return CatalogColumns(
+            category=np.fromiter((category_index.get(r.category, len(category_index)) for r in self.records),
+                                 dtype=np.uint16, count=count),
+            intensity=np.fromiter((INTENSITY_ORDINALS.get(r.intensity, NO_INTENSITY) for r in self.records),
+                                  dtype=np.uint8, count=count),
+            equipment=np.fromiter((Equipment.mask_of(r.equipment) for r in self.records), dtype=np.uint32,
+                                  count=count),
+            target=np.fromiter((Target.mask_of(r.target) for r in self.records), dtype=np.uint32, count=count),
+        )
+
+    @cached_property
+    def search_index(self) -> ExerciseSearchIndex:
+        """Full-text search index, built on first search."""
+        from robocross.exercise_search import ExerciseSearchIndex
+
+        return ExerciseSearchIndex(self.records)
+
+    def __repr__(self) -> str:
+        return f"ExerciseCatalog | exercises: {len(self)}, categories: {len(self.categories)}"
+
+    @property
+    def categories(self) -> list[str]:
+        """Category names in catalog order."""
+        if self.snapshot:
+            return list(self.snapshot.categories)
+        return list(self.hierarchical_data.keys())
+
+    @property
+    def exercises_by_category(self) -> dict[str, list[str]]:
+        """Exercise names grouped by category."""
+        return {category: list(exercises.keys()) for category, exercises in self.hierarchical_data.items()}
+
+    def get(self, name: str) -> ExerciseRecord | None:
+        """Get a record by exercise name."""
+        index = self.by_name.get(name)
+        return self.records[index] if index is not None else None
+
+    def query_ids(self, nope_list: Sequence[str] = (), equipment_filter: Sequence[Equipment] = (),
+                  categories: Sequence[str] | None = None, targets: Sequence[Target] | None = None,
+                  intensities: Sequence[Intensity] | None = None) -> list[int]:
+        """Get the ids of the records matching the filters, in catalog order.
+
+        Args:
+            nope_list (Sequence[str]): Exercise names to omit.
+            equipment_filter (Sequence[Equipment]): Equipment to omit; exercises using any of it are excluded.
+            categories (Sequence[str] | None): Categories to include. If None, all categories are included.
+            targets (Sequence[Target] | None): Targets to include (any match). If None or empty, all are included.
+            intensities (Sequence[Intensity] | None): Intensities to include. If None or empty, all are included.
+        """
+        return self._query_columns(columns=self.columns, nope_list=nope_list, equipment_filter=equipment_filter,
+                                   categories=categories, targets=targets, intensities=intensities)
+
+    def _query_columns(self, columns: CatalogColumns, nope_list: Sequence[str], equipment_filter: Sequence[Equipment],
+                       categories: Sequence[str] | None, targets: Sequence[Target] | None,
+                       intensities: Sequence[Intensity] | None) -> list[int]:
+        """Evaluate every filter as one boolean mask over the columns."""
+        if categories is None:
+            keep = np.ones(len(columns.category), dtype=bool)
+        else:
+            category_index = self._category_index
+            wanted = np.zeros(len(category_index) + 1, dtype=bool)
+            wanted[[category_index[x] for x in categories if x in category_index]] = True
+            keep = wanted[columns.category]
+        if targets:
+            keep &= (columns.target & np.uint32(Target.mask_of(targets))) != 0
+        if intensities:
+            wanted = np.zeros(NO_INTENSITY + 1, dtype=bool)
+            wanted[[INTENSITY_ORDINALS[x] for x in intensities]] = True
+            keep &= wanted[columns.intensity]
+        equipment_mask = Equipment.mask_of(equipment_filter)
+        if equipment_mask:
+            keep &= (columns.equipment & np.uint32(equipment_mask)) == 0
+        if nope_list:
+            by_name = self.by_name
+            keep[[i for i in (by_name.get(name) for name in nope_list) if i is not None]] = False
+        return np.flatnonzero(keep).tolist()
+
+    @cached_property
+    def _category_index(self) -> dict[str, int]:
+        return {category: i for i, category in enumerate(self.categories)}
+
+    def query(self, nope_list: Sequence[str] = (), equipment_filter: Sequence[Equipment] = (),
+              categories: Sequence[str] | None = None, targets: Sequence[Target] | None = None,
+              intensities: Sequence[Intensity] | None = None) -> list[ExerciseRecord]:
+        """Get the shared records matching the filters, in catalog order."""
+        return [self.records[i] for i in self.query_ids(nope_list=nope_list, equipment_filter=equipment_filter,
+                                                         categories=categories, targets=targets,
+                                                         intensities=intensities)]
@@ -1,16 +1,20 @@
 """Dialog for picking exercises from a hierarchical tree view."""
+from __future__ import annotations
 
 from PySide6.QtWidgets import QDialog, QVBoxLayout, QTreeWidget, QTreeWidgetItem, QPushButton, QHBoxLayout, QLineEdit, QLabel
 from PySide6.QtCore import Qt, QSettings
 from PySide6.QtGui import QCompleter
 
 from core import DEVELOPER
+from robocross.catalog_cache import get_catalog
+from robocross.exercise_search import ExerciseSearchIndex
 
 
 class ExercisePickerDialog(QDialog):
     """Dialog with tree view for selecting exercises by category."""
 
-    def __init__(self, exercises_by_category: dict, current_exercise: str = None, parent=None):
+    def __init__(self, exercises_by_category: dict, current_exercise: str = None, parent=None,
+                 search_index: ExerciseSearchIndex | None = None):
         """
         Initialize the exercise picker dialog.
 
@@ -18,12 +22,16 @@ class ExercisePickerDialog(QDialog):
             exercises_by_category: Dict with 'cardio' and 'strength' keys, each containing list of exercise names
             current_exercise: Currently selected exercise name
             parent: Parent widget
+            search_index: Search index over the exercises, defaults to the shared catalog's index
         """
         super().__init__(parent)
         self.setWindowTitle("Select Exercise")
         self.selected_exercise = current_exercise
         self.settings = QSettings(DEVELOPER, "ExercisePickerDialog")
         self.category_items = {}  # Store category items for state persistence
+        self.search_index = search_index or get_catalog().search_index
+        self.ranked_matches: list[str] = []  # Exercise names matching the search text, best first
+        self.hidden_exercises: set[str] = set()
         self.setup_ui(exercises_by_category, current_exercise)
 
     def setup_ui(self, exercises_by_category: dict, current_exercise: str):
@@ -114,41 +122,47 @@ class ExercisePickerDialog(QDialog):
             self.accept()
 
     def on_search_text_changed(self, text: str):
-        """Filter tree view based on search text."""
-        search_text = text.strip().lower()
-
-        if not search_text:
-            # Show all items when search is empty
-            for exercise_item in self.exercise_items.values():
-                exercise_item.setHidden(False)
-                # Restore category expansion states
-                if exercise_item.parent():
-                    category_name = exercise_item.parent().text(0).lower()
-                    expanded_state = self.settings.value(f"category_expanded/{category_name}", True, type=bool)
-                    exercise_item.parent().setExpanded(expanded_state)
-        else:
-            # Hide items that don't match search
-            for exercise_name, exercise_item in self.exercise_items.items():
-                nice_name = exercise_name.replace('_', ' ').lower()
-                matches = search_text in nice_name
-                exercise_item.setHidden(not matches)
-
-                # Expand parent category if child matches
-                if matches and exercise_item.parent():
-                    exercise_item.parent().setExpanded(True)
+        """Filter tree view based on search text, ranking matches by relevance.
 
-    def on_search_return_pressed(self):
-        """Handle Enter key in search box - select first visible match."""
-        search_text = self.search_box.text().strip().lower()
+        Only items whose visibility changes are touched, so narrowing a search as it is typed stays cheap.
+        """
+        if not text.strip():
+            self.ranked_matches = []
+            self._set_hidden_exercises(set())
+            # Restore category expansion states
+            for category_name, category_item in self.category_items.items():
+                expanded_state = self.settings.value(f"category_expanded/{category_name}", True, type=bool)
+                category_item.setExpanded(expanded_state)
+            return
+
+        results = self.search_index.search(text)
+        names = self.search_index.names
+        self.ranked_matches = [names[result.index] for result in results if names[result.index] in self.exercise_items]
+        matches = set(self.ranked_matches)
+        self._set_hidden_exercises(self.exercise_items.keys() - matches)
+
+        # Expand categories with matches
+        for category_item in self.category_items.values():
+            if any(not category_item.child(i).isHidden() for i in range(category_item.childCount())):
+                category_item.setExpanded(True)
+        if self.ranked_matches:
+            self.tree.setCurrentItem(self.exercise_items[self.ranked_matches[0]])
+
+    def _set_hidden_exercises(self, hidden_exercises: set[str]):
+        """Hide the given exercises and show the rest, touching only items whose state changes."""
+        for exercise_name in hidden_exercises - self.hidden_exercises:
+            self.exercise_items[exercise_name].setHidden(True)
+        for exercise_name in self.hidden_exercises - hidden_exercises:
+            self.exercise_items[exercise_name].setHidden(False)
+        self.hidden_exercises = hidden_exercises
 
-        if search_text:
-            # Find first visible exercise
-            for exercise_name, exercise_item in self.exercise_items.items():
-                if not exercise_item.isHidden():
-                    self.tree.setCurrentItem(exercise_item)
-                    self.tree.scrollToItem(exercise_item)
-                    self.accept()  # Accept immediately on Enter
-                    break
+    def on_search_return_pressed(self):
+        """Handle Enter key in search box - select the best match."""
+        if self.search_box.text().strip() and self.ranked_matches:
+            exercise_item = self.exercise_items[self.ranked_matches[0]]
+            self.tree.setCurrentItem(exercise_item)
+            self.tree.scrollToItem(exercise_item)
+            self.accept()  # Accept immediately on Enter
 
     def accept(self):
         """Store selected exercise and save tree state before accepting."""
@@ -171,7 +185,8 @@ class ExercisePickerDialog(QDialog):
         super().reject()
 
     @staticmethod
-    def get_exercise(exercises_by_category: dict, current_exercise: str = None, parent=None):
+    def get_exercise(exercises_by_category: dict, current_exercise: str = None, parent=None,
+                     search_index: ExerciseSearchIndex | None = None):
         """
         Show dialog and return selected exercise.
 
@@ -179,11 +194,12 @@ class ExercisePickerDialog(QDialog):
             exercises_by_category: Dict with 'cardio' and 'strength' keys
             current_exercise: Currently selected exercise
             parent: Parent widget
+            search_index: Search index over the exercises, defaults to the shared catalog's index
 
         Returns:
             tuple: (exercise_name, ok_pressed)
         """
-        dialog = ExercisePickerDialog(exercises_by_category, current_exercise, parent)
+        dialog = ExercisePickerDialog(exercises_by_category, current_exercise, parent, search_index)
         result = dialog.exec()
         if result == QDialog.DialogCode.Accepted:
             return dialog.selected_exercise, True
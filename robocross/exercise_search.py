@@ -0,0 +1,208 @@
+"""Full-text search over the exercise catalog.
+
+Names, descriptions, sub-workout names and equipment are tokenised once into an inverted index of terms. A query
+token matches a term exactly, as a prefix (so results appear while a word is still being typed) or, for longer
+tokens, within a small edit distance of the term's start (typo tolerance). Fuzzy candidates are found through a
+trigram index over the vocabulary, so a keystroke never scans every exercise.
+
+Results are ranked by where the terms were found (name > sub-workout > equipment > description) and how well they
+matched. Per-token results are memoised, so as a query grows only the token being typed is looked up again.
+"""
+from __future__ import annotations
+
+import bisect
+import logging
+import re
+
+from collections import OrderedDict, defaultdict
+from typing import Iterable, NamedTuple, Sequence, TYPE_CHECKING
+
+from core.logging_utils import get_logger
+
+if TYPE_CHECKING:
+    from robocross.exercise_catalog import ExerciseRecord
+
+LOGGER = get_logger(name=__name__, level=logging.INFO)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+NAME_WEIGHT = 8.0
+SUB_WORKOUT_WEIGHT = 4.0
+EQUIPMENT_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+EXACT_MATCH = 1.0
+PREFIX_MATCH = 0.7
+FUZZY_MATCH = (0.0, 0.4, 0.25)  # By edit distance
+NAME_PREFIX_BONUS = 4.0  # The whole query starts the exercise name
+MIN_FUZZY_LENGTH = 4
+TOKEN_CACHE_SIZE = 256
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-case alphanumeric words, with underscores treated as spaces."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _trigrams(term: str) -> set[str]:
+    """Trigrams of a term padded at the start, so that every character is covered and prefixes share trigrams."""
+    padded = f"  {term}"
+    return {padded[i:i + 3] for i in range(len(term))}
+
+
+def _max_distance(token: str) -> int:
+    if len(token) < MIN_FUZZY_LENGTH:
+        return 0
+    return 1 if len(token) < 8 else 2
+
+
+def _prefix_distance(token: str, term: str, max_distance: int) -> int | None:
+    """Edit distance between a token and the closest prefix of a term, or None if it exceeds max_distance."""
+    previous = list(range(len(term) + 1))
+    for i, char in enumerate(token, 1):
+        current = [i]
+        for j, term_char in enumerate(term, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != term_char)))
+        if min(current) > max_distance:
+            return None
+        previous = current
+    distance = min(previous)  # Any prefix of the term
+    return distance if distance <= max_distance else None
+
+
+class SearchResult(NamedTuple):
+    index: int  # Record index
+    score: float
+
+
+class ExerciseSearchIndex:
+    """Inverted index over catalog records."""
+
+    def __init__(self, records: Sequence[ExerciseRecord]):
+        """Build the index.
+
+        Args:
+            records (Sequence[ExerciseRecord]): Catalog records, indexed by ExerciseRecord.index.
+        """
+        postings: dict[str, dict[int, float]] = defaultdict(dict)
+        names = []
+        name_phrases = []
+        for record in records:
+            names.append(record.name)
+            name_phrases.append(" ".join(tokenize(record.name)))
+            fields = [(record.name, NAME_WEIGHT), (record.description, DESCRIPTION_WEIGHT)]
+            fields.extend((name, SUB_WORKOUT_WEIGHT) for name in record.sub_workouts or ())
+            fields.extend((equipment.name, EQUIPMENT_WEIGHT) for equipment in record.equipment)
+            for text, weight in fields:
+                for term in tokenize(text):
+                    term_postings = postings[term]
+                    if term_postings.get(record.index, 0.0) < weight:
+                        term_postings[record.index] = weight
+
+        self.names: list[str] = names  # Exercise name by record index
+        self._name_phrases: list[str] = name_phrases
+        self.postings: dict[str, dict[int, float]] = dict(postings)
+        self.terms: list[str] = sorted(self.postings)
+        self.trigrams: dict[str, list[int]] = defaultdict(list)
+        for i, term in enumerate(self.terms):
+            for trigram in _trigrams(term):
+                self.trigrams[trigram].append(i)
+        self._token_cache: OrderedDict[str, dict[int, float]] = OrderedDict()
+        LOGGER.debug(f"{self}")
+
+    def __repr__(self) -> str:
+        return f"ExerciseSearchIndex | exercises: {len(self.names)}, terms: {len(self.terms)}"
+
+    def _prefix_terms(self, token: str) -> Iterable[str]:
+        start = bisect.bisect_left(self.terms, token)
+        for term in self.terms[start:]:
+            if not term.startswith(token):
+                break
+            yield term
+
+    def _fuzzy_terms(self, token: str, max_distance: int) -> Iterable[tuple[str, int]]:
+        """Terms whose start is within max_distance edits of the token, with the same first letter.
+
+        An edit changes at most three of the token's trigrams, so candidates must share the rest. The leading
+        trigram is implied by the first letter, so it is not counted. A short token may share no other trigram with a
+        match, so then every term with the same first letter is checked.
+        """
+        token_trigrams = _trigrams(token) - {f"  {token[0]}"}
+        required = len(token_trigrams) - 3 * max_distance
+        if required < 1:
+            candidates = range(bisect.bisect_left(self.terms, token[0]),
+                               bisect.bisect_left(self.terms, chr(ord(token[0]) + 1)))
+        else:
+            counts: dict[int, int] = defaultdict(int)
+            for trigram in token_trigrams:
+                for i in self.trigrams.get(trigram, ()):
+                    counts[i] += 1
+            candidates = [i for i, count in counts.items() if count >= required]
+        for i in candidates:
+            term = self.terms[i]
+            if term[0] == token[0]:
+                distance = _prefix_distance(token, term[:len(token) + max_distance], max_distance)
+                if distance:
+                    yield term, distance
+
+    def _match_token(self, token: str) -> dict[int, float]:
+        """Score of every record matching one query token (memoised)."""
+        scores = self._token_cache.get(token)
+        if scores is not None:
+            self._token_cache.move_to_end(token)
+            return scores
+
+        scores = {}
+
+        def add(term: str, quality: float) -> None:
+            for index, weight in self.postings[term].items():
+                score = weight * quality
+                if scores.get(index, 0.0) < score:
+                    scores[index] = score
+
+        for term in self._prefix_terms(token):
+            add(term, EXACT_MATCH if term == token else PREFIX_MATCH)
+        max_distance = _max_distance(token)
+        if max_distance:
+            for term, distance in self._fuzzy_terms(token, max_distance):
+                add(term, FUZZY_MATCH[distance])
+
+        self._token_cache[token] = scores
+        if len(self._token_cache) > TOKEN_CACHE_SIZE:
+            self._token_cache.popitem(last=False)
+        return scores
+
+    def search(self, query: str, candidates: set[int] | None = None) -> list[SearchResult]:
+        """Find the records matching every token of a query, best first.
+
+        Args:
+            query (str): Search text.
+            candidates (set[int] | None): Only consider these record indices.
+
+        Returns:
+            list[SearchResult]: Matches ranked by score, ties in catalog order. Empty for an empty query.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        token_scores = sorted((self._match_token(token) for token in tokens), key=len)
+        totals = dict(token_scores[0]) if candidates is None else \
+            {i: score for i, score in token_scores[0].items() if i in candidates}
+        for scores in token_scores[1:]:
+            totals = {i: total + scores[i] for i, total in totals.items() if i in scores}
+            if not totals:
+                return []
+
+        phrase = " ".join(tokens)
+        name_phrases = self._name_phrases
+        results = [SearchResult(index=i, score=total + (NAME_PREFIX_BONUS if name_phrases[i].startswith(phrase) else 0))
+                   for i, total in totals.items()]
+        results.sort(key=lambda result: (-result.score, result.index))
+        return results
+
+
+if __name__ == "__main__":
+    from robocross.catalog_cache import get_catalog
+
+    search_index = get_catalog().search_index
+    for query in ("squat", "mae geri", "trikonsana", "kettle", "plnk"):
+        LOGGER.info(f"{query}: {[search_index.names[result.index] for result in search_index.search(query)[:5]]}")
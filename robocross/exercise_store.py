@@ -0,0 +1,306 @@
+"""Pluggable storage for the exercise catalog.
+
+The JSON store keeps the bundled workout data file. The SQLite store is intended for large, shared catalogs: it
+keeps category, intensity, equipment and target in indexed columns, pushes filtered queries down to SQL and commits
+each edit as a single-row transaction instead of rewriting the whole catalog. Every edit also bumps a revision number
+stored in the database, so caches can tell the catalog has changed without reading it.
+
+The store is chosen with the ROBOCROSS_EXERCISE_STORE environment variable ("json", the default, or "sqlite").
+A new SQLite store is seeded from the workout data file.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+
+from abc import ABC, abstractmethod
+from contextlib import closing
+from functools import lru_cache
+from pathlib import Path
+from typing import Sequence
+
+from core.core_paths import DATA_FILE_PATH, EXERCISE_DB_PATH
+from core.logging_utils import get_logger
+from core.persistence import JournaledDocument, atomic_write_json
+from robocross.robocross_enums import Equipment, Intensity, Target
+
+LOGGER = get_logger(name=__name__, level=logging.INFO)
+
+STORE_ENV_VAR = "ROBOCROSS_EXERCISE_STORE"
+SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+
+
+class ExerciseStore(ABC):
+    """Exercise catalog storage."""
+
+    pushes_down_queries = False  # True if query() is cheaper than filtering the loaded catalog
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} | {self.path}"
+
+    @abstractmethod
+    def load(self) -> dict:
+        """Get the whole catalog as hierarchical data {category: {exercise name: exercise data}}."""
+
+    @abstractmethod
+    def upsert(self, category: str, name: str, exercise_data: dict, replaces: tuple[str, str] | None = None) -> None:
+        """Add or update an exercise.
+
+        Args:
+            category (str): Category to save the exercise in.
+            name (str): Exercise name.
+            exercise_data (dict): Exercise data (description, equipment, intensity, target, energy, ...).
+            replaces (tuple[str, str] | None): (category, name) the exercise was loaded from. If the category has
+                                               changed, that entry is removed in the same write.
+        """
+
+    @abstractmethod
+    def delete(self, category: str, name: str) -> bool:
+        """Delete an exercise. Returns False if it does not exist."""
+
+    @abstractmethod
+    def query(self, nope_list: Sequence[str] = (), equipment_filter: Sequence[Equipment] = (),
+              categories: Sequence[str] | None = None, targets: Sequence[Target] | None = None,
+              intensities: Sequence[Intensity] | None = None) -> list[str]:
+        """Get the names of the exercises matching the filters, in catalog order.
+
+        Filters behave as ExerciseCatalog.query_ids().
+        """
+
+    @abstractmethod
+    def import_json(self, path: Path) -> None:
+        """Replace the whole catalog with the contents of a workout data file."""
+
+    def export_json(self, path: Path) -> None:
+        """Write the whole catalog to a workout data file."""
+        atomic_write_json(path, self.load())
+
+
+class JsonExerciseStore(ExerciseStore):
+    """The workout data file. Edits are appended to its journal and periodically compacted into the file."""
+
+    def __init__(self, path: Path = DATA_FILE_PATH):
+        super().__init__(path=path)
+        self.document = JournaledDocument(path)
+
+    def load(self) -> dict:
+        return self.document.load()
+
+    def upsert(self, category: str, name: str, exercise_data: dict, replaces: tuple[str, str] | None = None) -> None:
+        ops = []
+        if replaces and replaces[0] != category:
+            ops.append(["del", list(replaces)])
+        ops.append(["set", [category, name], exercise_data])
+        self.document.append(ops)
+
+    def delete(self, category: str, name: str) -> bool:
+        if name not in self.load().get(category, {}):
+            return False
+        self.document.delete([category, name])
+        return True
+
+    def query(self, nope_list: Sequence[str] = (), equipment_filter: Sequence[Equipment] = (),
+              categories: Sequence[str] | None = None, targets: Sequence[Target] | None = None,
+              intensities: Sequence[Intensity] | None = None) -> list[str]:
+        from robocross.catalog_cache import get_catalog
+
+        records = get_catalog(self.path).query(nope_list=nope_list, equipment_filter=equipment_filter,
+                                               categories=categories, targets=targets, intensities=intensities)
+        return [record.name for record in records]
+
+    def import_json(self, path: Path) -> None:
+        with path.open("r") as f:
+            self.document.write(json.load(f))
+
+
+class SqliteExerciseStore(ExerciseStore):
+    """SQLite database with indexed category, intensity, equipment and target columns.
+
+    The full exercise data is kept as JSON alongside the indexed columns, so entries load back exactly as saved.
+    """
+
+    pushes_down_queries = True
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS category (
+            name TEXT PRIMARY KEY,
+            position INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS exercise (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            category TEXT NOT NULL REFERENCES category(name),
+            position INTEGER NOT NULL,
+            intensity TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS exercise_category ON exercise(category, position);
+        CREATE INDEX IF NOT EXISTS exercise_intensity ON exercise(intensity);
+        CREATE TABLE IF NOT EXISTS exercise_equipment (
+            exercise_id INTEGER NOT NULL REFERENCES exercise(id) ON DELETE CASCADE,
+            equipment TEXT NOT NULL,
+            PRIMARY KEY (exercise_id, equipment)
+        );
+        CREATE INDEX IF NOT EXISTS exercise_equipment_name ON exercise_equipment(equipment, exercise_id);
+        CREATE TABLE IF NOT EXISTS exercise_target (
+            exercise_id INTEGER NOT NULL REFERENCES exercise(id) ON DELETE CASCADE,
+            target TEXT NOT NULL,
+            PRIMARY KEY (exercise_id, target)
+        );
+        CREATE INDEX IF NOT EXISTS exercise_target_name ON exercise_target(target, exercise_id);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value NOT NULL
+        );
+        INSERT OR IGNORE INTO meta (key, value) VALUES ('store_id', lower(hex(randomblob(16)))), ('revision', 0);
+    """
+
+    def __init__(self, path: Path = EXERCISE_DB_PATH, seed_path: Path | None = DATA_FILE_PATH):
+        """Open the database, creating it if necessary.
+
+        Args:
+            path (Path): Database file.
+            seed_path (Path | None): Workout data file imported when the database is created.
+        """
+        super().__init__(path=path)
+        is_new = not path.exists()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.executescript(self.SCHEMA)
+        if is_new and seed_path and seed_path.exists():
+            self.import_json(seed_path)
+            LOGGER.info(f"Created {path.name} from {seed_path.name}")
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA foreign_keys = ON")
+        return connection
+
+    def load(self) -> dict:
+        with closing(self._connect()) as connection:
+            data = {name: {} for (name,) in connection.execute("SELECT name FROM category ORDER BY position")}
+            rows = connection.execute(
+                "SELECT e.category, e.name, e.data FROM exercise e JOIN category c ON c.name = e.category "
+                "ORDER BY c.position, e.position")
+            for category, name, exercise_data in rows:
+                data[category][name] = json.loads(exercise_data)
+        return data
+
+    def version(self) -> tuple[str, int]:
+        """(store id, revision): the id is unique to the database, the revision increases with every edit."""
+        with closing(self._connect()) as connection:
+            values = dict(connection.execute("SELECT key, value FROM meta"))
+        return values["store_id"], values["revision"]
+
+    @staticmethod
+    def _bump_revision(connection: sqlite3.Connection) -> None:
+        connection.execute("UPDATE meta SET value = value + 1 WHERE key = 'revision'")
+
+    @staticmethod
+    def _ensure_category(connection: sqlite3.Connection, category: str) -> None:
+        connection.execute(
+            "INSERT OR IGNORE INTO category (name, position) "
+            "SELECT ?, COALESCE(MAX(position) + 1, 0) FROM category", (category,))
+
+    @staticmethod
+    def _insert(connection: sqlite3.Connection, category: str, name: str, exercise_data: dict) -> None:
+        """Insert or update one exercise. An exercise moved to another category goes to the end of it."""
+        row = connection.execute("SELECT id, category FROM exercise WHERE name = ?", (name,)).fetchone()
+        data = json.dumps(exercise_data)
+        intensity = exercise_data.get("intensity")
+        if row and row[1] == category:
+            exercise_id = row[0]
+            connection.execute("UPDATE exercise SET intensity = ?, data = ? WHERE id = ?",
+                               (intensity, data, exercise_id))
+        else:
+            if row:
+                connection.execute("DELETE FROM exercise WHERE id = ?", (row[0],))
+            exercise_id = connection.execute(
+                "INSERT INTO exercise (name, category, position, intensity, data) "
+                "SELECT ?, ?, COALESCE(MAX(position) + 1, 0), ?, ? FROM exercise WHERE category = ?",
+                (name, category, intensity, data, category)).lastrowid
+        connection.execute("DELETE FROM exercise_equipment WHERE exercise_id = ?", (exercise_id,))
+        connection.execute("DELETE FROM exercise_target WHERE exercise_id = ?", (exercise_id,))
+        connection.executemany("INSERT OR IGNORE INTO exercise_equipment (exercise_id, equipment) VALUES (?, ?)",
+                               [(exercise_id, x) for x in exercise_data.get("equipment") or []])
+        connection.executemany("INSERT OR IGNORE INTO exercise_target (exercise_id, target) VALUES (?, ?)",
+                               [(exercise_id, x) for x in exercise_data.get("target") or []])
+
+    def upsert(self, category: str, name: str, exercise_data: dict, replaces: tuple[str, str] | None = None) -> None:
+        with closing(self._connect()) as connection, connection:
+            if replaces and replaces[0] != category:
+                connection.execute("DELETE FROM exercise WHERE category = ? AND name = ?", replaces)
+            self._ensure_category(connection, category)
+            self._insert(connection, category, name, exercise_data)
+            self._bump_revision(connection)
+
+    def delete(self, category: str, name: str) -> bool:
+        with closing(self._connect()) as connection, connection:
+            cursor = connection.execute("DELETE FROM exercise WHERE category = ? AND name = ?", (category, name))
+            if cursor.rowcount:
+                self._bump_revision(connection)
+            return cursor.rowcount > 0
+
+    def query(self, nope_list: Sequence[str] = (), equipment_filter: Sequence[Equipment] = (),
+              categories: Sequence[str] | None = None, targets: Sequence[Target] | None = None,
+              intensities: Sequence[Intensity] | None = None) -> list[str]:
+        clauses = []
+        params = []
+
+        def placeholders(values: Sequence) -> str:
+            params.extend(values)
+            return ", ".join("?" * len(values))
+
+        if categories is not None:
+            clauses.append(f"e.category IN ({placeholders(list(categories))})")
+        if targets:
+            clauses.append("EXISTS (SELECT 1 FROM exercise_target t WHERE t.exercise_id = e.id "
+                           f"AND t.target IN ({placeholders([x.name for x in targets])}))")
+        if intensities:
+            clauses.append(f"e.intensity IN ({placeholders([x.name for x in intensities])})")
+        if equipment_filter:
+            clauses.append("NOT EXISTS (SELECT 1 FROM exercise_equipment q WHERE q.exercise_id = e.id "
+                           f"AND q.equipment IN ({placeholders([x.name for x in equipment_filter])}))")
+        if nope_list:
+            clauses.append(f"e.name NOT IN ({placeholders(list(nope_list))})")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                f"SELECT e.name FROM exercise e JOIN category c ON c.name = e.category {where} "
+                "ORDER BY c.position, e.position", params)
+            return [name for (name,) in rows]
+
+    def import_json(self, path: Path) -> None:
+        with path.open("r") as f:
+            loaded_data = json.load(f)
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM exercise")
+            connection.execute("DELETE FROM category")
+            for category, exercises in loaded_data.items():
+                self._ensure_category(connection, category)
+                for name, exercise_data in exercises.items():
+                    self._insert(connection, category, name, exercise_data)
+            self._bump_revision(connection)
+
+
+@lru_cache(maxsize=None)
+def _store(kind: str) -> ExerciseStore:
+    return SqliteExerciseStore() if kind == "sqlite" else JsonExerciseStore()
+
+
+def get_store() -> ExerciseStore:
+    """Get the exercise store selected by the ROBOCROSS_EXERCISE_STORE environment variable."""
+    return _store(os.environ.get(STORE_ENV_VAR, "json").lower())
+
+
+def is_sqlite_path(path: Path) -> bool:
+    return path.suffix in SQLITE_SUFFIXES
+
+
+if __name__ == "__main__":
+    store = get_store()
+    LOGGER.info(f"{store}: {len(store.query())} exercises")
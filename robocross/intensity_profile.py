@@ -0,0 +1,221 @@
+"""Intensity profiles: routines planned to follow a target intensity curve.
+
+A profile maps every slot to a target intensity on the ordinal scale (low 0, medium 1, high 2), e.g. a pyramid that
+peaks mid-session. Planning has two steps:
+
+- Levels: every exercise may appear at most once per min_repeat_spacing + 1 slots, which caps the slots each level
+  (low, medium, high) can fill. Assigning levels to slots is then a transportation problem with cost
+  |level - target|, and an optimal assignment is monotone: sorted by target, the slots of each level form one
+  contiguous block, levels ascending. A dynamic programme over (level, slots assigned) finds the best block sizes
+  exactly, with a sliding window minimum for the capacity, in O(slots x levels) after sorting.
+- Exercises: each slot draws from its level's exercises as a Random build would (category weights, then exercise
+  weights), redrawing a few times to avoid repeats within min_repeat_spacing slots.
+
+Exercises without an intensity count as medium. The pools are built with the routine's filters, so the plan never
+breaks the category, equipment or target filters.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import time
+
+from collections import deque
+from typing import Callable, Mapping, Sequence
+
+from core.logging_utils import get_logger
+from robocross.constraints import DEFAULT_REPEAT_SPACING
+from robocross.exercise_catalog import ExerciseRecord
+from robocross.robocross_enums import Intensity
+from robocross.sampling import ItemSampler
+
+LOGGER = get_logger(name=__name__, level=logging.INFO)
+
+LEVELS = tuple(intensity.value for intensity in Intensity)  # Ascending
+UNSET_LEVEL = Intensity.medium.value
+MAX_DRAWS = 8  # Draws per slot to avoid a repeat within the spacing
+
+
+def _pyramid(position: float, index: int) -> float:
+    return Intensity.high.value * (1 - abs(2 * position - 1))
+
+
+def _hiit_ladder(position: float, index: int) -> float:
+    """Work and recovery alternate, the work climbing from medium to high."""
+    if index % 2:
+        return Intensity.low.value
+    return Intensity.medium.value + (Intensity.high.value - Intensity.medium.value) * position
+
+
+def _taper(position: float, index: int) -> float:
+    """High for the first third, then easing off to low."""
+    return min(Intensity.high.value, 3 * Intensity.high.value / 2 * (1 - position))
+
+
+PROFILES: dict[str, Callable[[float, int], float]] = {
+    "Pyramid": _pyramid,
+    "HIIT ladder": _hiit_ladder,
+    "Taper": _taper,
+}
+DEFAULT_PROFILE = "Pyramid"
+
+
+def profile_curve(profile: str, slot_count: int) -> list[float]:
+    """Target intensity of every slot.
+
+    Args:
+        profile (str): Name in PROFILES.
+        slot_count (int): Number of slots.
+
+    Returns:
+        list[float]: Targets between Intensity.low.value and Intensity.high.value.
+    """
+    curve = PROFILES[profile]
+    span = max(1, slot_count - 1)
+    return [curve(index / span, index) for index in range(slot_count)]
+
+
+def record_level(record: ExerciseRecord) -> int:
+    return record.intensity.value if record.intensity is not None else UNSET_LEVEL
+
+
+def plan_levels(targets: Sequence[float], capacities: Mapping[int, int]) -> list[int | None]:
+    """Assign a level to every slot, minimising the total |level - target| within the level capacities.
+
+    Args:
+        targets (Sequence[float]): Target intensity per slot.
+        capacities (Mapping[int, int]): Most slots each level can fill. Missing levels fill none.
+
+    Returns:
+        list[int | None]: Level per slot. None for slots beyond the total capacity (the lowest targets).
+    """
+    order = sorted(range(len(targets)), key=lambda slot: targets[slot])
+    levels = [level for level in LEVELS if capacities.get(level, 0) > 0]
+    n = min(len(order), sum(capacities[level] for level in levels))
+    order = order[len(order) - n:]  # Leave out the lowest targets if the pool cannot fill every slot
+    infinity = float("inf")
+
+    # best[j]: cost of the j lowest targets filled by the levels so far. starts[level][j]: first slot of its block
+    best = [0.0] + [infinity] * n
+    starts: list[list[int]] = []
+    for level in levels:
+        prefix = [0.0]
+        for slot in order:
+            prefix.append(prefix[-1] + abs(level - targets[slot]))
+        capacity = capacities[level]
+        window: deque[int] = deque()  # Block starts in the window, by increasing best[start] - prefix[start]
+        new_best, level_starts = [infinity] * (n + 1), [0] * (n + 1)
+        for j in range(n + 1):
+            while window and best[window[-1]] - prefix[window[-1]] >= best[j] - prefix[j]:
+                window.pop()
+            window.append(j)
+            if window[0] < j - capacity:
+                window.popleft()
+            start = window[0]
+            new_best[j], level_starts[j] = best[start] - prefix[start] + prefix[j], start
+        best = new_best
+        starts.append(level_starts)
+
+    plan: list[int | None] = [None] * len(targets)
+    j = n
+    for level, level_starts in zip(reversed(levels), reversed(starts)):
+        start = level_starts[j]
+        for slot in order[start:j]:
+            plan[slot] = level
+        j = start
+    return plan
+
+
+class ProfilePlanner:
+    """Plans routines following an intensity curve."""
+
+    def __init__(self, pools: Mapping[str, Sequence[ExerciseRecord]], category_weights: Mapping[str, float] = None,
+                 item_weight: Callable[[ExerciseRecord], float] = None,
+                 min_repeat_spacing: int = DEFAULT_REPEAT_SPACING):
+        """Split the pools by level.
+
+        Args:
+            pools (Mapping[str, Sequence[ExerciseRecord]]): Filtered exercises by category.
+            category_weights (Mapping[str, float]): Relative category weights, equal if None.
+            item_weight (Callable[[ExerciseRecord], float]): Relative weight of an exercise within its category.
+            min_repeat_spacing (int): Slots between two uses of the same exercise.
+        """
+        self.min_repeat_spacing = max(0, min_repeat_spacing)
+        self.counts: dict[int, int] = {}
+        self.samplers: dict[int, ItemSampler[ExerciseRecord]] = {}
+        for level in LEVELS:
+            level_pools = {category: [record for record in records if record_level(record) == level]
+                           for category, records in pools.items()}
+            count = sum(len(records) for records in level_pools.values())
+            if not count:
+                continue
+            try:
+                self.samplers[level] = ItemSampler(level_pools, category_weights=category_weights,
+                                                   item_weight=item_weight)
+            except ValueError:  # Every exercise of the level weighted 0
+                continue
+            self.counts[level] = count
+
+    def __repr__(self) -> str:
+        return f"ProfilePlanner | exercises by level: {self.counts}"
+
+    def levels(self, targets: Sequence[float]) -> list[int | None]:
+        """Level of every slot (see plan_levels), each exercise filling one slot per min_repeat_spacing + 1."""
+        uses = math.ceil(len(targets) / (self.min_repeat_spacing + 1))
+        return plan_levels(targets, {level: count * uses for level, count in self.counts.items()})
+
+    def draw(self, level: int, position: int, last_used: dict[int, int], rng) -> ExerciseRecord:
+        """Draw an exercise of a level, avoiding one used within the spacing if a few draws allow.
+
+        Args:
+            level (int): Intensity level.
+            position (int): Slot position.
+            last_used (dict[int, int]): Position of the nearest use of each exercise, by record index.
+            rng (np.random.Generator): Random stream.
+
+        Returns:
+            ExerciseRecord: The drawn exercise.
+        """
+        sampler = self.samplers[level]
+        farthest, farthest_distance = None, -1
+        for _ in range(MAX_DRAWS):
+            record = sampler.sample_one(rng)
+            previous = last_used.get(record.index)
+            distance = abs(position - previous) if previous is not None else math.inf
+            if distance > self.min_repeat_spacing:
+                return record
+            if distance > farthest_distance:
+                farthest, farthest_distance = record, distance
+        return farthest
+
+    def solve(self, targets: Sequence[float], rng, fixed: Mapping[int, ExerciseRecord] = None) -> list[ExerciseRecord]:
+        """Plan a routine.
+
+        Args:
+            targets (Sequence[float]): Target intensity per slot (profile_curve()).
+            rng (np.random.Generator): Random stream.
+            fixed (Mapping[int, ExerciseRecord]): Slots that keep their exercise, by position.
+
+        Returns:
+            list[ExerciseRecord]: One exercise per slot, empty if the pools are.
+        """
+        if not self.samplers:
+            return []
+        start = time.perf_counter()
+        fixed = fixed or {}
+        plan = self.levels(targets)
+        last_used: dict[int, int] = {}
+        records = []
+        error = 0.0
+        for position, level in enumerate(plan):
+            record = fixed.get(position)
+            if record is None:
+                if level is None:
+                    continue
+                record = self.draw(level, position, last_used, rng)
+            last_used[record.index] = position
+            records.append(record)
+            error += abs(record_level(record) - targets[position])
+        LOGGER.debug(f"Profile plan: {len(records)} slots, mean |level - target| {error / max(1, len(records)):.2f} "
+                     f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return records
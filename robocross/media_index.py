@@ -0,0 +1,164 @@
+"""Index of exercise media files.
+
+The media directories are scanned once with os.scandir, mapping every snake_case exercise name to its best asset, so
+finding the media of an exercise is a dict lookup rather than a series of stat calls and a glob. Priority:
+
+1. Movies (media/movies: .mp4, .mov, .avi)
+2. Animations (media/animations: .gif)
+3. Images (media/images: .png, .jpg, .jpeg)
+4. A random default image (media/images/default_image*.png)
+
+Names and extensions match case-insensitively. A QFileSystemWatcher rescans a directory when its contents change,
+and watches the media root until a missing directory is created.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import random
+import time
+
+from pathlib import Path
+from typing import NamedTuple, Sequence
+
+from PySide6.QtCore import QCoreApplication, QFileSystemWatcher
+
+from core.core_paths import MEDIA_ROOT
+from core.logging_utils import get_logger
+
+LOGGER = get_logger(name=__name__, level=logging.INFO)
+
+MOVIES_DIR = MEDIA_ROOT / "movies"
+ANIMATIONS_DIR = MEDIA_ROOT / "animations"
+IMAGES_DIR = MEDIA_ROOT / "images"
+DEFAULT_IMAGE_PREFIX = "default_image"
+DEFAULT_IMAGE_EXTENSION = ".png"
+
+
+class MediaSource(NamedTuple):
+    directory: Path
+    extensions: tuple[str, ...]  # Lower case, by priority
+
+
+MEDIA_SOURCES = (
+    MediaSource(MOVIES_DIR, (".mp4", ".mov", ".avi")),
+    MediaSource(ANIMATIONS_DIR, (".gif",)),
+    MediaSource(IMAGES_DIR, (".png", ".jpg", ".jpeg")),
+)
+
+
+def media_key(workout_name: str) -> str:
+    """Index key of an exercise name, e.g. "Bent Over Rows" -> "bent_over_rows"."""
+    return workout_name.lower().replace(" ", "_")
+
+
+class MediaIndex:
+    """Best media file per exercise, kept up to date by a file system watcher."""
+
+    def __init__(self, sources: Sequence[MediaSource] = MEDIA_SOURCES, root: Path = MEDIA_ROOT):
+        """Scan every media directory.
+
+        Args:
+            sources (Sequence[MediaSource]): Media directories, by priority.
+            root (Path): Directory watched while a media directory is missing.
+        """
+        self.sources = tuple(sources)
+        self.root = root
+        self._files: dict[Path, dict[str, tuple[int, Path]]] = {}  # Per directory: key -> (extension rank, path)
+        self._defaults: dict[Path, list[Path]] = {}  # Default images per directory
+        self._best: dict[str, Path] = {}
+        self._default_images: list[Path] = []
+        self._watcher: QFileSystemWatcher | None = None
+        start = time.perf_counter()
+        for source in self.sources:
+            self._scan(source)
+        self._merge()
+        LOGGER.debug(f"{self} in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def __repr__(self) -> str:
+        return f"MediaIndex | exercises: {len(self._best)}, default images: {len(self._default_images)}"
+
+    def __len__(self) -> int:
+        return len(self._best)
+
+    def _scan(self, source: MediaSource) -> None:
+        """Index one directory."""
+        files: dict[str, tuple[int, Path]] = {}
+        defaults: list[Path] = []
+        try:
+            with os.scandir(source.directory) as entries:
+                for entry in entries:
+                    stem, extension = os.path.splitext(entry.name)
+                    extension = extension.lower()
+                    if extension not in source.extensions or not entry.is_file():
+                        continue
+                    key = stem.lower()
+                    rank = source.extensions.index(extension)
+                    if key not in files or rank < files[key][0]:
+                        files[key] = (rank, Path(entry.path))
+                    if key.startswith(DEFAULT_IMAGE_PREFIX) and extension == DEFAULT_IMAGE_EXTENSION:
+                        defaults.append(Path(entry.path))
+        except (FileNotFoundError, NotADirectoryError):
+            pass
+        self._files[source.directory] = files
+        self._defaults[source.directory] = sorted(defaults)
+
+    def _merge(self) -> None:
+        """Combine the directories by priority. The new maps replace the old ones in one assignment each."""
+        best: dict[str, Path] = {}
+        for source in reversed(self.sources):
+            best.update({key: path for key, (_, path) in self._files.get(source.directory, {}).items()})
+        self._best = best
+        self._default_images = [path for source in self.sources for path in self._defaults.get(source.directory, ())]
+
+    def refresh(self, directory: Path | str | None = None) -> None:
+        """Rescan one media directory, or all of them if directory is None or the media root."""
+        directory = Path(directory) if directory is not None else None
+        for source in self.sources:
+            if directory in (None, self.root, source.directory):
+                self._scan(source)
+        self._merge()
+        self._update_watched()
+        LOGGER.debug(f"Refreshed {directory or 'all media'}: {self}")
+
+    def find(self, workout_name: str) -> Path | None:
+        """Best media file of an exercise, a random default image if it has none, None if there is no default."""
+        path = self._best.get(media_key(workout_name))
+        if path is not None:
+            return path
+        return random.choice(self._default_images) if self._default_images else None
+
+    def watch(self) -> None:
+        """Rescan directories when their contents change. Needs a Qt application, delivers on its thread."""
+        if self._watcher is not None:
+            return
+        self._watcher = QFileSystemWatcher()
+        self._watcher.directoryChanged.connect(self.refresh)
+        self._update_watched()
+
+    def _update_watched(self) -> None:
+        """Watch every existing media directory, and the root while one is missing."""
+        if self._watcher is None:
+            return
+        directories = [source.directory for source in self.sources if source.directory.is_dir()]
+        if len(directories) < len(self.sources) and self.root.is_dir():
+            directories.append(self.root)
+        wanted = {str(directory) for directory in directories}
+        watched = set(self._watcher.directories())
+        if watched - wanted:
+            self._watcher.removePaths(sorted(watched - wanted))
+        if wanted - watched:
+            self._watcher.addPaths(sorted(wanted - watched))
+
+
+_INDEX: MediaIndex | None = None
+
+
+def get_media_index() -> MediaIndex:
+    """The shared media index, watched for changes once a Qt application exists."""
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = MediaIndex()
+    if QCoreApplication.instance() is not None:
+        _INDEX.watch()
+    return _INDEX
@@ -0,0 +1,327 @@
+"""Persistent manifest of media file traits.
+
+Image traits (dimensions, frame count, visible bounding box and padding, transparency, greyscale) are computed once
+per media file and stored in a JSON manifest keyed by the file's path relative to MEDIA_ROOT. An entry is valid while
+the file's size and modification time match. With content hashes enabled, a file that was touched but not changed
+keeps its traits without being decoded again.
+
+The indexer walks MEDIA_ROOT and analyses new or changed files across a process pool. It runs in the background when
+the app starts, and offline from the command line. Display code reads its decisions from the manifest. A file the
+manifest does not know yet is analysed in-process once and recorded. Recorded files are saved together, on a
+background timer SAVE_DELAY seconds after the first unsaved one and at exit, rather than rewriting the manifest for
+each file.
+
+Usage:
+    python -m robocross.media_manifest [--workers 4] [--hash]
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+from core.core_paths import CACHE_DIR, MEDIA_ROOT
+from core.image_analysis import ImageAnalysis, analyse_image, analyse_image_file
+from core.logging_utils import get_logger
+from core.persistence import atomic_write_json
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+LOGGER = get_logger(name=__name__, level=logging.INFO)
+
+MANIFEST_PATH = CACHE_DIR / "media_manifest.json"
+MANIFEST_VERSION = 1
+IMAGE_EXTENSIONS = frozenset((".png", ".jpg", ".jpeg", ".gif"))
+MEDIA_EXTENSIONS = IMAGE_EXTENSIONS | frozenset((".mp4", ".mov", ".avi"))
+HASH_CHUNK = 1 << 20
+SAVE_DELAY = 5.0  # seconds from the first unsaved record to the save that includes it
+
+
+class MediaTraits(NamedTuple):
+    """What display code needs to know about a media file."""
+    size: int
+    mtime_ns: int
+    content_hash: str | None = None
+    width: int | None = None  # None if the file is not an image or cannot be decoded
+    height: int | None = None
+    frame_count: int = 1
+    bounding_box: tuple[int, int, int, int] | None = None  # Visible pixels of the first frame
+    has_transparency: bool = False
+    is_greyscale: bool = False
+
+    @property
+    def analysis(self) -> ImageAnalysis | None:
+        """Image analysis of the first frame, None if the file was not analysed."""
+        if self.width is None:
+            return None
+        return ImageAnalysis(width=self.width, height=self.height, bounding_box=self.bounding_box,
+                             has_transparency=self.has_transparency, is_greyscale=self.is_greyscale)
+
+    def matches(self, stat: os.stat_result) -> bool:
+        return self.size == stat.st_size and self.mtime_ns == stat.st_mtime_ns
+
+    def to_dict(self) -> dict:
+        return {key: list(value) if isinstance(value, tuple) else value for key, value in self._asdict().items()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> MediaTraits:
+        data = {key: value for key, value in data.items() if key in cls._fields}
+        if data.get("bounding_box") is not None:
+            data["bounding_box"] = tuple(data["bounding_box"])
+        return cls(**data)
+
+
+def content_hash(path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compute_traits(path: Path, previous: MediaTraits | None = None, hash_content: bool = False) -> MediaTraits:
+    """Analyse a media file (a process pool task).
+
+    Args:
+        path (Path): Media file.
+        previous (MediaTraits | None): Outdated manifest entry. Its traits are kept if the content hash still matches.
+        hash_content (bool): Record a content hash.
+
+    Returns:
+        MediaTraits: Traits for the file's current size and modification time.
+    """
+    stat = os.stat(path)
+    digest = content_hash(path) if hash_content else None
+    if previous is not None and digest is not None and previous.content_hash == digest:
+        return previous._replace(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    traits = MediaTraits(size=stat.st_size, mtime_ns=stat.st_mtime_ns, content_hash=digest)
+    if not HAS_PIL or Path(path).suffix.lower() not in IMAGE_EXTENSIONS:
+        return traits
+    try:
+        with Image.open(path) as image:
+            frame_count = getattr(image, "n_frames", 1)
+            analysis = analyse_image(image)
+    except Exception as exception:  # Recorded as not analysed, rather than retried every session
+        LOGGER.debug(f"Cannot analyse {path}: {exception}")
+        return traits
+    return traits._replace(width=analysis.width, height=analysis.height, frame_count=frame_count,
+                           bounding_box=analysis.bounding_box, has_transparency=analysis.has_transparency,
+                           is_greyscale=analysis.is_greyscale)
+
+
+def _compute_task(task: tuple[str, MediaTraits | None, bool]) -> MediaTraits:
+    path, previous, hash_content = task
+    return compute_traits(Path(path), previous=previous, hash_content=hash_content)
+
+
+def walk_media(root: Path) -> Iterator[tuple[Path, os.stat_result]]:
+    """Media files under root, with their stats."""
+    try:
+        entries = list(os.scandir(root))
+    except (FileNotFoundError, NotADirectoryError):
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from walk_media(Path(entry.path))
+        elif os.path.splitext(entry.name)[1].lower() in MEDIA_EXTENSIONS and entry.is_file():
+            yield Path(entry.path), entry.stat()
+
+
+class MediaManifest:
+    """Media traits by path, persisted as JSON."""
+
+    def __init__(self, path: Path = MANIFEST_PATH, root: Path = MEDIA_ROOT):
+        self.path = Path(path)
+        self.root = Path(root)
+        self._resolved_root = self.root.resolve()
+        self.entries: dict[str, MediaTraits] = {}
+        self._lock = threading.Lock()  # The indexer may update the manifest while the GUI thread reads it
+        self._save_lock = threading.Lock()  # One write at a time, so an older snapshot never replaces a newer one
+        self._dirty = False
+        self._save_timer: threading.Timer | None = None
+
+    def __repr__(self) -> str:
+        return f"MediaManifest | {self.path.name}, files: {len(self.entries)}"
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def load(cls, path: Path = MANIFEST_PATH, root: Path = MEDIA_ROOT) -> MediaManifest:
+        """Read a manifest, starting empty if it is missing, unreadable or from another version."""
+        manifest = cls(path=path, root=root)
+        try:
+            data = json.loads(manifest.path.read_text(encoding="utf-8"))
+            if data.get("version") == MANIFEST_VERSION:
+                manifest.entries = {key: MediaTraits.from_dict(value) for key, value in data["files"].items()}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError, KeyError) as exception:
+            LOGGER.warning(f"Ignoring media manifest {manifest.path}: {exception}")
+        return manifest
+
+    def save(self) -> None:
+        """Write the manifest, including any records waiting for the save timer."""
+        with self._save_lock:
+            with self._lock:
+                files = {key: traits.to_dict() for key, traits in self.entries.items()}
+                self._dirty = False
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_json(self.path, {"version": MANIFEST_VERSION, "files": files}, indent=None)
+
+    def flush(self) -> None:
+        """Save now if records are waiting for the save timer."""
+        if self._dirty:
+            self.save()
+
+    def key(self, path: Path) -> str | None:
+        """Manifest key of a file: its path relative to the media root. None for files outside the root."""
+        try:
+            return Path(path).resolve().relative_to(self._resolved_root).as_posix()
+        except ValueError:
+            return None
+
+    def get(self, path: Path) -> MediaTraits | None:
+        """Recorded traits of a file, None if unknown or outdated (one stat call)."""
+        key = self.key(path)
+        traits = self.entries.get(key) if key is not None else None
+        if traits is None:
+            return None
+        try:
+            return traits if traits.matches(os.stat(path)) else None
+        except OSError:
+            return None
+
+    def traits(self, path: Path) -> MediaTraits | None:
+        """Traits of a file, analysing and recording it if the manifest does not know it yet."""
+        traits = self.get(path)
+        if traits is not None:
+            return traits
+        try:
+            traits = compute_traits(Path(path), previous=self.entries.get(self.key(path)))
+        except OSError:
+            return None
+        self.record(path, traits)
+        return traits
+
+    def analysis(self, path: Path) -> ImageAnalysis | None:
+        """Image analysis of a file, from the manifest. Files outside the media root are analysed in memory only."""
+        if self.key(path) is None:
+            return analyse_image_file(path)
+        traits = self.traits(path)
+        return traits.analysis if traits else None
+
+    def record(self, path: Path, traits: MediaTraits | None = None) -> None:
+        """Record a file's traits (analysing it if not given). Files outside the media root are skipped.
+
+        The manifest is saved SAVE_DELAY seconds later on a background thread, with any other records made meanwhile.
+        """
+        key = self.key(path)
+        if key is None:
+            return
+        traits = traits or compute_traits(Path(path))
+        with self._lock:
+            self.entries[key] = traits
+            self._dirty = True
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(SAVE_DELAY, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    def update(self, workers: int | None = None, hash_content: bool = False, chunksize: int = 8) -> int:
+        """Analyse every new or changed file under the root across a process pool, and drop removed files.
+
+        Args:
+            workers (int | None): Worker processes, defaults to the CPU count. 1 analyses in this process.
+            hash_content (bool): Record content hashes, so touched but unchanged files are not decoded again.
+            chunksize (int): Files sent to a worker at a time.
+
+        Returns:
+            int: Number of files analysed.
+        """
+        start = time.perf_counter()
+        files = {self.key(path): (path, stat) for path, stat in walk_media(self.root)}
+        with self._lock:
+            entries = dict(self.entries)
+        stale = [(str(path), entries.get(key), hash_content) for key, (path, stat) in files.items()
+                 if key not in entries or not entries[key].matches(stat)
+                 or (hash_content and entries[key].content_hash is None)]
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(stale) <= 1:
+            results = list(map(_compute_task, stale))
+        else:
+            # Spawned rather than forked: the app's threads (Qt, the thread pool) must not be copied into the workers
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=min(workers, len(stale)), mp_context=context) as executor:
+                results = list(executor.map(_compute_task, stale, chunksize=chunksize))
+
+        removed = set(entries) - set(files)
+        with self._lock:
+            for (path, _, _), traits in zip(stale, results):
+                self.entries[self.key(Path(path))] = traits
+            for key in removed:
+                self.entries.pop(key, None)
+        if stale or removed or self._dirty:
+            self.save()
+        LOGGER.info(f"Media manifest: {len(stale)} analysed, {len(removed)} removed, {len(files)} files in "
+                    f"{time.perf_counter() - start:.2f} s")
+        return len(stale)
+
+
+_MANIFEST: MediaManifest | None = None
+_MANIFEST_LOCK = threading.Lock()
+
+
+def get_media_manifest() -> MediaManifest:
+    """The shared manifest, loaded on first use."""
+    global _MANIFEST
+    with _MANIFEST_LOCK:
+        if _MANIFEST is None:
+            _MANIFEST = MediaManifest.load()
+            atexit.register(_MANIFEST.flush)  # Records still waiting for the save timer
+        return _MANIFEST
+
+
+def update_media_manifest() -> None:
+    """Bring the shared manifest up to date (for a background thread)."""
+    try:
+        get_media_manifest().update()
+    except Exception:  # Display falls back to analysing files as they are shown
+        LOGGER.exception("Media manifest update failed")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyse media files into the media manifest.")
+    parser.add_argument("--root", type=Path, default=MEDIA_ROOT, help="media directory (default: MEDIA_ROOT)")
+    parser.add_argument("-o", "--output", type=Path, default=MANIFEST_PATH, help="manifest file")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--hash", action="store_true", help="record content hashes")
+    parser.add_argument("--rebuild", action="store_true", help="analyse every file again")
+    args = parser.parse_args(argv)
+
+    manifest = MediaManifest(path=args.output, root=args.root) if args.rebuild else \
+        MediaManifest.load(path=args.output, root=args.root)
+    manifest.update(workers=args.workers, hash_content=args.hash)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
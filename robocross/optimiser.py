@@ -0,0 +1,218 @@
+"""Best-of-N routine optimisation.
+
+N candidate routines are drawn in one batch from the routine's seeded streams and encoded as NumPy matrices, one row
+per candidate and one column per slot: pool row, and through it the intensity, energy, target bitmask and equipment
+bitmask of every slot. Each term of the objective is a few whole-matrix operations, so scoring thousands of
+candidates costs about as much as scoring one in Python, and the best candidate becomes the routine.
+
+Objective terms (each roughly in 0..1, weighted by Objective):
+
+- coverage: share of the wanted targets (the target filter, or every target in the pool) hit at least once.
+- smoothness: mean intensity step between consecutive slots, plus the share of slots beyond the longest allowed run
+  of high intensity exercises (a penalty).
+- calories: mean energy per slot relative to the most energetic exercise in the pool.
+- changeovers: mean pieces of equipment picked up or put down between consecutive slots (a penalty).
+"""
+from __future__ import annotations
+
+import logging
+import time
+
+from dataclasses import asdict, dataclass
+from typing import NamedTuple, Sequence, TYPE_CHECKING
+
+import numpy as np
+
+from core.logging_utils import get_logger
+from robocross.exercise_catalog import INTENSITY_ORDINALS, NO_INTENSITY, ExerciseRecord
+from robocross.robocross_enums import Intensity, Target
+
+if TYPE_CHECKING:
+    from robocross.routine import Routine
+
+LOGGER = get_logger(name=__name__, level=logging.INFO)
+
+ENERGY_BY_INTENSITY = {Intensity.high: 13, Intensity.medium: 9, Intensity.low: 6}  # kcal per minute if unset
+HIGH = INTENSITY_ORDINALS[Intensity.high]
+MEDIUM = INTENSITY_ORDINALS[Intensity.medium]  # Stands in for an unset intensity
+
+
+@dataclass(frozen=True)
+class Objective:
+    """Weights of the score terms."""
+    coverage: float = 1.0
+    smoothness: float = 1.0
+    calories: float = 0.25
+    changeovers: float = 0.25
+
+    def as_dict(self) -> dict[str, float]:
+        return asdict(self)
+
+
+class EncodedPool(NamedTuple):
+    """Feature columns of the exercises candidates are drawn from."""
+    records: tuple[ExerciseRecord, ...]
+    intensity: np.ndarray  # int8 ordinal
+    energy: np.ndarray  # float64, kcal per minute
+    target: np.ndarray  # uint32, Target.mask_of()
+    equipment: np.ndarray  # uint32, Equipment.mask_of()
+
+    @classmethod
+    def encode(cls, records: Sequence[ExerciseRecord], columns) -> EncodedPool:
+        """Encode records, taking the bitmasks from the catalog's filter columns (CatalogColumns)."""
+        index = np.fromiter((record.index for record in records), dtype=np.intp, count=len(records))
+        intensity = columns.intensity[index]
+        return cls(
+            records=tuple(records),
+            intensity=np.where(intensity == NO_INTENSITY, MEDIUM, intensity).astype(np.int8),
+            energy=np.fromiter((record.energy if record.energy is not None else
+                                ENERGY_BY_INTENSITY.get(record.intensity, 9) for record in records),
+                               dtype=np.float64, count=len(records)),
+            target=columns.target[index],
+            equipment=columns.equipment[index],
+        )
+
+
+class ScoreTerms(NamedTuple):
+    """Score terms per candidate."""
+    coverage: np.ndarray
+    smoothness: np.ndarray
+    calories: np.ndarray
+    changeovers: np.ndarray
+
+    def score(self, objective: Objective) -> np.ndarray:
+        return (objective.coverage * self.coverage + objective.calories * self.calories
+                - objective.smoothness * self.smoothness - objective.changeovers * self.changeovers)
+
+
+class OptimiserResult(NamedTuple):
+    records: list[ExerciseRecord]  # The best candidate
+    score: float
+    terms: dict[str, float]  # Score terms of the best candidate
+    candidates: int
+
+
+def popcount(values: np.ndarray) -> np.ndarray:
+    """Set bits of every uint32 value."""
+    if hasattr(np, "bitwise_count"):  # NumPy 2
+        return np.bitwise_count(values)
+    values = values - ((values >> 1) & 0x55555555)
+    values = (values & 0x33333333) + ((values >> 2) & 0x33333333)
+    return (((values + (values >> 4)) & 0x0F0F0F0F) * 0x01010101 & 0xFFFFFFFF) >> 24
+
+
+def score_candidates(pool: EncodedPool, rows: np.ndarray, wanted_targets: int,
+                     max_consecutive_high: int | None = 2) -> ScoreTerms:
+    """Score candidate routines.
+
+    Args:
+        pool (EncodedPool): Encoded exercises.
+        rows (np.ndarray): (candidates, slots) pool rows.
+        wanted_targets (int): Target.mask_of() the targets to cover.
+        max_consecutive_high (int | None): Longest run of high intensity exercises without a penalty.
+
+    Returns:
+        ScoreTerms: One value per candidate for each term.
+    """
+    count, slots = rows.shape
+    intensity = pool.intensity[rows]
+    equipment = pool.equipment[rows]
+
+    if slots > 1:
+        steps = np.abs(np.diff(intensity.astype(np.int16), axis=1)).mean(axis=1) / HIGH
+        changeovers = popcount(equipment[:, 1:] ^ equipment[:, :-1]).mean(axis=1)
+    else:
+        steps = changeovers = np.zeros(count)
+    excess = np.zeros(count)
+    if max_consecutive_high is not None:
+        run = np.zeros(count, dtype=np.int32)
+        for high in (intensity == HIGH).T:  # One vectorised step per slot
+            run = (run + 1) * high
+            excess += run > max_consecutive_high
+
+    if wanted_targets:
+        hit = np.bitwise_or.reduce(pool.target[rows], axis=1) & np.uint32(wanted_targets)
+        coverage = popcount(hit) / int(popcount(np.uint32(wanted_targets)))
+    else:
+        coverage = np.ones(count)
+    peak = pool.energy.max() if len(pool.energy) else 0.0
+    calories = pool.energy[rows].mean(axis=1) / peak if peak > 0 else np.zeros(count)
+    return ScoreTerms(coverage=coverage, smoothness=steps + excess / slots, calories=calories,
+                      changeovers=changeovers)
+
+
+def _role_columns(routine: Routine, rows: np.ndarray, offset: int, rng) -> None:
+    """Draw the warm up and cool down slots of every candidate (pool rows after offset)."""
+    pools = routine.pools
+    if routine.warm_up and pools.warm_up:
+        rows[:, 0] = offset + rng.integers(len(pools.warm_up), size=len(rows))
+    if routine.cool_down and pools.cool_down and rows.shape[1] > 1:
+        rows[:, -1] = offset + len(pools.warm_up) + rng.integers(len(pools.cool_down), size=len(rows))
+
+
+def draw_candidates(routine: Routine, count: int, rng) -> tuple[EncodedPool, np.ndarray] | None:
+    """Draw candidate routines as a matrix of pool rows, as random_workout/sequence_workout would draw them.
+
+    Returns:
+        tuple[EncodedPool, np.ndarray] | None: Pool and (count, slots) rows. None if there is nothing to draw.
+    """
+    slots = routine.workout_count
+    if slots <= 0:
+        return None
+    pools = routine.pools
+    if routine.workout_structure == "Sequence":
+        # Every candidate cycles through its own random order of the (non-empty) categories
+        categories = [category for category, pool in pools.by_category.items() if pool]
+        if not categories:
+            return None
+        records = [record for category in categories for record in pools.by_category[category]]
+        sizes = np.array([len(pools.by_category[category]) for category in categories])
+        offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        cycles = np.argsort(rng.random((count, len(categories))), axis=1)
+        slot_categories = cycles[:, np.arange(slots) % len(categories)]
+        rows = offsets[slot_categories] + (rng.random((count, slots)) * sizes[slot_categories]).astype(np.intp)
+    else:
+        sampler = routine.exercise_sampler
+        if sampler is None:
+            return None
+        records = list(sampler.items)
+        rows = np.asarray(sampler.sampler.sample(count * slots, rng), dtype=np.intp).reshape(count, slots)
+
+    _role_columns(routine, rows, len(records), rng)
+    records.extend(pools.warm_up)
+    records.extend(pools.cool_down)
+    return EncodedPool.encode(records, routine.workout_data.catalog.columns), rows
+
+
+def best_of_n(routine: Routine, count: int, objective: Objective = Objective(), rng=None) -> OptimiserResult | None:
+    """Draw count candidate routines and keep the best one.
+
+    Args:
+        routine (Routine): Routine parameters (Random or Sequence structure).
+        count (int): Number of candidates.
+        objective (Objective): Weights of the score terms.
+        rng: NumPy Generator, the routine's "best_of" stream if None.
+
+    Returns:
+        OptimiserResult | None: The best candidate, None if no exercise matches the routine.
+    """
+    start = time.perf_counter()
+    rng = rng or routine.streams.stream("best_of")
+    drawn = draw_candidates(routine, max(1, count), rng)
+    if drawn is None:
+        return None
+    pool, rows = drawn
+    wanted = Target.mask_of(routine.target_filter) if routine.target_filter else \
+        int(np.bitwise_or.reduce(pool.target)) if len(pool.target) else 0
+    terms = score_candidates(pool, rows, wanted_targets=wanted, max_consecutive_high=routine.max_consecutive_high)
+    scores = terms.score(objective)
+    best = int(np.argmax(scores))
+    result = OptimiserResult(
+        records=[pool.records[row] for row in rows[best].tolist()],
+        score=float(scores[best]),
+        terms={name: round(float(values[best]), 3) for name, values in terms._asdict().items()},
+        candidates=len(rows),
+    )
+    LOGGER.debug(f"Best of {result.candidates}: score {result.score:.3f} {result.terms} "
+                 f"(median {float(np.median(scores)):.3f}) in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return result
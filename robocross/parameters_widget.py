@@ -11,7 +11,7 @@ from core.core_paths import image_path
 from robocross.robocross_enums import Equipment
 from robocross.workout_form import WorkoutForm
 from robocross.workout_editor_table import WorkoutEditorTable
-from robocross.workout_data import WorkoutData
+from robocross.catalog_cache import get_catalog
 from robocross.workout import Workout
 from widgets.generic_widget import GenericWidget
 from widgets.scroll_widget import ScrollWidget
@@ -26,6 +26,8 @@ class ParametersWidget(GenericWidget):
     build_button_clicked = Signal()
     add_exercise_clicked = Signal()
     shuffle_order_clicked = Signal()
+    minimise_changeovers_clicked = Signal()
+    parameters_changed = Signal()  # emitted when a form or equipment setting changes
     copy_to_clipboard_clicked = Signal()
     workout_name_changed = Signal(str)  # Emits the workout name
     workout_cycles_changed = Signal(int)  # Emits the workout cycles count
@@ -47,6 +49,9 @@ class ParametersWidget(GenericWidget):
                                         clicked=self.add_exercise_clicked.emit)
         self.button_bar.add_icon_button(icon_path=image_path("random.png"), tool_tip="Randomize exercise order",
                                         clicked=self.shuffle_order_clicked.emit)
+        self.button_bar.add_icon_button(icon_path=image_path("equipment_order.png"),
+                                        tool_tip="Reorder exercises to minimise equipment changes",
+                                        clicked=self.minimise_changeovers_clicked.emit)
         self.button_bar.add_icon_button(icon_path=image_path("copy.png"), tool_tip="Copy workout data to clipboard for spreadsheet",
                                         clicked=self.copy_to_clipboard_clicked.emit)
         self.button_bar.add_stretch()
@@ -107,20 +112,9 @@ class ParametersWidget(GenericWidget):
         summary_layout.addWidget(self.summary_gear)
 
         # Editor table (in scroll area)
-        workout_data = WorkoutData()
-        available_exercises = [w.name for w in workout_data.workouts]
-
-        # Organize exercises by category (dynamically from workout_data categories)
-        exercises_by_category = {}
-        for category in workout_data.categories:
-            exercises_by_category[category] = []
-
-        for workout in workout_data.workouts:
-            category = workout.aerobic_type.name
-            if category in exercises_by_category:
-                exercises_by_category[category].append(workout.name)
-
-        self.editor_table = self.add_widget(WorkoutEditorTable(available_exercises, exercises_by_category))
+        catalog = get_catalog()
+        self.editor_table = self.add_widget(
+            WorkoutEditorTable(list(catalog.by_name.keys()), catalog.exercises_by_category))
         self.editor_table.setMinimumHeight(300)  # Ensure table is visible
         self.editor_table.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
 
@@ -133,6 +127,11 @@ class ParametersWidget(GenericWidget):
             cool_down=self.form.cool_down,
             workout_structure=self.form.workout_structure
         ))
+        self.minimise_changeovers_clicked.connect(lambda: self.editor_table.minimise_changeovers(
+            warm_up=self.form.warm_up,
+            cool_down=self.form.cool_down,
+            workout_structure=self.form.workout_structure
+        ))
 
         # Connect workout name field to update summary on Return key
         self.form.workout_name_line_edit.returnPressed.connect(self.on_workout_name_changed)
@@ -185,6 +184,14 @@ class ParametersWidget(GenericWidget):
         for checkbox in self.equipment_check_boxes:
             checkbox.setChecked(self.settings.value(checkbox.text(), True))
             checkbox.checkStateChanged.connect(partial(self.check_state_changed, checkbox))
+            checkbox.checkStateChanged.connect(lambda *args: self.parameters_changed.emit())
+        self.form.parameters_changed.connect(self.parameters_changed.emit)
+
+    def on_catalog_changed(self):
+        """Refresh the exercise lists offered by the editor table after the catalog has been edited."""
+        catalog = get_catalog()
+        self.editor_table.set_available_exercises(list(catalog.by_name.keys()), catalog.exercises_by_category)
+        self.update_summary()
 
     def set_workout_list(self, workouts: list[Workout], rest_time: int = 30, workout_name: str = ""):
         """Populate editor table with workout list."""
@@ -0,0 +1,270 @@
+"""Incremental routine re-rolls.
+
+When a routine parameter changes, the existing schedule is updated rather than rebuilt: every slot is checked against
+the constraints it depends on and only the slots those checks invalidate are drawn again. Pinned slots (pinned or
+edited by hand in the editor) and exercises that are not in the catalog are never changed.
+
+What each parameter invalidates:
+
+- nope_list, equipment_filter, selected_categories, target_filter: slots whose exercise no longer passes the filters.
+- warm_up, cool_down: the first/last slot if it is not a cardio/flexibility exercise (those two slots are exempt
+  from the category and target filters, as in a fresh build).
+- category_weights (and selected_categories): slots of categories above their new share, which go to the
+  categories below it.
+- workout_length, interval, rest_time: slots are added or removed at the end, and kept slots take the new timings
+  (otherwise they keep theirs).
+- Sequence structure: slots whose category breaks the category cycle.
+- Balanced structure: slots above max_intensity, or repeating an exercise within min_repeat_spacing slots.
+- Profile structure (and intensity_profile): slots whose intensity differs from the level planned for their position.
+- workout_structure: every slot.
+
+exercise_weights, minimise_changeovers, best_of and objective only shape new draws and fresh builds, so they
+invalidate nothing.
+"""
+from __future__ import annotations
+
+import logging
+
+from collections import Counter
+from typing import NamedTuple, Sequence, TYPE_CHECKING
+
+from core.logging_utils import get_logger
+from robocross.candidate_pools import COOL_DOWN_CATEGORY, WARM_UP_CATEGORY
+from robocross.constraints import BalancedSolver, apportion
+from robocross.exercise_catalog import ExerciseRecord
+from robocross.intensity_profile import profile_curve, record_level
+from robocross.sampling import ItemSampler, choice, shuffle
+from robocross.workout import ScheduledItem
+
+if TYPE_CHECKING:
+    from robocross.routine import Routine
+
+LOGGER = get_logger(name=__name__, level=logging.INFO)
+
+
+class Slot(NamedTuple):
+    """A slot of an existing schedule."""
+    record: ExerciseRecord | None  # None for an exercise that is not in the catalog
+    duration: int  # seconds
+    rest: int  # seconds
+    pinned: bool = False
+
+
+class SlotUpdate(NamedTuple):
+    """A slot of the updated schedule."""
+    source: int | None  # Position of the slot in the existing schedule, None for a new slot
+    item: ScheduledItem | None  # New contents, None if the existing slot is kept exactly as it is
+
+
+def _resize(routine: Routine, slots: Sequence[Slot]) -> list[int | None]:
+    """Existing slot positions in the new order: unpinned slots are removed from, or new slots added at, the end
+    (before the cool down slot)."""
+    order: list[int | None] = list(range(len(slots)))
+    tail = [order.pop()] if routine.cool_down and len(order) > 1 else []
+    first = 1 if routine.warm_up else 0
+    excess = len(order) + len(tail) - routine.workout_count
+    for i in range(len(order) - 1, first - 1, -1):
+        if excess <= 0:
+            break
+        if not slots[order[i]].pinned:
+            del order[i]
+            excess -= 1
+    order.extend([None] * max(0, routine.workout_count - len(order) - len(tail)))
+    return order + tail
+
+
+def _filter_problem(routine: Routine, record: ExerciseRecord, category: str | None) -> str | None:
+    """The parameter a record breaks at a position, if any. category is required by a warm up/cool down slot."""
+    if category is not None:
+        if record.category != category:
+            return "warm_up" if category == WARM_UP_CATEGORY else "cool_down"
+    else:
+        if record.category not in routine.selected_categories:
+            return "selected_categories"
+        if routine.target_filter and not set(record.target) & set(routine.target_filter):
+            return "target_filter"
+    if set(record.equipment) & set(routine.equipment_filter):
+        return "equipment_filter"
+    if record.name in routine.nope_list:
+        return "nope_list"
+    return None
+
+
+def _sequence_cycle(routine: Routine, categories: dict[int, str], rng) -> list[str]:
+    """The category cycle of the current slots (by majority per phase), completed with any new categories."""
+    cycle_length = len(routine.selected_categories)
+    votes = Counter((position % cycle_length, category) for position, category in categories.items()
+                    if category in routine.selected_categories)
+    cycle: list[str | None] = [None] * cycle_length
+    for (phase, category), _ in sorted(votes.items(), key=lambda vote: (-vote[1], vote[0])):
+        if cycle[phase] is None and category not in cycle:
+            cycle[phase] = category
+    missing = [category for category in routine.selected_categories if category not in cycle]
+    shuffle(rng, missing)
+    return [category if category is not None else missing.pop() for category in cycle]
+
+
+def reroll_slots(routine: Routine, slots: Sequence[Slot], previous_params: dict | None = None,
+                 rebuild: bool = False) -> list[SlotUpdate]:
+    """Update an existing schedule to a routine's parameters, drawing only the slots they invalidate.
+
+    Args:
+        routine (Routine): Routine with the new parameters.
+        slots (Sequence[Slot]): The existing schedule.
+        previous_params (dict | None): Routine.params the schedule was built with, if known. Category shares are
+                                       only enforced when they changed (or are unknown).
+        rebuild (bool): Draw every slot that is not pinned again.
+
+    Returns:
+        list[SlotUpdate]: The updated schedule. Slots that cannot be filled (no exercise passes the filters) are
+                          left out.
+    """
+    params = routine.params
+    changed = set(params) if previous_params is None else \
+        {key for key, value in params.items() if previous_params.get(key) != value}
+    rebuild = rebuild or (previous_params is not None and "workout_structure" in changed)
+    streams = routine.streams
+    rng = streams.stream("reroll")
+
+    order = _resize(routine, slots)
+    count = len(order)
+    required = {0: WARM_UP_CATEGORY} if routine.warm_up and count else {}  # Warm up/cool down slot categories
+    if routine.cool_down and count > 1:
+        required[count - 1] = COOL_DOWN_CATEGORY
+    middle = [position for position in range(count) if position not in required]
+
+    def fixed(position: int) -> bool:
+        """Slots that are never drawn again."""
+        source = order[position]
+        return source is not None and (slots[source].pinned or slots[source].record is None)
+
+    records: dict[int, ExerciseRecord] = {}  # Kept records by position
+    problems: dict[int, str] = {}
+    for position, source in enumerate(order):
+        if source is None:
+            problems[position] = "workout_length"
+            continue
+        record = slots[source].record
+        if record is None:
+            continue
+        problem = "workout_structure" if rebuild and not fixed(position) else \
+            _filter_problem(routine, record, required.get(position))
+        if problem and not fixed(position):
+            problems[position] = problem
+        else:
+            records[position] = record
+
+    # Structure-specific constraints between the kept slots
+    cycle = []
+    if routine.workout_structure == "Sequence" and routine.selected_categories:
+        cycle = _sequence_cycle(routine, {position: records[position].category for position in middle
+                                          if position in records and not fixed(position)}, rng)
+        for position in middle:
+            if position in records and not fixed(position) \
+                    and records[position].category != cycle[position % len(cycle)]:
+                problems[position] = "sequence"
+                del records[position]
+    elif routine.workout_structure == "Balanced":
+        ceiling = routine.max_intensity.value if routine.max_intensity else None
+        last_seen: dict[int, int] = {}
+        for position in range(count):
+            record = records.get(position)
+            if record is None:
+                continue
+            if fixed(position):
+                last_seen[record.index] = position
+            elif ceiling is not None and record.intensity.value > ceiling:
+                problems[position] = "max_intensity"
+                del records[position]
+            elif position - last_seen.get(record.index, -count - 1) <= routine.min_repeat_spacing:
+                problems[position] = "min_repeat_spacing"
+                del records[position]
+            else:
+                last_seen[record.index] = position
+    elif routine.workout_structure == "Profile":
+        planner = routine.profile_planner
+        plan = planner.levels(profile_curve(routine.intensity_profile, count))
+        for position in middle:
+            if position in records and not fixed(position) and record_level(records[position]) != plan[position]:
+                problems[position] = "intensity_profile"
+                del records[position]
+
+    pools = routine.pools.by_category
+    weights = {category: routine.category_weights.get(category, 0) for category, pool in pools.items() if pool}
+    goal = apportion(weights, len(middle)) if weights else {}
+    if routine.workout_structure != "Sequence" and changed & {"category_weights", "selected_categories"}:
+        by_category: dict[str, list[int]] = {}
+        for position in middle:
+            if position in records:
+                by_category.setdefault(records[position].category, []).append(position)
+        for category, positions in by_category.items():
+            releasable = [position for position in positions if not fixed(position)]
+            shuffle(rng, releasable)
+            for position in releasable[:max(0, len(positions) - goal.get(category, 0))]:
+                problems[position] = "category_weights"
+                del records[position]
+
+    # Draw the invalidated slots
+    for position, category in required.items():
+        if position in problems:
+            pool = routine.pools.warm_up if category == WARM_UP_CATEGORY else routine.pools.cool_down
+            if pool:
+                records[position] = choice(rng, pool)
+    free = [position for position in sorted(problems) if position not in records]
+    if free and routine.workout_structure == "Balanced":
+        solver = BalancedSolver(routine.pools.combined, category_weights=routine.category_weights,
+                                constraints=routine.constraints, fixed_records=list(records.values()))
+        solved = solver.solve(count, rng=rng, fixed=records)
+        records.update({position: solved[position] for position in free if solved})
+    elif free and routine.workout_structure == "Profile":
+        last_used = {record.index: position for position, record in sorted(records.items())}
+        for position in free:
+            level = plan[position]
+            if level is not None:
+                records[position] = planner.draw(level, position, last_used, rng)
+                last_used[records[position].index] = position
+    elif free and routine.workout_structure == "Sequence":
+        for position in free:
+            pool = pools.get(cycle[position % len(cycle)]) if cycle else None
+            if pool:
+                records[position] = choice(rng, pool)
+    elif free and routine.exercise_sampler is not None:
+        # Give the free slots to the categories short of their share, then draw as a fresh build would
+        kept = Counter(records[position].category for position in middle if position in records)
+        categories = [category for category in goal for _ in range(max(0, goal[category] - kept[category]))]
+        shuffle(rng, categories)
+        samplers: dict[str, ItemSampler] = {}
+        item_weight = routine.exercise_weight
+        for position in free:
+            category = categories.pop() if categories and position in middle else None
+            if category is None:
+                records[position] = routine.exercise_sampler.sample_one(rng)
+                continue
+            if category not in samplers:
+                samplers[category] = ItemSampler({category: pools[category]}, item_weight=item_weight)
+            records[position] = samplers[category].sample_one(rng)
+
+    retime = bool(changed & {"interval", "rest_time", "workout_length"})
+    rest_time = routine.rest_time
+    updates = []
+    for position, source in enumerate(order):
+        if fixed(position):
+            updates.append(SlotUpdate(source=source, item=None))
+            continue
+        record = records.get(position)
+        if record is None:
+            continue
+        slot = slots[source] if source is not None else None
+        if slot is not None and slot.record == record and \
+                (not retime or (slot.duration == routine.interval and slot.rest == rest_time)):
+            updates.append(SlotUpdate(source=source, item=None))
+        else:
+            updates.append(SlotUpdate(source=source, item=ScheduledItem(spec=record, duration=routine.interval,
+                                                                         rest=rest_time)))
+
+    drawn = Counter(problems.values())
+    LOGGER.info(f"Re-roll: {len(problems)} of {count} slots drawn again"
+                + (f" ({', '.join(f'{reason}: {n}' for reason, n in drawn.most_common())})" if drawn else ""))
+    if len(updates) < count:
+        LOGGER.warning(f"Re-roll: {count - len(updates)} slots could not be filled")
+    return updates
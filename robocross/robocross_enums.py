@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from enum import auto, Enum, unique
+from typing import Iterable
 
 
 @unique
@@ -12,8 +13,33 @@ class AerobicType(Enum):
     recovery = auto()
 
 
+class BitmaskEnum(Enum):
+    """Enum whose members each own one bit of an integer mask, so sets of members can be stored as uint32 columns.
+
+    Members must use auto() values, which start at 1.
+    """
+
+    @property
+    def bit(self) -> int:
+        return 1 << (self.value - 1)
+
+    @classmethod
+    def mask_of(cls, members: Iterable[BitmaskEnum | None]) -> int:
+        """Encode members as a mask. None (unrecognised data) is ignored."""
+        mask = 0
+        for member in members:
+            if member is not None:
+                mask |= member.bit
+        return mask
+
+    @classmethod
+    def from_mask(cls, mask: int) -> tuple[BitmaskEnum, ...]:
+        """Decode a mask into members, in definition order."""
+        return tuple(member for member in cls if mask & member.bit)
+
+
 @unique
-class Equipment(Enum):
+class Equipment(BitmaskEnum):
     band = auto()
     bench = auto()
     bo_staff = auto()
@@ -42,7 +68,7 @@ class RunMode(Enum):
 
 
 @unique
-class Target(Enum):
+class Target(BitmaskEnum):
     arms = auto()
     back = auto()
     chest = auto()
@@ -2,7 +2,6 @@
 from __future__ import annotations
 
 import getpass
-import json
 import logging
 import re
 import sys
@@ -11,20 +10,25 @@ import time
 from datetime import datetime
 from pathlib import Path
 
-from PySide6.QtCore import QSettings, QSize
+from PySide6.QtCore import QSettings, QSize, QThreadPool, QTimer, Qt
 from PySide6.QtGui import QFont, QPixmap, QClipboard
-from PySide6.QtWidgets import QTabWidget, QSplashScreen, QFileDialog, QApplication
+from PySide6.QtWidgets import QTabWidget, QSplashScreen, QFileDialog, QApplication, QMessageBox, QProgressDialog
 
 from core import DEVELOPER, logging_utils, splash_screen_manager, SANS_SERIF_FONT, CODE_FONT
 from core.version_info import VersionInfo
 from core import time_utils
 from core.core_paths import image_path, DATA_DIR
+from core.persistence import atomic_write_json
 from robocross import APP_NAME, REST_PERIOD
+from robocross.media_manifest import update_media_manifest
 from robocross.parameters_widget import ParametersWidget
 from robocross.routine import Routine
+from robocross.reroll import SlotUpdate
+from robocross.routine_builder import BuildResult, RoutineBuildTask
+from robocross.schema import load_session, log_issues
 from robocross.viewer_v2 import ViewerV2
 from robocross.workout import Workout
-from robocross.robocross_enums import Equipment, Intensity, AerobicType, Target
+from robocross.robocross_enums import Equipment, Intensity, AerobicType
 from widgets.generic_widget import GenericWidget
 from widgets.exercise_editor import ExerciseEditor
 
@@ -41,6 +45,8 @@ VERSIONS = (
     VersionInfo(name=APP_NAME, version='2.0.4', codename='Stringfellow Hawk', info='Player v2 with workout images'),
     VersionInfo(name=APP_NAME, version='2.0.5', codename='Poncharello', info='Exercise Editor'),
 )
+REROLL_DELAY = 300  # ms without further parameter changes before the workout is updated
+BUILD_PROGRESS_DELAY = 250  # ms a build runs before its progress dialog shows
 SPLASH_SCREEN = image_path("splashscreen_640.png")
 ROBOCROSS_LOGO = image_path("robocross.png")
 
@@ -82,7 +88,14 @@ class Robocross(GenericWidget):
         self.exercise_editor = ExerciseEditor()
         self.tab_widget.addTab(self.exercise_editor, 'Exercise')
         self.rest_time = 0
+        self.routine_record: dict | None = None  # Seed and parameters of the routine the workout was built from
         self.routine = None
+        self.reroll_timer = QTimer(self)  # Coalesces bursts of parameter changes into one re-roll
+        self.reroll_timer.setSingleShot(True)
+        self.reroll_timer.setInterval(REROLL_DELAY)
+        self.build_task: RoutineBuildTask | None = None  # The build running on the thread pool, if any
+        self.build_progress: QProgressDialog | None = None
+        self.build_rows: list | None = None  # Editor rows the running build's slots were taken from
         self.info = ""
         self.workout_list = []
         self.parameters_widget.info = "Build your workout..."
@@ -94,18 +107,25 @@ class Robocross(GenericWidget):
         self.parameters_widget.load_button_clicked.connect(self.load_button_clicked)
         self.parameters_widget.save_button_clicked.connect(self.save_button_clicked)
         self.parameters_widget.build_button_clicked.connect(self.build_button_clicked)
+        self.parameters_widget.parameters_changed.connect(self.reroll_timer.start)
+        self.reroll_timer.timeout.connect(self.reroll_routine)
         self.parameters_widget.add_exercise_clicked.connect(self.add_exercise_button_clicked)
         self.parameters_widget.copy_to_clipboard_clicked.connect(self.copy_to_clipboard_button_clicked)
         self.parameters_widget.workout_name_changed.connect(self.on_workout_name_changed)
         self.parameters_widget.workout_cycles_changed.connect(self.on_workout_cycles_changed)
         self.parameters_widget.editor_table.workout_list_changed.connect(self.on_workout_list_changed)
+        self.parameters_widget.editor_table.pinned_changed.connect(self._save_temp_workout)
         self.parameters_widget.editor_table.add_exercise_requested.connect(self.add_exercise_button_clicked)
+        self.exercise_editor.catalog_changed.connect(self.parameters_widget.on_catalog_changed)
         self.tab_widget.currentChanged.connect(self.on_tab_changed)
         self.setMinimumWidth(self.minimum_width)
         # ViewerV2 doesn't have separate play/pause buttons on stopwatch - they're in the timer row
         # ViewerV2 doesn't have scroll_widget
         self.resize(self.app_size)
 
+        # Analyse new or changed media in the background, so the player reads its decisions from the manifest
+        QThreadPool.globalInstance().start(update_media_manifest)
+
         # Auto-load the last workout if available
         self._auto_load_last_workout()
 
@@ -127,7 +147,7 @@ class Robocross(GenericWidget):
     @property
     def equipment(self) -> list[Equipment]:
         equipment = list({x.name.replace('_', ' ') for y in self.workout_list \
-                          for x in y.equipment if x is not None})
+                          for x in y.equipment})
         equipment.sort(key=lambda x: x.lower())
         return equipment
 
@@ -153,8 +173,12 @@ class Robocross(GenericWidget):
 
     @routine.setter
     def routine(self, routine: Routine | None):
+        self._set_routine(routine, routine.get_workout_list() if routine else [])
+
+    def _set_routine(self, routine: Routine | None, workout_list: list[Workout]):
+        """Adopt a routine and the workout list already generated from it."""
         self._routine = routine
-        workout_list = routine.get_workout_list() if routine else []
+        self.routine_record = {"seed": routine.seed, "params": routine.params} if routine else None
         self.workout_list = workout_list
         if routine:
             self.rest_time = routine.rest_time
@@ -211,30 +235,20 @@ class Robocross(GenericWidget):
         temp_file_path = DATA_DIR / "_last_workout_temp.json"
 
         # Save the actual workout list
-        workouts_data = []
-        for workout in self.workout_list:
-            workout_dict = {
-                "name": workout.name,
-                "description": workout.description,
-                "equipment": [eq.name for eq in workout.equipment] if workout.equipment else [],
-                "intensity": workout.intensity.name,
-                "aerobic_type": workout.aerobic_type.name,
-                "target": [t.name for t in workout.target if t is not None],
-                "time": workout.time,
-                "sub_workouts": workout.sub_workouts
-            }
-            workouts_data.append(workout_dict)
+        workouts_data = [workout.to_dict() for workout in self.workout_list]
 
         session_data = {
             "workout_name": self.form.workout_name,  # NEW: Save workout name for auto-load
             "workout_cycles": self.form.workout_cycles,  # NEW: Save circuit cycles
             "workouts": workouts_data,
             "rest_time": self.rest_time,
+            "pinned": self.parameters_widget.editor_table.pinned_rows,  # Rows kept when the parameters change
             "saved_at": self.date_time_string
         }
+        if self.routine_record:
+            session_data["routine"] = self.routine_record
 
-        with open(temp_file_path, 'w') as f:
-            json.dump(session_data, f, indent=4)
+        atomic_write_json(temp_file_path, session_data)
 
         # Save this as the last opened workout
         self.settings.setValue(self.last_workout_path_key, str(temp_file_path))
@@ -242,6 +256,7 @@ class Robocross(GenericWidget):
 
     def new_workout_clicked(self):
         """Reset all parameters to start a new workout."""
+        self.cancel_build()
         # Reset form to default values via the actual widgets
         self.form.interval_spin_box.setValue(45)
         self.form.length_spin_box.setValue(10)
@@ -270,89 +285,186 @@ class Robocross(GenericWidget):
         LOGGER.info("New workout started - parameters reset")
 
     def build_button_clicked(self):
-        """Create the routine and populate editor table."""
-        from PySide6.QtWidgets import QProgressDialog
-        from PySide6.QtCore import Qt
-
+        """Build the routine on the thread pool. The editor table is populated when the build finishes."""
         if self.parameters_widget.zero_equipment:
             self.parameters_widget.info = "No equipment selected."
+            return
+
+        self.reroll_timer.stop()
+        self.cancel_build()
+        editor_table = self.parameters_widget.editor_table
+        # Keep the pinned rows and draw the rest again
+        slots = editor_table.get_slots() if editor_table.has_pinned_rows else None
+        task = RoutineBuildTask(self._routine_kwargs(), slots=slots)
+
+        progress = QProgressDialog("Building workout...", "Cancel", 0, 100, self)
+        progress.setWindowTitle("Please Wait")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(BUILD_PROGRESS_DELAY)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        progress.canceled.connect(task.cancel)
+        self.build_progress = progress
+        self._start_build(task)
+        progress.setValue(0)
+
+    def _start_build(self, task: RoutineBuildTask):
+        # Slot updates refer to the editor rows by position: keep the rows as they are until the result arrives
+        editor_table = self.parameters_widget.editor_table
+        editor_table.setEnabled(False)
+        self.build_rows = list(editor_table.rows) if task.slots is not None else None
+        task.signals.progress.connect(self.on_build_progress)
+        task.signals.finished.connect(self.on_build_finished)
+        task.signals.failed.connect(self.on_build_failed)
+        task.signals.cancelled.connect(self.on_build_cancelled)
+        self.build_task = task
+        task.start()
+
+    def cancel_build(self):
+        """Cancel the running build, if any. Its result is ignored if it still arrives."""
+        if self.build_task:
+            self.build_task.cancel()
+        self._end_build()
+
+    def _end_build(self):
+        self.build_task = None
+        self.build_rows = None
+        self.parameters_widget.editor_table.setEnabled(True)
+        if self.build_progress:
+            self.build_progress.close()
+            self.build_progress.deleteLater()
+            self.build_progress = None
+
+    def _is_current_build(self) -> bool:
+        """True if the signal being handled comes from the running build (not a cancelled or replaced one)."""
+        return self.build_task is not None and self.sender() is self.build_task.signals
+
+    def on_build_progress(self, percent: int, stage: str):
+        if self._is_current_build() and self.build_progress:
+            self.build_progress.setLabelText(f"{stage}...")
+            self.build_progress.setValue(percent)
+
+    def on_build_cancelled(self):
+        if self._is_current_build():
+            self._end_build()
+
+    def on_build_failed(self, message: str):
+        if not self._is_current_build():
+            return
+        self._end_build()
+        self.parameters_widget.info = f"Build failed: {message}"
+
+    def on_build_finished(self, result: BuildResult):
+        """Show the built routine in the editor and viewer."""
+        if not self._is_current_build():
+            return
+        task, build_rows = self.build_task, self.build_rows
+        self._end_build()
+        if task.is_cancelled:  # Cancelled after its last check
+            return
+        if build_rows is not None and self.parameters_widget.editor_table.rows != build_rows:
+            # Rows were added or removed outside the table during the build: the updates no longer line up
+            LOGGER.info("Workout changed during the build, result dropped")
+            if task.is_reroll:
+                self.reroll_timer.start()
+            else:
+                self.parameters_widget.info = "Workout changed during the build. Build again to keep pinned rows."
+            return
+        if task.is_reroll:
+            if result.routine.params != task.previous_params:
+                self._apply_slot_updates(result.routine, result.updates)
+                self._save_temp_workout()
+            return
+        LOGGER.info(f"Workout built in {result.elapsed * 1000:.0f} ms")
+        keep_pinned = result.updates is not None
+        if keep_pinned:
+            self._apply_slot_updates(result.routine, result.updates)
         else:
-            # Show progress dialog
-            progress = QProgressDialog("Building workout...", None, 0, 0, self)
-            progress.setWindowTitle("Please Wait")
-            progress.setWindowModality(Qt.WindowModality.WindowModal)
-            progress.setMinimumDuration(0)
-            progress.setCancelButton(None)
-            progress.setValue(0)
-            progress.show()
-
-            # Process events to show the dialog
-            from PySide6.QtWidgets import QApplication
-            QApplication.processEvents()
-
-            try:
-                self.routine = Routine(
-                    interval=self.form.interval,
-                    workout_length=self.form.length,
-                    rest_time=self.form.rest_time,
-                    equipment_filter=self.parameters_widget.equipment_filter,
-                    selected_categories=self.form.selected_categories,
-                    workout_structure=self.form.workout_structure,
-                    category_weights=self.form.category_weights,
-                    warm_up=self.form.warm_up,
-                    cool_down=self.form.cool_down,
-                    target_filter=self.form.selected_targets,
-                )
-
-                # Validate that the combination yields results
-                if not self.workout_list:
-                    from PySide6.QtWidgets import QMessageBox
-                    QMessageBox.warning(
-                        self,
-                        "No Workouts Found",
-                        "The current combination of Exercise Types and Exercise Targets doesn't yield any valid workouts.\n\n"
-                        "Please try:\n"
-                        "• Selecting different exercise types\n"
-                        "• Choosing different exercise targets\n"
-                        "• Checking 'All' in Exercise Targets\n"
-                        "• Adjusting equipment filters"
-                    )
-                    progress.close()
-                    return
+            self._set_routine(result.routine, result.workout_list)
 
-                if self.workout_list:
-                    # Populate editor table
-                    self.parameters_widget.set_workout_list(
-                        self.workout_list,
-                        self.form.rest_time,
-                        self.form.workout_name
-                    )
+        # Validate that the combination yields results
+        if not self.workout_list:
+            QMessageBox.warning(
+                self,
+                "No Workouts Found",
+                "The current combination of Exercise Types and Exercise Targets doesn't yield any valid workouts.\n\n"
+                "Please try:\n"
+                "• Selecting different exercise types\n"
+                "• Choosing different exercise targets\n"
+                "• Checking 'All' in Exercise Targets\n"
+                "• Adjusting equipment filters"
+            )
+            return
 
-                    # ViewerV2 doesn't have stopwatch buttons or scroll_widget
-                    # Display is automatically updated by update_display() call in workout_list setter
+        # Populate editor table
+        if not keep_pinned:
+            self.parameters_widget.set_workout_list(
+                self.workout_list,
+                self.form.rest_time,
+                self.form.workout_name
+            )
+
+        # ViewerV2 doesn't have stopwatch buttons or scroll_widget
+        # Display is automatically updated by update_display() call in workout_list setter
+
+        self.viewer.workout_name = self.form.workout_name or "New Workout"
+        self.viewer.workout_cycles = self.form.workout_cycles  # NEW: Set circuit cycles on viewer
+
+        LOGGER.info(self.workout_report)
+
+        # Save the built workout to a temp file so it can be auto-loaded
+        self._save_temp_workout()
+
+    def _routine_kwargs(self) -> dict:
+        """Routine arguments from the current form and equipment parameters."""
+        return dict(
+            interval=self.form.interval,
+            workout_length=self.form.length,
+            rest_time=self.form.rest_time,
+            equipment_filter=self.parameters_widget.equipment_filter,
+            selected_categories=self.form.selected_categories,
+            workout_structure=self.form.workout_structure,
+            category_weights=self.form.category_weights,
+            warm_up=self.form.warm_up,
+            cool_down=self.form.cool_down,
+            target_filter=self.form.selected_targets,
+            minimise_changeovers=self.form.minimise_changeovers,
+            best_of=self.form.best_of,
+            intensity_profile=self.form.intensity_profile,
+        )
 
-                    self.viewer.workout_name = self.form.workout_name or "New Workout"
-                    self.viewer.workout_cycles = self.form.workout_cycles  # NEW: Set circuit cycles on viewer
+    def _apply_slot_updates(self, routine: Routine, updates: list[SlotUpdate]):
+        """Adopt a routine and apply its slot updates to the editor rows."""
+        self._routine = routine
+        self.routine_record = {"seed": routine.seed, "params": routine.params}
+        self.rest_time = routine.rest_time
+        # Syncs workout_list through workout_list_changed
+        self.parameters_widget.editor_table.apply_slot_updates(updates)
 
-                    LOGGER.info(self.workout_report)
+    def reroll_routine(self):
+        """Update the workout after a parameter change, keeping pinned rows and every row still valid.
 
-                    # Save the built workout to a temp file so it can be auto-loaded
-                    self._save_temp_workout()
-                else:
-                    self.parameters_widget.info = 'No workouts found. Please select more equipment.'
-            finally:
-                progress.close()
+        The re-roll runs on the thread pool like a build; its slot updates are applied when it finishes.
+        """
+        if self.build_task:
+            self.reroll_timer.start()  # Retry once the build has finished
+            return
+        editor_table = self.parameters_widget.editor_table
+        if not self.routine_record or not editor_table.rows or self.parameters_widget.zero_equipment:
+            return  # Not built from parameters (yet): Build creates the workout
+        routine_kwargs = dict(self._routine_kwargs(), seed=self.routine_record["seed"])
+        self._start_build(RoutineBuildTask(routine_kwargs, slots=editor_table.get_slots(),
+                                           previous_params=self.routine_record["params"]))
 
     def add_exercise_button_clicked(self):
         """Show exercise type dialog and add random exercise from selected category."""
         from robocross.exercise_type_dialog import ExerciseTypeDialog
-        from robocross.workout_data import WorkoutData
-        from dataclasses import replace
+        from robocross.catalog_cache import get_catalog
         import random
 
         # Get available categories
-        workout_data = WorkoutData()
-        categories = workout_data.categories
+        catalog = get_catalog()
+        categories = catalog.categories
 
         # Show dialog
         dialog = ExerciseTypeDialog(categories, parent=self)
@@ -361,22 +473,20 @@ class Robocross(GenericWidget):
         if result == ExerciseTypeDialog.DialogCode.Accepted:
             selected_category = dialog.get_selected_category()
             if selected_category:
-                # Get workouts for this category
-                category_workouts = workout_data.get_workouts_by_category(selected_category)
-
-                if category_workouts:
-                    # Pick random workout from category
-                    random_workout = random.choice(category_workouts)
+                # Get exercises for this category
+                category_records = catalog.query(categories=[selected_category])
 
-                    # Create a copy with updated time (don't modify original)
-                    workout_copy = replace(random_workout, time=self.form.interval)
+                if category_records:
+                    # Pick random exercise from category
+                    record = random.choice(category_records)
 
                     # Add to editor table
                     self.parameters_widget.editor_table.add_row(
-                        workout_copy,
-                        self.form.rest_time
+                        record.to_workout(time=self.form.interval),
+                        self.form.rest_time,
+                        pinned=True
                     )
-                    LOGGER.info(f"Added random {selected_category} exercise: {random_workout.name}")
+                    LOGGER.info(f"Added random {selected_category} exercise: {record.name}")
                 else:
                     LOGGER.warning(f"No exercises found for category: {selected_category}")
         else:
@@ -471,19 +581,7 @@ class Robocross(GenericWidget):
             return
 
         if file_path:
-            workouts_data = []
-            for workout in workouts:
-                workout_dict = {
-                    "name": workout.name,
-                    "description": workout.description,
-                    "equipment": [eq.name for eq in workout.equipment if eq is not None] if workout.equipment else [],
-                    "intensity": workout.intensity.name,
-                    "aerobic_type": workout.aerobic_type.name,
-                    "target": [t.name for t in workout.target if t is not None] if workout.target else [],
-                    "time": workout.time,
-                    "sub_workouts": workout.sub_workouts
-                }
-                workouts_data.append(workout_dict)
+            workouts_data = [workout.to_dict() for workout in workouts]
 
             # Calculate average rest time for metadata
             avg_rest = sum(rest_times) // len(rest_times) if rest_times else 30
@@ -494,11 +592,13 @@ class Robocross(GenericWidget):
                 "workouts": workouts_data,
                 "rest_time": avg_rest,
                 "rest_times": rest_times,  # Save individual rest times
+                "pinned": self.parameters_widget.editor_table.pinned_rows,  # Rows kept when the parameters change
                 "saved_at": self.date_time_string
             }
+            if self.routine_record:
+                session_data["routine"] = self.routine_record  # Seed and parameters to regenerate the routine
 
-            with open(file_path, 'w') as f:
-                json.dump(session_data, f, indent=4)
+            atomic_write_json(Path(file_path), session_data)
 
             # Update last workout path so this file auto-loads on next startup
             self.settings.setValue(self.last_workout_path_key, file_path)
@@ -511,64 +611,23 @@ class Robocross(GenericWidget):
         """Load workout and populate editor table."""
         LOGGER.info(f"Loading: {file_path}")
         try:
-            with open(file_path, 'r') as f:
-                session_data = json.load(f)
-
-            workouts_data = session_data.get("workouts", [])
-            loaded_workouts = []
-            loaded_rest_times = []
-            default_rest_time = session_data.get("rest_time", 30)
-            loaded_cycles = session_data.get("workout_cycles", 1)  # NEW: Load circuit cycles
-
-            # Parse workouts and extract rest times
-            i = 0
-            while i < len(workouts_data):
-                workout_dict = workouts_data[i]
-
-                # Skip rest period items (they're stored as separate entries in old format)
-                if workout_dict.get("name") == REST_PERIOD:
-                    i += 1
-                    continue
-
-                # Create workout object
-                equipment_list = [Equipment.__members__.get(eq)
-                                for eq in workout_dict.get("equipment", [])]
-                target_list = [Target.__members__.get(t)
-                              for t in workout_dict.get("target", [])]
-
-                workout = Workout(
-                    name=workout_dict.get("name"),
-                    description=workout_dict.get("description"),
-                    equipment=equipment_list if equipment_list else [],
-                    intensity=Intensity.__members__.get(
-                        workout_dict.get("intensity")),
-                    aerobic_type=AerobicType.__members__.get(
-                        workout_dict.get("aerobic_type")),
-                    target=target_list,
-                    time=workout_dict.get("time"),
-                    sub_workouts=workout_dict.get("sub_workouts"),
-                    energy=workout_dict.get("energy")  # Include calorie burn rate
-                )
-                loaded_workouts.append(workout)
-
-                # Check if next item is a rest period
-                rest_time = default_rest_time
-                if i + 1 < len(workouts_data):
-                    next_workout = workouts_data[i + 1]
-                    if next_workout.get("name") == REST_PERIOD:
-                        rest_time = next_workout.get("time", default_rest_time)
-                        i += 1  # Skip the rest period item
-
-                loaded_rest_times.append(rest_time)
-                i += 1
-
-            # Use rest_times from new format if available
-            rest_times = session_data.get("rest_times")
-            if rest_times:
-                loaded_rest_times = rest_times
+            session = load_session(Path(file_path))
+            log_issues(session.issues, source=Path(file_path).name)
+
+            schedule = session.schedule
+            if not schedule and session.routine:
+                # Sessions may record only the seed and parameters: regenerate the routine from them
+                routine = Routine.from_params(session.routine["params"], seed=session.routine["seed"])
+                routine.get_workout_list()
+                schedule = routine.schedule
+            loaded_workouts = [item.to_workout() for item in schedule]
+            loaded_rest_times = [item.rest for item in schedule]
+            loaded_pinned = list(session.pinned) + [False] * (len(schedule) - len(session.pinned))
+            default_rest_time = session.rest_time
+            loaded_cycles = session.workout_cycles
 
             # Load workout name FIRST
-            workout_name = session_data.get("workout_name", "")
+            workout_name = session.workout_name
             if not workout_name:
                 workout_name = Path(file_path).stem
 
@@ -590,9 +649,8 @@ class Robocross(GenericWidget):
             # Clear and populate editor table
             LOGGER.info(f"Clearing editor table and adding {len(loaded_workouts)} rows...")
             self.parameters_widget.editor_table.clear_rows()
-            for i, workout in enumerate(loaded_workouts):
-                rest = loaded_rest_times[i] if i < len(loaded_rest_times) else default_rest_time
-                self.parameters_widget.editor_table.add_row(workout, rest)
+            for workout, rest, pinned in zip(loaded_workouts, loaded_rest_times, loaded_pinned):
+                self.parameters_widget.editor_table.add_row(workout, rest, pinned=pinned)
 
             # Force layout update
             self.parameters_widget.editor_table.widget.updateGeometry()
@@ -601,6 +659,7 @@ class Robocross(GenericWidget):
 
             # Note: workout_list is automatically updated via on_workout_list_changed signal
             self.rest_time = default_rest_time
+            self.routine_record = session.routine
 
             self.parameters_widget.editor_table.workout_name = workout_name
             self.parameters_widget.update_summary()
@@ -610,6 +669,8 @@ class Robocross(GenericWidget):
 
             self.viewer.workout_name = parse_name_nicely(workout_name)
 
+            self.cancel_build()
+            self.reroll_timer.stop()  # Loading sets the form: the loaded workout is not a parameter change
             LOGGER.info(f"Loaded: {workout_name} ({len(loaded_workouts)} items)")
             self.settings.setValue(self.last_workout_path_key, file_path)
 
@@ -678,8 +739,8 @@ class Robocross(GenericWidget):
         total_rest_seconds = 0
         total_rest_calories = 0
 
-        from robocross.workout_data import WorkoutData
-        workout_data = WorkoutData()
+        from robocross.catalog_cache import get_catalog
+        catalog = get_catalog()
 
         for i, workout in enumerate(full_workout_list):
             # Get exercise name (formatted nicely)
@@ -690,10 +751,11 @@ class Robocross(GenericWidget):
 
             # Calculate calories
             energy = 0
+            record = catalog.get(workout.name)
             if workout.energy is not None:
                 energy = workout.energy
-            elif workout.name in workout_data.data:
-                energy = workout_data.data[workout.name].get("energy", 0)
+            elif record:
+                energy = record.energy or 0
             else:
                 # Fallback based on intensity
                 intensity_energy = {"high": 13, "medium": 9, "low": 6}
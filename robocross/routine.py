@@ -1,12 +1,22 @@
+import json
 import logging
 import math
-import random
+
+from functools import cached_property
 
 from core.logging_utils import get_logger
+from robocross.exercise_catalog import ExerciseRecord
 from robocross.workout_data import WorkoutData
 from robocross import REST_PERIOD, WorkoutType
-from robocross.workout import Workout
-from robocross.robocross_enums import Equipment, Intensity, AerobicType
+from robocross.workout import ScheduledItem, Workout
+from robocross.robocross_enums import Equipment, Intensity, AerobicType, Target
+from robocross.candidate_pools import CandidatePools
+from robocross.changeover import minimise_changeovers
+from robocross.constraints import DEFAULT_REPEAT_SPACING, BalancedSolver, RoutineConstraints, default_target_quotas
+from robocross.intensity_profile import DEFAULT_PROFILE, ProfilePlanner, profile_curve
+from robocross.optimiser import Objective, best_of_n
+from robocross.reroll import Slot, SlotUpdate, reroll_slots
+from robocross.sampling import ItemSampler, RandomStreams, choice, new_seed, shuffle
 
 LOGGER = get_logger(name=__name__, level=logging.DEBUG)
 
@@ -15,18 +25,33 @@ class Routine:
     def __init__(self, interval: int = 120, workout_length: int = 35, rest_time: int = 30, nope_list: list = (),
                  equipment_filter: list[Equipment] = (), selected_categories: list[str] = None,
                  workout_structure: str = "Random", category_weights: dict[str, int] = None,
-                 warm_up: bool = False, cool_down: bool = False, target_filter: list = None):
+                 warm_up: bool = False, cool_down: bool = False, target_filter: list = None,
+                 exercise_weights: dict[str, float] = None, seed: int = None,
+                 min_repeat_spacing: int = DEFAULT_REPEAT_SPACING, max_intensity: Intensity = None,
+                 max_consecutive_high: int = 2, minimise_changeovers: bool = False, best_of: int = 1,
+                 objective: dict[str, float] = None, intensity_profile: str = DEFAULT_PROFILE):
         """
         Workout Routine
         :param interval: seconds
         :param workout_length: minutes
         :param rest_time: seconds
         :param selected_categories: list of category names (e.g., ['cardio', 'strength', 'combat', 'flexibility'])
-        :param workout_structure: 'Random' or 'Sequence'
+        :param workout_structure: 'Random', 'Sequence', 'Balanced' or 'Profile'
         :param category_weights: dict mapping category name to weight percentage (0-100), if None uses equal weighting
         :param warm_up: if True, force first exercise to be cardio
         :param cool_down: if True, force last exercise to be flexibility
         :param target_filter: list of Target enums to filter exercises by body targets (e.g., [Target.legs, Target.core])
+        :param exercise_weights: dict mapping exercise name to its relative weight within its category (default 1)
+        :param seed: random seed; the same parameters and seed build the same routine from the same catalog.
+                     A fresh seed is drawn if None
+        :param min_repeat_spacing: Balanced and Profile, slots between two uses of the same exercise
+        :param max_intensity: Balanced only, most intense exercises allowed (None for any)
+        :param max_consecutive_high: longest run of high intensity exercises (None for any). A hard limit for
+                                     Balanced, a scored penalty for best_of
+        :param minimise_changeovers: reorder the exercises to minimise equipment changes (Random and Sequence)
+        :param best_of: Random and Sequence, draw this many candidate routines and keep the best scoring one
+        :param objective: weights of the best_of score terms (see robocross.optimiser.Objective), defaults if None
+        :param intensity_profile: Profile only, intensity curve to follow (see robocross.intensity_profile.PROFILES)
         """
         self.interval = interval
         self.workout_length = workout_length
@@ -39,16 +64,74 @@ class Routine:
         self.warm_up = warm_up
         self.cool_down = cool_down
         self.target_filter = target_filter if target_filter else []
+        self.exercise_weights = exercise_weights or {}
+        self.seed = new_seed() if seed is None else seed
+        self.min_repeat_spacing = min_repeat_spacing
+        self.max_intensity = max_intensity
+        self.max_consecutive_high = max_consecutive_high
+        self.minimise_changeovers = minimise_changeovers
+        self.best_of = max(1, best_of)
+        self.objective = Objective(**objective) if objective else Objective()
+        self.intensity_profile = intensity_profile
         self.workout_data: WorkoutData = WorkoutData(
             nope_list=self.nope_list,
             equipment_filter=self.equipment_filter,
             selected_categories=self.selected_categories,
             target_filter=self.target_filter
         )
+        # Every strategy draws from these, resolved once
+        self.pools: CandidatePools = CandidatePools.build(self.workout_data, self.selected_categories,
+                                                          warm_up=self.warm_up, cool_down=self.cool_down)
+        self.schedule: list[ScheduledItem] = []
 
     def __repr__(self) -> str:
         return f"Routine | interval: {self.interval}, workout_length: {self.workout_length}, rest_time: {self.rest_time}"
 
+    @property
+    def params(self) -> dict:
+        """JSON-serializable parameters, as accepted by from_params()."""
+        return {
+            "interval": self.interval,
+            "workout_length": self.workout_length,
+            "rest_time": self.minimum_rest_time,
+            "nope_list": list(self.nope_list),
+            "equipment_filter": [x.name for x in self.equipment_filter],
+            "selected_categories": list(self.selected_categories),
+            "workout_structure": self.workout_structure,
+            "category_weights": dict(self.category_weights),
+            "warm_up": self.warm_up,
+            "cool_down": self.cool_down,
+            "target_filter": [x.name for x in self.target_filter],
+            "exercise_weights": dict(self.exercise_weights),
+            "min_repeat_spacing": self.min_repeat_spacing,
+            "max_intensity": self.max_intensity.name if self.max_intensity else None,
+            "max_consecutive_high": self.max_consecutive_high,
+            "minimise_changeovers": self.minimise_changeovers,
+            "best_of": self.best_of,
+            "objective": self.objective.as_dict(),
+            "intensity_profile": self.intensity_profile,
+        }
+
+    @property
+    def cache_key(self) -> tuple[str, int]:
+        """(parameters, seed) identifying the routine this builds."""
+        return json.dumps(self.params, sort_keys=True), self.seed
+
+    @classmethod
+    def from_params(cls, params: dict, seed: int = None) -> "Routine":
+        """Create a routine from parameters recorded with Routine.params."""
+        params = dict(params)
+        params["equipment_filter"] = [Equipment[x] for x in params.get("equipment_filter", ())]
+        params["target_filter"] = [Target[x] for x in params.get("target_filter", ())]
+        if params.get("max_intensity"):
+            params["max_intensity"] = Intensity[params["max_intensity"]]
+        return cls(**params, seed=seed)
+
+    @property
+    def streams(self) -> RandomStreams:
+        """Random streams for one build. Every build starts the streams afresh, so rebuilding gives the same routine."""
+        return RandomStreams(self.seed)
+
     @property
     def workout_count(self) -> int:
         """Number of workout items."""
@@ -71,81 +154,74 @@ class Routine:
             for i, cat in enumerate(self.selected_categories)
         }
 
-    def weighted_random_choice(self, workouts_by_category: dict) -> Workout:
-        """Select workout using probability weights."""
-        # Build weighted list (category repeated by weight value)
-        weighted_categories = []
-        for category, weight in self.category_weights.items():
-            if category in workouts_by_category and workouts_by_category[category]:
-                weighted_categories.extend([category] * weight)
+    @cached_property
+    def exercise_sampler(self) -> ItemSampler[ExerciseRecord] | None:
+        """Sampler drawing exercises by category weight, then exercise weight. None if no exercises match."""
+        if not any(self.pools.by_category.values()):
+            return None
+        return ItemSampler(self.pools.by_category, category_weights=self.category_weights,
+                           item_weight=self.exercise_weight)
 
-        if not weighted_categories:
-            # Fallback to uniform selection
-            all_workouts = [w for workouts in workouts_by_category.values() for w in workouts]
-            return random.choice(all_workouts) if all_workouts else None
-
-        # Select category by weight, then random workout from that category
-        category = random.choice(weighted_categories)
-        return random.choice(workouts_by_category[category])
+    def exercise_weight(self, record: ExerciseRecord) -> float:
+        """Relative weight of an exercise within its category."""
+        return self.exercise_weights.get(record.name, 1.0)
 
     @property
     def cardio_strength_mix(self) -> list[Workout]:
         """Build a workout based on alternating cardio and strength AerobicType values."""
+        rng = self.streams.stream("exercises")
         workout_items = []
         for i in range(self.workout_count):
-            item_list = self.workout_data.cardio_workout_items if i % 2 == 0 else self.workout_data.strength_workout_items
+            category = AerobicType.cardio.name if i % 2 == 0 else AerobicType.strength.name
+            item_list = self.pools.category(category)
             if not item_list:
                 return []
-            workout_items.append(random.choice(item_list))
+            workout_items.append(choice(rng, item_list))
         return self.build_routine(workout_items) if workout_items else None
 
     @property
     def cardio_workout(self) -> list[Workout]:
-        if self.workout_data.cardio_workout_items:
-            return self.build_routine(
-                [random.choice(self.workout_data.cardio_workout_items) for _ in range(self.workout_count)])
+        records = self.pools.category(AerobicType.cardio.name)
+        if records:
+            rng = self.streams.stream("exercises")
+            return self.build_routine([choice(rng, records) for _ in range(self.workout_count)])
         return []
 
     @property
     def strength_workout(self) -> list[Workout]:
-        if self.workout_data.strength_workout_items:
-            return self.build_routine(
-                [random.choice(self.workout_data.strength_workout_items) for _ in range(self.workout_count)])
+        records = self.pools.category(AerobicType.strength.name)
+        if records:
+            rng = self.streams.stream("exercises")
+            return self.build_routine([choice(rng, records) for _ in range(self.workout_count)])
         return []
 
+    def _warm_up_cool_down(self, streams: RandomStreams, slot_count: int) -> dict[int, ExerciseRecord]:
+        """Warm up (cardio) and cool down (flexibility) records by slot position, for the enabled options."""
+        records = {}
+        if self.warm_up and slot_count and self.pools.warm_up:
+            records[0] = choice(streams.stream("warm_up"), self.pools.warm_up)
+            LOGGER.info("Warm up: First exercise set to cardio")
+        if self.cool_down and slot_count and self.pools.cool_down:
+            records[slot_count - 1] = choice(streams.stream("cool_down"), self.pools.cool_down)
+            LOGGER.info("Cool down: Last exercise set to flexibility")
+        return records
+
+    def _apply_warm_up_cool_down(self, workout_items: list[ExerciseRecord], streams: RandomStreams):
+        """Force the first exercise to be cardio (warm up) and the last to be flexibility (cool down)."""
+        for position, record in self._warm_up_cool_down(streams, len(workout_items)).items():
+            workout_items[position] = record
+
     @property
     def random_workout(self) -> list[Workout]:
         """Build workout with weighted probability selection."""
-        if not self.workout_data.workouts:
+        if self.exercise_sampler is None:
             return []
 
-        # Group workouts by category
-        by_category = {
-            cat: self.workout_data.get_workouts_by_category(cat)
-            for cat in self.selected_categories
-        }
-        by_category = {k: v for k, v in by_category.items() if v}
+        # Draw every slot in one batch using weighted selection
+        streams = self.streams
+        workout_items = self.exercise_sampler.sample(self.workout_count, rng=streams.stream("exercises"))
 
-        # Build workout using weighted selection
-        workout_items = [
-            self.weighted_random_choice(by_category)
-            for _ in range(self.workout_count)
-        ]
-        workout_items = [w for w in workout_items if w]  # Filter None
-
-        # Apply warm up (force first exercise to be cardio)
-        if self.warm_up and workout_items:
-            cardio_workouts = self.workout_data.get_all_workouts_by_category('cardio')
-            if cardio_workouts:
-                workout_items[0] = random.choice(cardio_workouts)
-                LOGGER.info("Warm up: First exercise set to cardio")
-
-        # Apply cool down (force last exercise to be flexibility)
-        if self.cool_down and workout_items:
-            flexibility_workouts = self.workout_data.get_all_workouts_by_category('flexibility')
-            if flexibility_workouts:
-                workout_items[-1] = random.choice(flexibility_workouts)
-                LOGGER.info("Cool down: Last exercise set to flexibility")
+        self._apply_warm_up_cool_down(workout_items, streams)
 
         return self.build_routine(workout_items) if workout_items else []
 
@@ -156,32 +232,70 @@ class Routine:
             return []
 
         # Create simple repeating cycle (ignore weighting)
-        category_cycle = self.selected_categories.copy()
-        random.shuffle(category_cycle)  # Randomize the order once
+        streams = self.streams
+        category_cycle = list(self.selected_categories)
+        shuffle(streams.stream("sequence"), category_cycle)  # Randomize the order once
 
         LOGGER.info(f"Category sequence: {' → '.join(category_cycle)} (repeating)")
 
+        rng = streams.stream("exercises")
         workout_items = []
         for i in range(self.workout_count):
             category = category_cycle[i % len(category_cycle)]
-            category_workouts = self.workout_data.get_workouts_by_category(category)
+            category_workouts = self.pools.category(category)
             if category_workouts:
-                workout_items.append(random.choice(category_workouts))
-
-        # Apply warm up (force first exercise to be cardio)
-        if self.warm_up and workout_items:
-            cardio_workouts = self.workout_data.get_all_workouts_by_category('cardio')
-            if cardio_workouts:
-                workout_items[0] = random.choice(cardio_workouts)
-                LOGGER.info("Warm up: First exercise set to cardio")
-
-        # Apply cool down (force last exercise to be flexibility)
-        if self.cool_down and workout_items:
-            flexibility_workouts = self.workout_data.get_all_workouts_by_category('flexibility')
-            if flexibility_workouts:
-                workout_items[-1] = random.choice(flexibility_workouts)
-                LOGGER.info("Cool down: Last exercise set to flexibility")
+                workout_items.append(choice(rng, category_workouts))
+
+        self._apply_warm_up_cool_down(workout_items, streams)
+
+        return self.build_routine(workout_items) if workout_items else []
+
+    @property
+    def optimised_workout(self) -> list[Workout]:
+        """Build the best of best_of candidate routines (Random or Sequence), scored by the objective."""
+        result = best_of_n(self, self.best_of, objective=self.objective)
+        if result is None:
+            return []
+        LOGGER.info(f"Best of {result.candidates}: score {result.score:.3f} {result.terms}")
+        return self.build_routine(result.records)
+
+    @property
+    def constraints(self) -> RoutineConstraints:
+        """Constraints for the Balanced structure, with a coverage quota for each selected target."""
+        return RoutineConstraints(
+            min_repeat_spacing=self.min_repeat_spacing,
+            max_intensity=self.max_intensity,
+            max_consecutive_high=self.max_consecutive_high,
+            target_quotas=default_target_quotas(self.target_filter, self.workout_count),
+        )
 
+    @property
+    def balanced_workout(self) -> list[Workout]:
+        """Build workout with the constraint solver: spaced repeats, balanced targets and capped intensity."""
+        pool = self.pools.combined
+        if not pool:
+            return []
+        streams = self.streams
+        # Drawn first and fixed, so the solver spaces repeats and intensity runs around them
+        fixed = self._warm_up_cool_down(streams, self.workout_count)
+        solver = BalancedSolver(pool, category_weights=self.category_weights, constraints=self.constraints,
+                                fixed_records=list(fixed.values()))
+        workout_items = solver.solve(self.workout_count, rng=streams.stream("exercises"), fixed=fixed)
+        return self.build_routine(workout_items) if workout_items else []
+
+    @property
+    def profile_planner(self) -> ProfilePlanner:
+        """Planner for the Profile structure."""
+        return ProfilePlanner(self.pools.by_category, category_weights=self.category_weights,
+                              item_weight=self.exercise_weight, min_repeat_spacing=self.min_repeat_spacing)
+
+    @property
+    def profile_workout(self) -> list[Workout]:
+        """Build workout following the intensity profile's curve over the session."""
+        streams = self.streams
+        targets = profile_curve(self.intensity_profile, self.workout_count)
+        fixed = self._warm_up_cool_down(streams, self.workout_count)
+        workout_items = self.profile_planner.solve(targets, rng=streams.stream("exercises"), fixed=fixed)
         return self.build_routine(workout_items) if workout_items else []
 
     @property
@@ -197,43 +311,87 @@ class Routine:
                     aerobic_type=AerobicType.recovery, target=[], time=5),
         ]
 
-    def build_routine(self, workouts: list[Workout]):
-        if workouts:
-            workout_list = []
-            rest_period = Workout(
-                name=REST_PERIOD,
-                description="Take a break",
-                equipment=[],
-                intensity=Intensity.low,
-                aerobic_type=AerobicType.recovery,
-                target=[],
-                time=self.rest_time,
-            )
-            for workout in workouts:
-                workout.time = self.interval
-                workout_list.append(workout)
-                workout_list.append(rest_period)
-            return workout_list
-        return []
+    @staticmethod
+    def rest_period(time: int) -> Workout:
+        return Workout(
+            name=REST_PERIOD,
+            description="Take a break",
+            equipment=[],
+            intensity=Intensity.low,
+            aerobic_type=AerobicType.recovery,
+            target=[],
+            time=time,
+        )
+
+    def order_stations(self, records: list[ExerciseRecord]) -> list[ExerciseRecord]:
+        """Reorder the records to minimise equipment changes, if enabled.
+
+        Warm up and cool down stay in place and Sequence keeps its category pattern. Balanced routines are left in
+        the solver's order, which already honours the repeat spacing and intensity run constraints, and Profile
+        routines in the order of their intensity curve.
+        """
+        if not self.minimise_changeovers or self.workout_structure in ("Balanced", "Profile"):
+            return records
+        return minimise_changeovers(
+            records,
+            equipment=lambda record: record.equipment,
+            category=lambda record: record.category,
+            pin_first=self.warm_up,
+            pin_last=self.cool_down,
+            keep_category_pattern=self.workout_structure == "Sequence",
+            key=lambda record: record.index,
+        )
+
+    def build_schedule(self, records: list[ExerciseRecord]) -> list[ScheduledItem]:
+        """Schedule records at the routine's interval and rest time. Slots reference the shared catalog records."""
+        rest_time = self.rest_time
+        return [ScheduledItem(spec=record, duration=self.interval, rest=rest_time) for record in records]
+
+    def build_routine(self, records: list[ExerciseRecord]) -> list[Workout]:
+        """Schedule the records and expand the schedule into workouts followed by rest periods.
+
+        Every slot gets its own Workout and rest period, so editing one slot's duration never affects another,
+        even when the same exercise is picked more than once.
+        """
+        self.schedule = self.build_schedule(self.order_stations(records))
+        workout_list = []
+        for item in self.schedule:
+            workout_list.append(item.to_workout())
+            workout_list.append(self.rest_period(time=item.rest))
+        return workout_list
+
+    def reroll(self, slots: list[Slot], previous_params: dict = None, rebuild: bool = False) -> list[SlotUpdate]:
+        """Update an existing schedule to this routine's parameters, drawing again only the slots they invalidate.
+
+        Pinned slots are kept as they are. See robocross.reroll for which parameters invalidate which slots.
+        """
+        return reroll_slots(self, slots, previous_params=previous_params, rebuild=rebuild)
 
     def get_workout_list(self, workout_type: WorkoutType = None) -> list[Workout]:
         """Get workout list by workout structure (Random or Sequence)."""
         if workout_type:
-            # Legacy support for old workout_type parameter
-            workout_list = {
-                WorkoutType.cardio: self.cardio_workout,
-                WorkoutType.strength: self.strength_workout,
-                WorkoutType.cardio_strength: self.cardio_strength_mix,
-                WorkoutType.random: self.random_workout,
-                WorkoutType.test: self.test_workout,
-            }[workout_type]
-            return workout_list
+            # Legacy support for old workout_type parameter. Only the requested structure is built, so the schedule
+            # is the one returned
+            builders = {
+                WorkoutType.cardio: lambda: self.cardio_workout,
+                WorkoutType.strength: lambda: self.strength_workout,
+                WorkoutType.cardio_strength: lambda: self.cardio_strength_mix,
+                WorkoutType.random: lambda: self.random_workout,
+                WorkoutType.test: lambda: self.test_workout,
+            }
+            return builders[workout_type]()
 
         # New workflow_structure based routing
+        if self.best_of > 1 and self.workout_structure in ("Random", "Sequence"):
+            return self.optimised_workout
         if self.workout_structure == "Random":
             return self.random_workout
         elif self.workout_structure == "Sequence":
             return self.sequence_workout
+        elif self.workout_structure == "Balanced":
+            return self.balanced_workout
+        elif self.workout_structure == "Profile":
+            return self.profile_workout
         else:
             LOGGER.warning(f"Unknown workout structure: {self.workout_structure}")
             return []
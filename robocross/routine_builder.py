@@ -0,0 +1,149 @@
+"""Routine building off the GUI thread.
+
+build_routine() does the slow part of a Build, or of a re-roll after a parameter change: loading the catalog, resolving
+the candidate pools and generating the routine (or updating the existing slots). It reports progress and checks for cancellation between those stages. RoutineBuildTask runs it on a
+QThreadPool and delivers the outcome through RoutineBuildSignals. The signals object lives on the GUI thread, so Qt
+queues every emit from the worker to the GUI thread, where only the final editor and viewer update happens. A started
+task keeps itself alive until its outcome (finished, failed or cancelled) has been delivered, so the GUI can drop a
+cancelled build while its worker is still running.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+
+from typing import Callable, NamedTuple, Sequence
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from core.logging_utils import get_logger
+from robocross.catalog_cache import get_catalog
+from robocross.reroll import Slot, SlotUpdate
+from robocross.routine import Routine
+from robocross.workout import Workout
+
+LOGGER = get_logger(name=__name__, level=logging.INFO)
+
+BUILD_STAGES = ("Loading exercise catalog", "Resolving exercise pools", "Generating routine")
+
+
+class BuildCancelled(Exception):
+    """The build was cancelled before it finished."""
+
+
+class BuildResult(NamedTuple):
+    routine: Routine
+    workout_list: list[Workout]  # Workouts and rest periods of a fresh build, empty for a re-roll
+    updates: list[SlotUpdate] | None  # Updated slots if existing slots were re-rolled, None for a fresh build
+    elapsed: float  # seconds
+
+
+def build_routine(routine_kwargs: dict, slots: Sequence[Slot] | None = None, previous_params: dict | None = None,
+                  progress: Callable[[int, str], None] | None = None,
+                  is_cancelled: Callable[[], bool] | None = None) -> BuildResult:
+    """Build a routine, reporting progress between stages.
+
+    Args:
+        routine_kwargs (dict): Routine constructor arguments.
+        slots (Sequence[Slot] | None): Existing slots to rebuild around (pinned slots are kept), None to build afresh.
+        previous_params (dict | None): Routine.params the slots were built with. If given, only the slots the new
+                                       parameters invalidate are drawn again, otherwise every unpinned slot is.
+        progress (Callable[[int, str], None] | None): Called with (percent, stage) as each stage starts.
+        is_cancelled (Callable[[], bool] | None): Polled between stages.
+
+    Returns:
+        BuildResult: The routine and its workouts (or slot updates).
+
+    Raises:
+        BuildCancelled: is_cancelled() returned True.
+    """
+    start = time.perf_counter()
+
+    def stage(index: int) -> None:
+        if is_cancelled and is_cancelled():
+            raise BuildCancelled
+        if progress and index < len(BUILD_STAGES):
+            progress(index * 100 // len(BUILD_STAGES), BUILD_STAGES[index])
+
+    stage(0)
+    get_catalog()
+    stage(1)
+    routine = Routine(**routine_kwargs)
+    stage(2)
+    if slots is None:
+        workout_list, updates = routine.get_workout_list(), None
+    else:
+        workout_list = []
+        updates = routine.reroll(list(slots), previous_params=previous_params, rebuild=previous_params is None)
+    stage(len(BUILD_STAGES))
+    if progress:
+        progress(100, "Done")
+    elapsed = time.perf_counter() - start
+    LOGGER.debug(f"Routine built in {elapsed * 1000:.1f} ms")
+    return BuildResult(routine=routine, workout_list=workout_list, updates=updates, elapsed=elapsed)
+
+
+class RoutineBuildSignals(QObject):
+    progress = Signal(int, str)  # percent, stage
+    finished = Signal(object)  # BuildResult
+    failed = Signal(str)  # error message
+    cancelled = Signal()
+
+
+class RoutineBuildTask(QRunnable):
+    """Builds a routine on a thread pool. Create it on the GUI thread, so its signals are delivered there."""
+
+    _running: set[RoutineBuildTask] = set()  # Started tasks whose outcome has not been delivered yet
+
+    def __init__(self, routine_kwargs: dict, slots: Sequence[Slot] | None = None, previous_params: dict | None = None):
+        super().__init__()
+        self.setAutoDelete(False)  # Owned by Python: kept in _running until its outcome is delivered
+        self.routine_kwargs = dict(routine_kwargs)
+        self.slots = list(slots) if slots is not None else None
+        self.previous_params = previous_params
+        self.signals = RoutineBuildSignals()
+        self._cancelled = threading.Event()
+
+    def __repr__(self) -> str:
+        kind = "build" if self.slots is None else "rebuild" if self.previous_params is None else "re-roll"
+        return f"RoutineBuildTask | {kind}"
+
+    @property
+    def is_reroll(self) -> bool:
+        """True if the task updates existing slots to changed parameters rather than building."""
+        return self.previous_params is not None
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """Ask the build to stop at the next stage. Thread safe."""
+        self._cancelled.set()
+
+    def start(self, pool: QThreadPool | None = None) -> None:
+        """Run on a thread pool, the global one by default.
+
+        Connect the signals first: the task releases itself after the other receivers of its outcome have run.
+        """
+        RoutineBuildTask._running.add(self)
+        for signal in (self.signals.finished, self.signals.failed, self.signals.cancelled):
+            signal.connect(self._release)
+        (pool or QThreadPool.globalInstance()).start(self)
+
+    def _release(self, *_) -> None:
+        RoutineBuildTask._running.discard(self)
+
+    def run(self) -> None:
+        try:
+            result = build_routine(self.routine_kwargs, slots=self.slots, previous_params=self.previous_params,
+                                   progress=self.signals.progress.emit, is_cancelled=self._cancelled.is_set)
+        except BuildCancelled:
+            LOGGER.info("Routine build cancelled")
+            self.signals.cancelled.emit()
+        except Exception as exception:  # Reported to the GUI thread rather than lost with the worker
+            LOGGER.exception("Routine build failed")
+            self.signals.failed.emit(str(exception))
+        else:
+            self.signals.finished.emit(result)
@@ -0,0 +1,172 @@
+"""Seeded random streams and weighted sampling with alias tables.
+
+Every random decision is drawn from a named stream derived from one integer seed (NumPy SeedSequence spawning), so
+a result is reproducible from its parameters and seed, and adding draws to one stream never shifts another.
+
+Vose's alias method turns a discrete distribution into two tables in O(n) so that every draw is O(1): pick a column
+uniformly, then keep it or take its alias with one biased coin flip. A batch of draws is two vectorised random calls
+and one select, with no per-draw Python work.
+"""
+from __future__ import annotations
+
+import secrets
+import zlib
+
+from typing import Callable, Generic, Mapping, MutableSequence, Sequence, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+SEED_BITS = 53  # Seeds stay exact in JSON readers that store numbers as doubles
+
+
+def new_seed() -> int:
+    """A fresh random seed, small enough to be stored exactly as a JSON number."""
+    return secrets.randbits(SEED_BITS)
+
+
+def default_rng() -> np.random.Generator:
+    """A fresh, unseeded random generator."""
+    return np.random.default_rng()
+
+
+def spawn_seeds(seed: int, count: int) -> list[int]:
+    """Derive independent child seeds, e.g. one per routine in a batch or per worker process.
+
+    Args:
+        seed (int): Parent seed.
+        count (int): Number of child seeds.
+
+    Returns:
+        list[int]: The same child seeds for the same parent seed.
+    """
+    children = np.random.SeedSequence(seed).spawn(count)
+    return [int(child.generate_state(1, dtype=np.uint64)[0]) >> (64 - SEED_BITS) for child in children]
+
+
+class RandomStreams:
+    """Independent named random streams derived from one seed."""
+
+    def __init__(self, seed: int):
+        self.seed = seed
+
+    def __repr__(self) -> str:
+        return f"RandomStreams | seed: {self.seed}"
+
+    def stream(self, name: str) -> np.random.Generator:
+        """A new generator for a named stream, starting from the same state every time it is requested."""
+        key = zlib.crc32(name.encode("utf-8"))
+        return np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=(key,)))
+
+
+def choice(rng: np.random.Generator, items: Sequence[T]) -> T:
+    """Pick one item uniformly (NumPy's Generator.choice would turn sequences of tuples into arrays)."""
+    return items[int(rng.integers(len(items)))]
+
+
+def shuffle(rng: np.random.Generator, items: MutableSequence) -> None:
+    """Shuffle a list in place."""
+    items[:] = [items[i] for i in rng.permutation(len(items)).tolist()]
+
+
+class AliasSampler:
+    """Draws indices 0..n-1 with probability proportional to their weights."""
+
+    def __init__(self, weights: Sequence[float], rng: np.random.Generator | None = None):
+        """Build the alias table.
+
+        Args:
+            weights (Sequence[float]): Non-negative weights, at least one positive.
+            rng (np.random.Generator | None): Default generator for draws. A fresh generator if None.
+        """
+        count = len(weights)
+        total = float(sum(weights))
+        if not count or total <= 0 or any(weight < 0 for weight in weights):
+            raise ValueError("Weights must be non-negative with a positive total")
+
+        probability = [weight * count / total for weight in weights]
+        alias = list(range(count))
+        small = [i for i, p in enumerate(probability) if p < 1.0]
+        large = [i for i, p in enumerate(probability) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            alias[less] = more
+            probability[more] -= 1.0 - probability[less]
+            (small if probability[more] < 1.0 else large).append(more)
+        for i in small + large:  # Only rounding error left
+            probability[i] = 1.0
+
+        self.rng = rng or default_rng()
+        self.probability = np.array(probability, dtype=np.float64)
+        self.alias = np.array(alias, dtype=np.intp)
+
+    def __len__(self) -> int:
+        return len(self.alias)
+
+    def __repr__(self) -> str:
+        return f"AliasSampler | outcomes: {len(self)}"
+
+    def sample_one(self, rng: np.random.Generator | None = None) -> int:
+        """Draw one index, from rng if given, else from the sampler's own generator."""
+        rng = rng or self.rng
+        column = int(rng.integers(len(self.alias)))
+        return column if rng.random() < self.probability[column] else int(self.alias[column])
+
+    def sample(self, n: int, rng: np.random.Generator | None = None) -> np.ndarray:
+        """Draw n indices in one batch."""
+        rng = rng or self.rng
+        columns = rng.integers(len(self.alias), size=n)
+        return np.where(rng.random(n) < self.probability[columns], columns, self.alias[columns])
+
+
+class ItemSampler(Generic[T]):
+    """Draws items from category pools, choosing the category by weight and then an item by its own weight.
+
+    The two stages are folded into one alias table over all items, so a draw costs the same however many
+    categories there are.
+    """
+
+    def __init__(self, pools: Mapping[str, Sequence[T]], category_weights: Mapping[str, float] | None = None,
+                 item_weight: Callable[[T], float] | None = None, rng: np.random.Generator | None = None):
+        """Build the sampler.
+
+        Args:
+            pools (Mapping[str, Sequence[T]]): Items by category. Empty pools are ignored.
+            category_weights (Mapping[str, float] | None): Relative category weights. If None, or no non-empty pool
+                                                           has a positive weight, every item is equally likely.
+            item_weight (Callable[[T], float] | None): Relative weight of an item within its category, 1 if None.
+            rng (np.random.Generator | None): Default generator for draws. A fresh generator if None.
+        """
+        pools = {category: items for category, items in pools.items() if items}
+        if not pools:
+            raise ValueError("No items to sample from")
+        if category_weights and any(category_weights.get(category, 0) > 0 for category in pools):
+            category_weights = {category: category_weights.get(category, 0) for category in pools}
+        else:
+            category_weights = {category: len(items) for category, items in pools.items()}
+
+        self.items: list[T] = []
+        weights = []
+        for category, items in pools.items():
+            local_weights = [item_weight(item) for item in items] if item_weight else [1.0] * len(items)
+            local_total = sum(local_weights)
+            if local_total <= 0:
+                continue
+            self.items.extend(items)
+            weights.extend(category_weights[category] * weight / local_total for weight in local_weights)
+        self.sampler = AliasSampler(weights, rng=rng)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __repr__(self) -> str:
+        return f"ItemSampler | items: {len(self)}"
+
+    def sample_one(self, rng: np.random.Generator | None = None) -> T:
+        return self.items[self.sampler.sample_one(rng)]
+
+    def sample(self, n: int, rng: np.random.Generator | None = None) -> list[T]:
+        """Draw n items in one batch."""
+        items = self.items
+        return [items[i] for i in self.sampler.sample(n, rng).tolist()]
@@ -0,0 +1,310 @@
+"""Validation and normalisation of catalog and session files.
+
+Each file is checked in a single pass. Enum names are resolved once, problems are reported with their location
+(e.g. "cardio/burpees/target[1]"), and the result is normalised so that consumers can trust it:
+
+- Catalog entries without a string description or with an unknown intensity are dropped. Unknown equipment and
+  target names are removed from their lists, and an invalid energy value is removed.
+- Session workouts without a name, a whole number of seconds, a known intensity and a known aerobic type are dropped.
+  Unknown equipment and target names are removed. Rest times and pinned flags (rows kept when the routine
+  parameters change), one per workout in the file, are matched to the workouts that remain.
+
+Verdicts are cached by content hash, so an unchanged file is only validated once per process.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from core.logging_utils import get_logger
+from robocross import REST_PERIOD
+from robocross.exercise_catalog import ExerciseRecord
+from robocross.robocross_enums import AerobicType, Equipment, Intensity, Target
+from robocross.workout import ScheduledItem
+
+LOGGER = get_logger(name=__name__, level=logging.INFO)
+
+DEFAULT_REST_TIME = 30
+VERDICT_CACHE_SIZE = 32
+
+
+class ValidationIssue(NamedTuple):
+    location: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.location}: {self.message}"
+
+
+class CatalogValidation(NamedTuple):
+    data: dict  # normalised hierarchical data {category: {exercise name: exercise data}}
+    issues: tuple[ValidationIssue, ...]
+
+
+class SessionValidation(NamedTuple):
+    workout_name: str
+    workout_cycles: int
+    rest_time: int
+    schedule: tuple[ScheduledItem, ...]  # one item per workout, rest periods folded into ScheduledItem.rest
+    pinned: tuple[bool, ...]  # per schedule item, True if the row is kept when the routine parameters change
+    routine: dict | None  # {"seed": int, "params": dict} the workouts were generated from (see Routine.params)
+    issues: tuple[ValidationIssue, ...]
+
+
+_VERDICTS: OrderedDict[tuple[str, str], CatalogValidation | SessionValidation] = OrderedDict()
+
+
+def _cached(kind: str, content_hash: str | None, validate) -> Any:
+    if content_hash is None:
+        return validate()
+    key = (kind, content_hash)
+    verdict = _VERDICTS.get(key)
+    if verdict is None:
+        verdict = _VERDICTS[key] = validate()
+        if len(_VERDICTS) > VERDICT_CACHE_SIZE:
+            _VERDICTS.popitem(last=False)
+    else:
+        _VERDICTS.move_to_end(key)
+    return verdict
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _members(enum_class, values: Any, location: str, issues: list[ValidationIssue]) -> list:
+    """Resolve a list of enum names, dropping (and reporting) anything that is not a member."""
+    if not isinstance(values, list):
+        issues.append(ValidationIssue(location, f"expected a list of {enum_class.__name__} names"))
+        return []
+    members = []
+    for i, value in enumerate(values):
+        member = enum_class.__members__.get(value) if isinstance(value, str) else None
+        if member is None:
+            issues.append(ValidationIssue(f"{location}[{i}]", f"unknown {enum_class.__name__}: {value!r}"))
+        else:
+            members.append(member)
+    return members
+
+
+def _validate_exercise(value: Any, location: str, issues: list[ValidationIssue]) -> dict | None:
+    if not isinstance(value, dict):
+        issues.append(ValidationIssue(location, "expected an object"))
+        return None
+    if not isinstance(value.get("description"), str):
+        issues.append(ValidationIssue(f"{location}/description", "missing or not a string"))
+        return None
+    if not isinstance(value.get("intensity"), str) or value["intensity"] not in Intensity.__members__:
+        issues.append(ValidationIssue(f"{location}/intensity", f"unknown Intensity: {value.get('intensity')!r}"))
+        return None
+
+    normalised = {}
+    for key, item in value.items():
+        if key in ("equipment", "target"):
+            enum_class = Equipment if key == "equipment" else Target
+            normalised[key] = [x.name for x in _members(enum_class, item, f"{location}/{key}", issues)]
+        elif key == "energy" and not _is_number(item):
+            issues.append(ValidationIssue(f"{location}/energy", f"not a number: {item!r}"))
+        elif key == "sub_workouts" and not (isinstance(item, list) and all(isinstance(x, str) for x in item)):
+            issues.append(ValidationIssue(f"{location}/sub_workouts", "expected a list of names"))
+        else:
+            normalised[key] = item
+    return normalised
+
+
+def _validate_catalog(loaded_data: Any) -> CatalogValidation:
+    issues: list[ValidationIssue] = []
+    if not isinstance(loaded_data, dict):
+        return CatalogValidation(data={}, issues=(ValidationIssue("/", "expected an object"),))
+
+    # Flat layout: {exercise name: exercise data with 'aerobic_type'}
+    first_value = next(iter(loaded_data.values()), None)
+    if isinstance(first_value, dict) and "aerobic_type" in first_value:
+        hierarchical = {}
+        for name, value in loaded_data.items():
+            if not isinstance(value, dict) or not isinstance(value.get("aerobic_type"), str):
+                issues.append(ValidationIssue(name, "missing aerobic_type"))
+                continue
+            exercise = {k: v for k, v in value.items() if k != "aerobic_type"}
+            hierarchical.setdefault(value["aerobic_type"], {})[name] = exercise
+        loaded_data = hierarchical
+
+    data = {}
+    for category, exercises in loaded_data.items():
+        if not isinstance(exercises, dict):
+            issues.append(ValidationIssue(category, "expected an object of exercises"))
+            continue
+        data[category] = {}
+        for name, value in exercises.items():
+            exercise = _validate_exercise(value, f"{category}/{name}", issues)
+            if exercise is not None:
+                data[category][name] = exercise
+    return CatalogValidation(data=data, issues=tuple(issues))
+
+
+def validate_catalog(loaded_data: Any, content_hash: str | None = None) -> CatalogValidation:
+    """Validate and normalise catalog data (hierarchical or flat layout) into hierarchical data.
+
+    Args:
+        loaded_data (Any): Parsed workout data.
+        content_hash (str | None): Hash of the source contents. If given, the verdict is cached under it.
+    """
+    return _cached("catalog", content_hash, lambda: _validate_catalog(loaded_data))
+
+
+def _validate_workout(value: Any, index: int, location: str, issues: list[ValidationIssue]) -> ExerciseRecord | None:
+    if not isinstance(value.get("name"), str):
+        issues.append(ValidationIssue(f"{location}/name", "missing or not a string"))
+        return None
+    if not isinstance(value.get("time"), int) or isinstance(value.get("time"), bool):
+        issues.append(ValidationIssue(f"{location}/time", f"not a whole number of seconds: {value.get('time')!r}"))
+        return None
+    intensity = Intensity.__members__.get(value.get("intensity")) if isinstance(value.get("intensity"), str) else None
+    if intensity is None:
+        issues.append(ValidationIssue(f"{location}/intensity", f"unknown Intensity: {value.get('intensity')!r}"))
+        return None
+    aerobic_type = AerobicType.__members__.get(value.get("aerobic_type")) \
+        if isinstance(value.get("aerobic_type"), str) else None
+    if aerobic_type is None:
+        issues.append(ValidationIssue(f"{location}/aerobic_type",
+                                      f"unknown AerobicType: {value.get('aerobic_type')!r}"))
+        return None
+    sub_workouts = value.get("sub_workouts")
+    if sub_workouts is not None and not (isinstance(sub_workouts, list) and
+                                         all(isinstance(x, str) for x in sub_workouts)):
+        issues.append(ValidationIssue(f"{location}/sub_workouts", "expected a list of names"))
+        sub_workouts = None
+    energy = value.get("energy")
+    if energy is not None and not _is_number(energy):
+        issues.append(ValidationIssue(f"{location}/energy", f"not a number: {energy!r}"))
+        energy = None
+    description = value.get("description")
+    return ExerciseRecord(
+        index=index,
+        name=value["name"],
+        description=description if isinstance(description, str) else "",
+        equipment=tuple(_members(Equipment, value.get("equipment") or [], f"{location}/equipment", issues)),
+        intensity=intensity,
+        aerobic_type=aerobic_type,
+        category=aerobic_type.name,
+        target=tuple(_members(Target, value.get("target") or [], f"{location}/target", issues)),
+        sub_workouts=tuple(sub_workouts) if sub_workouts else None,
+        energy=energy,
+    )
+
+
+def _validate_session(session_data: Any) -> SessionValidation:
+    issues: list[ValidationIssue] = []
+    if not isinstance(session_data, dict):
+        session_data = {}
+        issues.append(ValidationIssue("/", "expected an object"))
+
+    def whole_number(key: str, default: int) -> int:
+        value = session_data.get(key, default)
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            issues.append(ValidationIssue(key, f"not a whole number: {value!r}"))
+            return default
+        return value
+
+    rest_time = whole_number("rest_time", DEFAULT_REST_TIME)
+    workout_cycles = max(1, whole_number("workout_cycles", 1))
+    workout_name = session_data.get("workout_name") or ""
+    if not isinstance(workout_name, str):
+        issues.append(ValidationIssue("workout_name", "not a string"))
+        workout_name = ""
+
+    workouts_data = session_data.get("workouts", [])
+    if not isinstance(workouts_data, list):
+        issues.append(ValidationIssue("workouts", "expected a list"))
+        workouts_data = []
+
+    # Workouts, each optionally followed by its rest period (older files)
+    records: list[ExerciseRecord] = []
+    times: list[int] = []
+    rests: list[int] = []
+    workout_numbers: list[int] = []  # Position of each record among the file's workouts, rest periods excluded
+    workout_count = 0
+    follows_workout = False
+    for i, value in enumerate(workouts_data):
+        location = f"workouts[{i}]"
+        if not isinstance(value, dict):
+            issues.append(ValidationIssue(location, "expected an object"))
+            follows_workout = False
+            workout_count += 1
+            continue
+        if value.get("name") == REST_PERIOD:
+            time = value.get("time", rest_time)
+            if not isinstance(time, int) or isinstance(time, bool):
+                issues.append(ValidationIssue(f"{location}/time", f"not a whole number of seconds: {time!r}"))
+            elif follows_workout:
+                rests[-1] = time
+            follows_workout = False
+            continue
+        record = _validate_workout(value, len(records), location, issues)
+        follows_workout = record is not None
+        if record is not None:
+            records.append(record)
+            times.append(value["time"])
+            rests.append(rest_time)
+            workout_numbers.append(workout_count)
+        workout_count += 1
+
+    # Lists with one value per workout in the file (newer files), matched to the workouts that were kept
+    rest_times = session_data.get("rest_times") or []
+    if isinstance(rest_times, list) and all(isinstance(x, int) and not isinstance(x, bool) for x in rest_times):
+        rests = [rest_times[n] if n < len(rest_times) else rest for n, rest in zip(workout_numbers, rests)]
+    else:
+        issues.append(ValidationIssue("rest_times", "expected a list of whole numbers"))
+    pinned_flags = session_data.get("pinned") or []
+    if not (isinstance(pinned_flags, list) and all(isinstance(x, bool) for x in pinned_flags)):
+        issues.append(ValidationIssue("pinned", "expected a list of booleans"))
+        pinned_flags = []
+    pinned = [n < len(pinned_flags) and pinned_flags[n] for n in workout_numbers]
+
+    schedule = tuple(ScheduledItem(spec=record, duration=time, rest=rest)
+                     for record, time, rest in zip(records, times, rests))
+
+    routine = session_data.get("routine")
+    if routine is not None:
+        if isinstance(routine, dict) and isinstance(routine.get("seed"), int) and \
+                isinstance(routine.get("params"), dict):
+            routine = {"seed": routine["seed"], "params": routine["params"]}
+        else:
+            issues.append(ValidationIssue("routine", "expected an object with an integer seed and params"))
+            routine = None
+    return SessionValidation(workout_name=workout_name, workout_cycles=workout_cycles, rest_time=rest_time,
+                             schedule=schedule, pinned=tuple(pinned), routine=routine, issues=tuple(issues))
+
+
+def validate_session(session_data: Any, content_hash: str | None = None) -> SessionValidation:
+    """Validate and normalise a workout session.
+
+    Args:
+        session_data (Any): Parsed session file.
+        content_hash (str | None): Hash of the source contents. If given, the verdict is cached under it.
+    """
+    return _cached("session", content_hash, lambda: _validate_session(session_data))
+
+
+def load_session(path: Path) -> SessionValidation:
+    """Read and validate a session file, reusing the verdict if the contents have been validated before.
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If the file is not valid JSON.
+    """
+    raw = Path(path).read_bytes()
+    return _cached("session", hashlib.sha256(raw).hexdigest(), lambda: _validate_session(json.loads(raw)))
+
+
+def log_issues(issues: tuple[ValidationIssue, ...], source: str, limit: int = 10) -> None:
+    """Log validation issues, summarising past the first few."""
+    for issue in issues[:limit]:
+        LOGGER.warning(f"{source}: {issue}")
+    if len(issues) > limit:
+        LOGGER.warning(f"{source}: {len(issues) - limit} more issues")
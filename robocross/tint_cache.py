@@ -0,0 +1,219 @@
+"""Two-level cache of tinted images.
+
+The player recolours monochrome diagrams and icons (core.image_utils.fill_foreground_pixels). A tinted image is
+identified by a hash of the source file's bytes, the colour and TINT_VERSION, so the key changes when the source or
+the tinting algorithm does. Tinted images are cached at two levels:
+
+- Memory: QPixmaps by key, least recently used evicted beyond a byte budget.
+- Disk: PNGs named by key under cache/tinted, least recently used (by file modification time, which a hit updates)
+  evicted beyond a size cap.
+
+Neither level keeps an image larger than its whole budget; such an image is tinted again when it is next needed.
+
+A diagram is therefore tinted once per colour across restarts. Source digests are remembered per path, size and
+modification time, so a lookup reads the source file only when it changed.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from PySide6.QtGui import QImage, QPixmap
+
+from core.core_paths import CACHE_DIR
+from core.image_utils import fill_foreground_pixels, load_pixels, save_pixels
+from core.logging_utils import get_logger
+
+LOGGER = get_logger(name=__name__, level=logging.INFO)
+
+TINT_CACHE_DIR = CACHE_DIR / "tinted"
+TINT_VERSION = 1  # Bump when the tint changes, so stored images are not reused
+PIXMAP_CACHE_BYTES = 64 << 20
+DISK_CACHE_BYTES = 256 << 20
+
+
+def _pixmap_bytes(pixmap: QPixmap) -> int:
+    return pixmap.width() * pixmap.height() * max(1, pixmap.depth()) // 8
+
+
+def _pixmap_from_pixels(rgba: np.ndarray) -> QPixmap:
+    height, width = rgba.shape[:2]
+    image = QImage(np.ascontiguousarray(rgba).tobytes(), width, height, width * 4, QImage.Format.Format_RGBA8888)
+    return QPixmap.fromImage(image.copy())
+
+
+class PixmapLRU:
+    """QPixmaps by key, evicting the least recently used beyond a byte budget."""
+
+    def __init__(self, max_bytes: int = PIXMAP_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._pixmaps: OrderedDict[str, QPixmap] = OrderedDict()
+
+    def __repr__(self) -> str:
+        return f"PixmapLRU | pixmaps: {len(self._pixmaps)}, {self.size >> 10} / {self.max_bytes >> 10} KiB"
+
+    def __len__(self) -> int:
+        return len(self._pixmaps)
+
+    def get(self, key: str) -> QPixmap | None:
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+        return pixmap
+
+    def put(self, key: str, pixmap: QPixmap) -> None:
+        """Add a pixmap. One larger than the whole budget is not kept."""
+        cost = _pixmap_bytes(pixmap)
+        if key in self._pixmaps:
+            self.size -= _pixmap_bytes(self._pixmaps.pop(key))
+        if cost > self.max_bytes:
+            return
+        self._pixmaps[key] = pixmap
+        self.size += cost
+        while self.size > self.max_bytes:
+            _, evicted = self._pixmaps.popitem(last=False)
+            self.size -= _pixmap_bytes(evicted)
+
+
+class TintStore:
+    """Tinted PNGs on disk by key, evicting the least recently used beyond a size cap."""
+
+    def __init__(self, directory: Path = TINT_CACHE_DIR, max_bytes: int = DISK_CACHE_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._files: OrderedDict[str, int] | None = None  # File sizes by key, least recently used first
+
+    def __repr__(self) -> str:
+        return f"TintStore | {self.directory}, {self.size >> 10} / {self.max_bytes >> 10} KiB"
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.png"
+
+    @property
+    def files(self) -> OrderedDict[str, int]:
+        """Stored files, scanned once and then kept up to date."""
+        if self._files is None:
+            entries = []
+            try:
+                with os.scandir(self.directory) as scan:
+                    for entry in scan:
+                        if entry.name.endswith(".png") and entry.is_file():
+                            stat = entry.stat()
+                            entries.append((stat.st_mtime_ns, entry.name[:-4], stat.st_size))
+            except FileNotFoundError:
+                pass
+            self._files = OrderedDict((key, size) for _, key, size in sorted(entries))
+            self.size = sum(self._files.values())
+        return self._files
+
+    def get(self, key: str) -> Path | None:
+        """Path of a stored image, marked as recently used. None if not stored."""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            if self.files.pop(key, None) is not None:  # Removed by another process
+                self.size = sum(self.files.values())
+            return None
+        if key in self.files:
+            self.files.move_to_end(key)
+        return path
+
+    def put(self, key: str, pixels) -> Path | None:
+        """Store an image (a uint8 pixel array) and evict the least recently used beyond the cap.
+
+        Returns:
+            Path | None: The stored PNG. None if it is larger than the whole cap, in which case it is not kept.
+        """
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        save_pixels(pixels, path)
+        files = self.files
+        self.size -= files.pop(key, 0)
+        files[key] = path.stat().st_size
+        self.size += files[key]
+        while self.size > self.max_bytes:  # The new image goes last, once everything else is gone
+            evicted, size = files.popitem(last=False)
+            self.path(evicted).unlink(missing_ok=True)
+            self.size -= size
+            LOGGER.debug(f"Evicted tinted image {evicted}")
+        return path if key in files else None
+
+
+class TintCache:
+    """Tinted images, from memory, disk or tinted on a miss."""
+
+    def __init__(self, store: TintStore | None = None, pixmaps: PixmapLRU | None = None):
+        self.store = store or TintStore()
+        self.pixmaps = pixmaps or PixmapLRU()
+        self._digests: dict[str, tuple[int, int, bytes]] = {}  # Source path -> (size, mtime_ns, digest)
+
+    def __repr__(self) -> str:
+        return f"TintCache | {self.pixmaps}, {self.store}"
+
+    def _source_digest(self, source_path: Path) -> bytes:
+        stat = os.stat(source_path)
+        known = self._digests.get(str(source_path))
+        if known is not None and known[:2] == (stat.st_size, stat.st_mtime_ns):
+            return known[2]
+        digest = hashlib.blake2b(Path(source_path).read_bytes(), digest_size=16).digest()
+        self._digests[str(source_path)] = (stat.st_size, stat.st_mtime_ns, digest)
+        return digest
+
+    def key(self, source_path: Path, rgb: tuple[int, int, int]) -> str:
+        """Hash of the source bytes, colour and tint version."""
+        digest = hashlib.blake2b(self._source_digest(source_path), digest_size=16)
+        digest.update(bytes(rgb))
+        digest.update(TINT_VERSION.to_bytes(4, "little"))
+        return digest.hexdigest()
+
+    def path(self, source_path: Path, rgb: tuple[int, int, int]) -> Path | None:
+        """Stored tinted image, tinting the source if it is not stored yet.
+
+        Args:
+            source_path (Path): Source image.
+            rgb (tuple[int, int, int]): Colour of the visible pixels.
+
+        Returns:
+            Path | None: PNG in the disk cache, None if it is too large for the cache.
+        """
+        key = self.key(source_path, rgb)
+        return self.store.get(key) or self._tint(key, source_path, rgb)[0]
+
+    def _tint(self, key: str, source_path: Path, rgb: tuple[int, int, int]) -> tuple[Path | None, np.ndarray]:
+        """Tint the source and store the result: the stored PNG (None if not kept) and the tinted pixels."""
+        pixels = fill_foreground_pixels(load_pixels(source_path), rgb)
+        LOGGER.debug(f"Tinted {Path(source_path).name} #{bytes(rgb).hex()}")
+        return self.store.put(key, pixels), pixels
+
+    def pixmap(self, source_path: Path, rgb: tuple[int, int, int]) -> QPixmap:
+        """Tinted image as a pixmap (see path())."""
+        key = self.key(source_path, rgb)
+        pixmap = self.pixmaps.get(key)
+        if pixmap is None:
+            path = self.store.get(key)
+            if path is not None:
+                pixmap = QPixmap(path.as_posix())
+            else:
+                pixmap = _pixmap_from_pixels(self._tint(key, source_path, rgb)[1])
+            self.pixmaps.put(key, pixmap)
+        return pixmap
+
+
+_TINT_CACHE: TintCache | None = None
+
+
+def get_tint_cache() -> TintCache:
+    """The shared tint cache (GUI thread only, like the QPixmaps it holds)."""
+    global _TINT_CACHE
+    if _TINT_CACHE is None:
+        _TINT_CACHE = TintCache()
+    return _TINT_CACHE
@@ -3,6 +3,7 @@ from __future__ import annotations
 import random
 
 from collections import OrderedDict
+from dataclasses import replace
 from datetime import timedelta
 
 from PySide6.QtCore import Qt, QSize
@@ -410,10 +411,9 @@ class Viewer(GenericWidget):
         if self.current_workout.name == REST_PERIOD:
             if self.next_workout is None:
                 next_string = "End of workout coming up"
-                workout = self.current_workout
-                workout.name = "Stretching"
-                workout.description = "Time to stretch it out..."
-                self.progress_bar.workout = workout
+                # Display copy: the rest period may be shared by other circuits and the editor
+                self.progress_bar.workout = replace(
+                    self.current_workout, name="Stretching", description="Time to stretch it out...")
             else:
                 next_string = f"Coming up: [[slnc 500]]{self.next_workout.name.title()}"
             speech = f"Rest time {self.current_workout.time} seconds.[[slnc 500]]{next_string}"
@@ -3,9 +3,9 @@ from __future__ import annotations
 import logging
 import random
 from collections import OrderedDict
+from dataclasses import replace
 from datetime import timedelta
 from pathlib import Path
-import tempfile
 
 from PySide6.QtCore import Qt, QSize, QSettings
 from PySide6.QtGui import QFont, QMovie, QIcon, QPixmap
@@ -17,14 +17,15 @@ from core import logging_utils, DEVELOPER
 from core.speaker import Speaker, Voice
 from core import SANS_SERIF_FONT
 from core.core_paths import image_path
-from core.image_utils import fill_foreground
 from music_player.music_player_ui import MusicPlayer
 from robocross import REST_PERIOD, APP_NAME
 from robocross.robocross_enums import AerobicType, RunMode, Intensity
 from robocross.workout import Workout
 from robocross.workout_chip import WorkoutChip
 from robocross.workout_dot import DotContainer
-from robocross.media_loader import find_workout_media, VideoPlayerWidget
+from robocross.media_loader import find_workout_media, has_transparent_padding, VideoPlayerWidget
+from robocross.media_manifest import get_media_manifest
+from robocross.tint_cache import get_tint_cache
 from widgets.generic_widget import GenericWidget
 from widgets.stopwatch import Stopwatch
 from widgets.image_label import ImageLabel
@@ -69,82 +70,40 @@ class ViewerV2(GenericWidget):
             volume=narration_volume / 10.0
         )
 
-        # Cache for tinted reset icon
-        self._tinted_reset_icon_path = None
-
         # Build UI
         self.setup_ui()
         self.setup_connections()
 
-    def _create_tinted_image(self, source_path: Path, rgb: tuple[int, int, int], cache_name: str = None) -> Path:
+    def _tinted_pixmap(self, source_path: Path, rgb: tuple[int, int, int]) -> QPixmap:
         """
-        Create a tinted version of an image (cached in temp directory).
+        Get a tinted version of an image.
+
+        Tinted images are cached in memory and on disk by source content and color (see tint_cache), so each image
+        is tinted once per color across runs.
 
         Args:
             source_path: Path to the source image
             rgb: RGB tuple for tint color (e.g., (255, 255, 255) for white)
-            cache_name: Optional cache name (defaults to source filename + color)
 
         Returns:
-            Path to tinted image in temp directory
+            Tinted pixmap
         """
-        if not cache_name:
-            color_hex = f"{rgb[0]:02x}{rgb[1]:02x}{rgb[2]:02x}"
-            cache_name = f"{source_path.stem}_{color_hex}"
-
-        cache_key = f"_tinted_{cache_name}"
-        cached_path = getattr(self, cache_key, None)
-
-        if cached_path and Path(cached_path).exists():
-            return Path(cached_path)
-
-        # Create tinted version
-        temp_dir = Path(tempfile.gettempdir())
-        tinted_path = temp_dir / f"{cache_name}.png"
-
-        # Use fill_foreground to tint the image
-        fill_foreground(source_path, tinted_path, rgb)
-
-        setattr(self, cache_key, tinted_path)
-        return tinted_path
+        return get_tint_cache().pixmap(source_path, rgb)
 
     def _is_monochrome_transparent(self, image_path: Path) -> bool:
         """
         Check if a PNG image is monochrome with transparent background.
 
+        Read from the media manifest, which analyses the image the first time it is shown if the indexer has not.
+
         Args:
             image_path: Path to PNG image
 
         Returns:
             True if image is monochrome with transparency
         """
-        try:
-            from PIL import Image
-            img = Image.open(image_path).convert("RGBA")
-            pixels = img.load()
-            width, height = img.size
-
-            # Sample pixels to check for monochrome (same R=G=B values for non-transparent pixels)
-            colors_found = set()
-            has_transparency = False
-
-            for x in range(0, width, max(1, width // 20)):  # Sample every ~5%
-                for y in range(0, height, max(1, height // 20)):
-                    r, g, b, a = pixels[x, y]
-                    if a == 0:
-                        has_transparency = True
-                    elif a > 0:
-                        # Check if pixel is greyscale (R=G=B)
-                        if r == g == b:
-                            colors_found.add(r)
-                        else:
-                            return False  # Found a colored pixel, not monochrome
-
-            # Monochrome if we found greyscale values and has transparency
-            return has_transparency and len(colors_found) > 0
-
-        except Exception:
-            return False
+        analysis = get_media_manifest().analysis(image_path)
+        return analysis is not None and analysis.is_monochrome_transparent
 
     def setup_ui(self):
         """Setup the UI components."""
@@ -217,10 +176,8 @@ class ViewerV2(GenericWidget):
         self.back_button.setToolTip(f"<span style='font-size: {TOOL_TIP_SIZE}pt;'>Previous workout</span>")
 
         # Play/Pause button (white tinted icons)
-        play_icon_path = self._create_tinted_image(image_path("play.png"), white, "play_white")
-        pause_icon_path = self._create_tinted_image(image_path("pause.png"), white, "pause_white")
-        self.play_icon_white = QIcon(QPixmap(str(play_icon_path)))
-        self.pause_icon_white = QIcon(QPixmap(str(pause_icon_path)))
+        self.play_icon_white = QIcon(self._tinted_pixmap(image_path("play.png"), white))
+        self.pause_icon_white = QIcon(self._tinted_pixmap(image_path("pause.png"), white))
         self.pause_button = timer_row.add_widget(QPushButton())
         self.pause_button.setIcon(self.play_icon_white)
         self.pause_button.setIconSize(QSize(50, 50))
@@ -235,9 +192,8 @@ class ViewerV2(GenericWidget):
         self.forward_button.setToolTip(f"<span style='font-size: {TOOL_TIP_SIZE}pt;'>Next workout</span>")
 
         # Reset button (white tinted icon)
-        reset_icon_path = self._create_tinted_image(image_path("reset.png"), white, "reset_white")
         self.reset_button = timer_row.add_widget(QPushButton())
-        self.reset_button.setIcon(QIcon(QPixmap(str(reset_icon_path))))
+        self.reset_button.setIcon(QIcon(self._tinted_pixmap(image_path("reset.png"), white)))
         self.reset_button.setIconSize(QSize(50, 50))
         self.reset_button.setFixedSize(80, 80)
         self.reset_button.setStyleSheet("border: none;")
@@ -614,7 +570,7 @@ class ViewerV2(GenericWidget):
         else:
             # Static image (PNG/JPG)
             # Check if PNG is monochrome with transparency - if so, tint to workout color
-            final_image_path = media_path
+            tinted_pixmap = None
 
             if media_path.suffix.lower() == '.png' and self._is_monochrome_transparent(media_path):
                 # Tint to current workout color
@@ -627,17 +583,15 @@ class ViewerV2(GenericWidget):
                 g = int(hex_color[2:4], 16)
                 b = int(hex_color[4:6], 16)
 
-                # Create tinted version
-                cache_name = f"{media_path.stem}_{workout_color_hex.replace('#', '')}"
-                final_image_path = self._create_tinted_image(media_path, (r, g, b), cache_name)
+                # Tinted version (cached in memory and on disk)
+                tinted_pixmap = self._tinted_pixmap(media_path, (r, g, b))
 
-            self._current_media_widget = ImageLabel(final_image_path)
+            self._current_media_widget = ImageLabel(media_path, pixmap=tinted_pixmap)
 
-            # Check if image needs padding/margin
+            # Check if image needs padding/margin (tinting keeps the alpha channel, so the source's padding applies)
             from robocross import IMAGE_PADDING
-            from robocross.media_loader import has_transparent_padding
 
-            if has_transparent_padding(final_image_path, min_padding=IMAGE_PADDING):
+            if has_transparent_padding(media_path, min_padding=IMAGE_PADDING):
                 # Image has padding, no margin needed
                 self._current_media_widget.setStyleSheet("border: none;")
             else:
@@ -778,10 +732,9 @@ class ViewerV2(GenericWidget):
 
             if self.next_workout is None:
                 next_string = "End of workout coming up"
-                workout = self.current_workout
-                workout.name = "Stretching"
-                workout.description = "Time to stretch it out..."
-                self.current_exercise_chip.workout = workout
+                # Display copy: the rest period may be shared by other circuits and the editor
+                self.current_exercise_chip.workout = replace(
+                    self.current_workout, name="Stretching", description="Time to stretch it out...")
             else:
                 next_string = f"Coming up: [[slnc 500]]{self.next_workout.name.title()}"
 
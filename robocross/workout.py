@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 from robocross.robocross_enums import Equipment, Intensity, AerobicType, Target
 from core import time_utils
 
+if TYPE_CHECKING:
+    from robocross.exercise_catalog import ExerciseRecord
+
 
 @dataclass
 class Workout:
@@ -31,6 +35,19 @@ class Workout:
                        target=Target.full_body,
                        time=83)
 
+    def to_dict(self) -> dict:
+        """Serialize the workout as stored in session files."""
+        return {
+            "name": self.name,
+            "description": self.description,
+            "equipment": [eq.name for eq in self.equipment] if self.equipment else [],
+            "intensity": self.intensity.name,
+            "aerobic_type": self.aerobic_type.name,
+            "target": [t.name for t in self.target] if self.target else [],
+            "time": self.time,
+            "sub_workouts": self.sub_workouts
+        }
+
     @property
     def time_nice(self) -> str:
         return time_utils.time_nice(self.time)
@@ -48,6 +65,21 @@ class Workout:
         return self.time // len(self.sub_workouts)
 
 
+@dataclass(frozen=True, slots=True)
+class ScheduledItem:
+    """A slot in a routine.
+
+    The exercise itself is a reference to the shared, immutable catalog record; only the timings belong to the slot.
+    """
+    spec: ExerciseRecord
+    duration: int  # seconds
+    rest: int  # seconds of rest following the exercise
+
+    def to_workout(self) -> Workout:
+        """Create a new, independently editable Workout for the slot."""
+        return self.spec.to_workout(time=self.duration)
+
+
 if __name__ == "__main__":
     workout = Workout.default()
     print(workout.time_nice)
\ No newline at end of file
@@ -1,13 +1,16 @@
 """Workout data."""
 import hashlib
-import json
 
 from pathlib import Path
 from datetime import datetime
 from typing import Sequence
 
 from core.logging_utils import get_logger
+from core.persistence import JournaledDocument
 from robocross.workout import Workout
+from robocross.catalog_cache import get_catalog
+from robocross.exercise_catalog import ExerciseCatalog, ExerciseRecord
+from robocross.exercise_store import ExerciseStore, get_store
 from robocross.robocross_enums import Equipment, Intensity, AerobicType, Target
 from core.core_paths import DATA_FILE_PATH
 
@@ -184,8 +187,7 @@ def convert_to_data_file():
             "time": workout.time,
             "energy": energy_by_intensity.get(workout.intensity, 9)  # Add calorie burn rate
         }
-    with DATA_FILE_PATH.open("w") as f:
-        json.dump(data_dict, f, indent=4)
+    JournaledDocument(DATA_FILE_PATH).write(data_dict)
 
 
 class WorkoutData:
@@ -200,141 +202,90 @@ class WorkoutData:
             target_filter (Sequence[Target]): The list of target body parts to include (e.g., [Target.legs, Target.core]).
                                               If None or empty, all targets are included.
             """
-        with DATA_FILE_PATH.open("r") as f:
-            loaded_data = json.load(f)
-
-        # Detect if data is hierarchical (category->exercises) or flat (exercise->data)
-        # Hierarchical: first value is a dict of dicts
-        # Flat: first value is a dict with 'aerobic_type' key
-        first_value = next(iter(loaded_data.values()))
-        is_hierarchical = isinstance(first_value, dict) and 'aerobic_type' not in first_value
-
-        if is_hierarchical:
-            # Hierarchical structure: {category: {exercise: data}}
-            self.hierarchical_data = loaded_data
-            # Flatten for backward compatibility
-            self.data = {}
-            for category_name, exercises in self.hierarchical_data.items():
-                for exercise_name, exercise_data in exercises.items():
-                    exercise_data_with_category = exercise_data.copy()
-                    exercise_data_with_category['aerobic_type'] = category_name
-                    self.data[exercise_name] = exercise_data_with_category
-        else:
-            # Flat structure: {exercise: data} where data includes aerobic_type
-            self.data = loaded_data
-            # Build hierarchical structure for categories property
-            self.hierarchical_data = {}
-            for exercise_name, exercise_data in self.data.items():
-                category = exercise_data.get('aerobic_type', 'unknown')
-                if category not in self.hierarchical_data:
-                    self.hierarchical_data[category] = {}
-                self.hierarchical_data[category][exercise_name] = exercise_data
+        # Shared, read-only catalog (the data file is only re-read when it changes)
+        self.store: ExerciseStore = get_store()
+        self.catalog: ExerciseCatalog = get_catalog(self.store.path)
+        self.data = self.catalog.data
+        self.hierarchical_data = self.catalog.hierarchical_data
 
         self.nope_list = nope_list
         self.equipment_filter = equipment_filter
         self.selected_categories = selected_categories
         self.target_filter = target_filter if target_filter else []
 
+    def _query(self, **filters) -> list[ExerciseRecord]:
+        """Shared catalog records matching the filters, evaluated by the store if it can query its own indexes."""
+        if not self.store.pushes_down_queries:
+            return self.catalog.query(**filters)
+        by_name = self.catalog.by_name
+        return [self.catalog.records[by_name[name]] for name in self.store.query(**filters) if name in by_name]
+
+    @property
+    def records(self) -> list[ExerciseRecord]:
+        """Shared catalog records with the filters applied."""
+        return self._query(
+            nope_list=self.nope_list,
+            equipment_filter=self.equipment_filter,
+            categories=self.selected_categories,
+            targets=self.target_filter,
+        )
+
     @property
     def filtered_data(self) -> dict:
         """Data with items removed."""
-        from robocross.robocross_enums import Target
-        filtered = {}
-        for name, value in self.data.items():
-            if name not in self.nope_list:
-                # Filter by category if selected_categories is specified
-                if self.selected_categories is not None:
-                    category = value.get("aerobic_type")
-                    if category not in self.selected_categories:
-                        continue
-
-                # Filter by target if target_filter is specified
-                if self.target_filter:
-                    target_list = [Target.__members__.get(x) for x in value.get("target", [])]
-                    # Check if any of the workout's targets match any of the filter targets
-                    if not any(t in self.target_filter for t in target_list if t is not None):
-                        continue
-
-                equipment_list = [Equipment.__members__.get(x) for x in value.get("equipment")]
-                if bool(set(equipment_list).intersection(set(self.equipment_filter))) is False:
-                    filtered[name] = value
-        return filtered
+        return {record.name: self.data[record.name] for record in self.records}
 
     @property
     def workouts(self) -> list[Workout]:
-        workouts = []
-        for name, value in self.filtered_data.items():
-            equipment_list = [Equipment.__members__.get(x) for x in value.get("equipment")]
-            target_list = [Target.__members__.get(x) for x in value.get("target")]
-            sub_workouts = value.get("sub_workouts")
-            workouts.append(
-                Workout(
-                    name=name,
-                    description=value.get("description"),
-                    equipment=equipment_list if equipment_list else [],
-                    intensity=Intensity.__members__.get(value.get("intensity")),
-                    aerobic_type=AerobicType.__members__.get(value.get("aerobic_type")),
-                    target=target_list,
-                    time=DEFAULT_TIME,
-                    sub_workouts=sub_workouts,
-                )
-            )
-        return workouts
+        return [record.to_workout(time=DEFAULT_TIME) for record in self.records]
 
     @property
     def cardio_workout_items(self) -> list[Workout]:
-        return [x for x in self.workouts if x.aerobic_type is AerobicType.cardio if x.name]
+        return self.get_workouts_by_category(AerobicType.cardio.name)
 
     @property
     def strength_workout_items(self) -> list[Workout]:
-        return [x for x in self.workouts if x.aerobic_type is AerobicType.strength]
+        return self.get_workouts_by_category(AerobicType.strength.name)
 
     @property
     def combat_workout_items(self) -> list[Workout]:
-        return [x for x in self.workouts if x.aerobic_type is AerobicType.combat]
+        return self.get_workouts_by_category(AerobicType.combat.name)
 
     @property
     def flexibility_workout_items(self) -> list[Workout]:
-        return [x for x in self.workouts if x.aerobic_type is AerobicType.flexibility]
+        return self.get_workouts_by_category(AerobicType.flexibility.name)
 
     @property
     def categories(self) -> list[str]:
         """Return list of available category names."""
         return list(self.hierarchical_data.keys())
 
+    def get_records_by_category(self, category: str) -> list[ExerciseRecord]:
+        """Get shared records for a specific category."""
+        if self.selected_categories is not None and category not in self.selected_categories:
+            return []
+        return self._query(
+            nope_list=self.nope_list,
+            equipment_filter=self.equipment_filter,
+            categories=[category],
+            targets=self.target_filter,
+        )
+
     def get_workouts_by_category(self, category: str) -> list[Workout]:
         """Get workouts for a specific category."""
-        return [x for x in self.workouts if x.aerobic_type.name == category]
+        return [record.to_workout(time=DEFAULT_TIME) for record in self.get_records_by_category(category)]
+
+    def get_all_records_by_category(self, category: str) -> list[ExerciseRecord]:
+        """Get shared records for a specific category, ignoring selected_categories and target filters."""
+        return self._query(
+            nope_list=self.nope_list,
+            equipment_filter=self.equipment_filter,
+            categories=[category],
+        )
 
     def get_all_workouts_by_category(self, category: str) -> list[Workout]:
         """Get workouts for a specific category, ignoring selected_categories filter."""
-        all_workouts = []
-        for name, value in self.data.items():
-            if name in self.nope_list:
-                continue
-            if value.get("aerobic_type") != category:
-                continue
-
-            # Filter by equipment only (not by selected categories)
-            equipment_list = [Equipment.__members__.get(eq) for eq in value.get("equipment")]
-            if bool(set(equipment_list).intersection(set(self.equipment_filter))):
-                continue  # Skip if equipment is in filter
-
-            target_list = [Target.__members__.get(t) for t in value.get("target", [])]
-            sub_workouts = value.get("sub_workouts")
-            workout = Workout(
-                name=name,
-                description=value.get("description"),
-                equipment=equipment_list if equipment_list else [],
-                intensity=Intensity.__members__.get(value.get("intensity")),
-                aerobic_type=AerobicType.__members__.get(value.get("aerobic_type")),
-                target=target_list,
-                time=DEFAULT_TIME,
-                sub_workouts=sub_workouts,
-                energy=value.get("energy")
-            )
-            all_workouts.append(workout)
-        return all_workouts
+        return [record.to_workout(time=DEFAULT_TIME) for record in self.get_all_records_by_category(category)]
 
 
 if __name__ == "__main__":
@@ -5,10 +5,13 @@ from PySide6.QtCore import Signal, Qt, QMimeData
 from PySide6.QtGui import QDrag
 
 from core.core_enums import Alignment
-from robocross.workout import Workout
+from robocross.workout import ScheduledItem, Workout
 from widgets.generic_widget import GenericWidget
 
 
+PIN_MARK = "\N{PUSHPIN}"
+
+
 class WorkoutEditorRow(GenericWidget):
     """Single editable workout row with exercise selector, duration, rest time, and delete button."""
 
@@ -19,6 +22,7 @@ class WorkoutEditorRow(GenericWidget):
     move_up_requested = Signal(object)  # emits self when move up requested
     move_down_requested = Signal(object)  # emits self when move down requested
     data_changed = Signal()  # emitted when any field changes
+    pinned_changed = Signal(object)  # emits self when the row is pinned or unpinned
 
     # Time copy/paste/apply signals
     copy_duration_requested = Signal(object)  # emits self when duration copy requested
@@ -29,12 +33,13 @@ class WorkoutEditorRow(GenericWidget):
     apply_rest_to_all_requested = Signal(object)  # emits self when apply rest time to all requested
 
     def __init__(self, workout: Workout, available_exercises: list[str],
-                 rest_seconds: int = 30, exercises_by_category: dict = None, parent=None):
+                 rest_seconds: int = 30, exercises_by_category: dict = None, parent=None, pinned: bool = False):
         super().__init__(alignment=Alignment.horizontal, parent=parent)
         self.workout = workout
         self.available_exercises = available_exercises
         self.exercises_by_category = exercises_by_category or {'cardio': [], 'strength': []}
         self.rest_seconds = rest_seconds
+        self._pinned = pinned  # Pinned rows are kept when the routine parameters change
         self.drag_start_position = None
         self.setAcceptDrops(True)
         self.setup_ui()
@@ -90,10 +95,30 @@ class WorkoutEditorRow(GenericWidget):
         self.delete_button.setFixedHeight(widget_height)
         self.delete_button.setStyleSheet("color: red; font-weight: bold;")
 
+    @property
+    def pinned(self) -> bool:
+        """True if the row is kept as it is when the routine parameters change."""
+        return self._pinned
+
+    @pinned.setter
+    def pinned(self, value: bool):
+        if value != self._pinned:
+            self._pinned = value
+            self.update_exercise_button_text()
+            self.pinned_changed.emit(self)
+
+    def set_scheduled_item(self, item: ScheduledItem):
+        """Replace the row's exercise and timings with a routine slot."""
+        self.workout = item.to_workout()
+        self.rest_seconds = item.rest
+        self.update_exercise_button_text()
+        self.update_duration_button_text()
+        self.update_rest_button_text()
+
     def update_exercise_button_text(self):
         """Update exercise button text with nicely formatted name."""
         nice_name = self.workout.name.replace('_', ' ').title()
-        self.exercise_button.setText(nice_name)
+        self.exercise_button.setText(f"{PIN_MARK} {nice_name}" if self.pinned else nice_name)
         self.update_exercise_button_color()
         self.update_exercise_button_tooltip()
 
@@ -123,6 +148,8 @@ class WorkoutEditorRow(GenericWidget):
         description = self.workout.description or "No description available"
         # Capitalize first letter and format nicely
         tooltip_text = description.capitalize()
+        if self.pinned:
+            tooltip_text += "\n(Pinned: kept when the workout parameters change)"
         self.exercise_button.setToolTip(tooltip_text)
 
     def update_duration_button_text(self):
@@ -144,6 +171,7 @@ class WorkoutEditorRow(GenericWidget):
         if ok:
             self.workout.time = new_seconds
             self.update_duration_button_text()
+            self.pinned = True  # Edited by hand
             self.data_changed.emit()
 
     def on_rest_clicked(self):
@@ -155,6 +183,7 @@ class WorkoutEditorRow(GenericWidget):
         if ok:
             self.rest_seconds = new_seconds
             self.update_rest_button_text()
+            self.pinned = True  # Edited by hand
             self.data_changed.emit()
 
     def on_exercise_button_clicked(self):
@@ -169,18 +198,14 @@ class WorkoutEditorRow(GenericWidget):
 
         if ok and exercise_name:
             # Update workout with selected exercise
-            from robocross.workout_data import WorkoutData
-            workout_data = WorkoutData()
-            new_workout = next(
-                (w for w in workout_data.workouts if w.name == exercise_name),
-                None
-            )
-            if new_workout:
+            from robocross.catalog_cache import get_catalog
+            record = get_catalog().get(exercise_name)
+            if record:
                 # Preserve time but update other workout fields
-                old_time = self.workout.time
-                self.workout = new_workout
-                self.workout.time = old_time
+                self.workout = record.to_workout(time=self.workout.time)
+                self._pinned = True  # Edited by hand
                 self.update_exercise_button_text()
+                self.pinned_changed.emit(self)
                 self.data_changed.emit()
 
     def show_duration_context_menu(self, pos):
@@ -268,6 +293,14 @@ class WorkoutEditorRow(GenericWidget):
 
         menu.addSeparator()
 
+        # Pin action
+        pin_action = menu.addAction("Pin")
+        pin_action.setCheckable(True)
+        pin_action.setChecked(self.pinned)
+        pin_action.setToolTip("Keep this exercise when the workout parameters change")
+
+        menu.addSeparator()
+
         # Delete action
         delete_action = menu.addAction("Delete")
 
@@ -281,6 +314,8 @@ class WorkoutEditorRow(GenericWidget):
             self.insert_above_requested.emit(self)
         elif action == insert_below:
             self.insert_below_requested.emit(self)
+        elif action == pin_action:
+            self.pinned = pin_action.isChecked()
         elif action == delete_action:
             self.delete_requested.emit(self)
 
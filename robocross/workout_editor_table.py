@@ -5,6 +5,7 @@ from PySide6.QtCore import Signal, Qt
 
 from core.core_enums import Alignment
 from core import time_utils
+from robocross.reroll import Slot, SlotUpdate
 from robocross.workout import Workout
 from robocross.workout_editor_row import WorkoutEditorRow
 from widgets.generic_widget import GenericWidget
@@ -16,6 +17,7 @@ class WorkoutEditorTable(ScrollWidget):
 
     # Signals
     workout_list_changed = Signal()  # emitted when workout list is modified
+    pinned_changed = Signal()  # emitted when a row is pinned or unpinned
     add_exercise_requested = Signal()  # emitted when user requests to add exercise via context menu
 
     def __init__(self, available_exercises: list[str], exercises_by_category: dict = None, parent=None):
@@ -96,8 +98,8 @@ class WorkoutEditorTable(ScrollWidget):
         equipment_list = sorted([eq.name.replace('_', ' ').title() for eq in equipment_set])
 
         # Calculate total calories
-        from robocross.workout_data import WorkoutData
-        workout_data = WorkoutData()
+        from robocross.catalog_cache import get_catalog
+        catalog = get_catalog()
         total_calories = 0
         for row in self.rows:
             energy = 0
@@ -107,9 +109,9 @@ class WorkoutEditorTable(ScrollWidget):
                 energy = row.workout.energy
             else:
                 # Fallback: get energy from workout database
-                exercise_name = row.workout.name
-                if exercise_name in workout_data.data:
-                    energy = workout_data.data[exercise_name].get("energy", 0)
+                record = catalog.get(row.workout.name)
+                if record:
+                    energy = record.energy or 0
                 else:
                     # Last resort: estimate based on intensity
                     intensity_energy = {"high": 13, "medium": 9, "low": 6}
@@ -128,8 +130,16 @@ class WorkoutEditorTable(ScrollWidget):
             'equipment': equipment_list
         }
 
+    def set_available_exercises(self, available_exercises: list[str], exercises_by_category: dict):
+        """Update the exercises offered by the table and its rows."""
+        self.available_exercises = available_exercises
+        self.exercises_by_category = exercises_by_category
+        for row in self.rows:
+            row.available_exercises = available_exercises
+            row.exercises_by_category = exercises_by_category
+
     def add_row(self, workout: Workout, rest_seconds: int = None,
-                index: int = -1):
+                index: int = -1, pinned: bool = False):
         """
         Add workout row at specified index.
 
@@ -137,27 +147,12 @@ class WorkoutEditorTable(ScrollWidget):
             workout: Workout object for this row
             rest_seconds: Rest time after this workout (uses default if None)
             index: Insert position (-1 = append at end)
+            pinned: Keep the row when the routine parameters change (rows added by hand)
         """
         if rest_seconds is None:
             rest_seconds = self.default_rest_time
 
-        row = WorkoutEditorRow(workout, self.available_exercises, rest_seconds, self.exercises_by_category)
-
-        # Connect row signals
-        row.delete_requested.connect(self.on_row_delete)
-        row.insert_above_requested.connect(self.on_insert_above)
-        row.insert_below_requested.connect(self.on_insert_below)
-        row.move_up_requested.connect(self.on_move_up)
-        row.move_down_requested.connect(self.on_move_down)
-        row.data_changed.connect(self.on_data_changed)
-
-        # Connect time copy/paste/apply signals
-        row.copy_duration_requested.connect(self.on_copy_duration)
-        row.paste_duration_requested.connect(self.on_paste_duration)
-        row.apply_duration_to_all_requested.connect(self.on_apply_duration_to_all)
-        row.copy_rest_requested.connect(self.on_copy_rest)
-        row.paste_rest_requested.connect(self.on_paste_rest)
-        row.apply_rest_to_all_requested.connect(self.on_apply_rest_to_all)
+        row = self._create_row(workout, rest_seconds, pinned)
 
         # Insert at correct position
         if index == -1 or index >= len(self.rows):
@@ -177,10 +172,37 @@ class WorkoutEditorTable(ScrollWidget):
 
         self.on_data_changed()
 
+    def _create_row(self, workout: Workout, rest_seconds: int, pinned: bool = False) -> WorkoutEditorRow:
+        """Create a row with its signals connected."""
+        row = WorkoutEditorRow(workout, self.available_exercises, rest_seconds, self.exercises_by_category,
+                               pinned=pinned)
+
+        # Connect row signals
+        row.delete_requested.connect(self.on_row_delete)
+        row.insert_above_requested.connect(self.on_insert_above)
+        row.insert_below_requested.connect(self.on_insert_below)
+        row.move_up_requested.connect(self.on_move_up)
+        row.move_down_requested.connect(self.on_move_down)
+        row.data_changed.connect(self.on_data_changed)
+        row.pinned_changed.connect(self.on_pinned_changed)
+
+        # Connect time copy/paste/apply signals
+        row.copy_duration_requested.connect(self.on_copy_duration)
+        row.paste_duration_requested.connect(self.on_paste_duration)
+        row.apply_duration_to_all_requested.connect(self.on_apply_duration_to_all)
+        row.copy_rest_requested.connect(self.on_copy_rest)
+        row.paste_rest_requested.connect(self.on_paste_rest)
+        row.apply_rest_to_all_requested.connect(self.on_apply_rest_to_all)
+        return row
+
     def on_data_changed(self):
         """Handle data change - emit signal."""
         self.workout_list_changed.emit()
 
+    def on_pinned_changed(self, row: WorkoutEditorRow):
+        """Handle a row being pinned or unpinned - emit signal."""
+        self.pinned_changed.emit()
+
     def remove_row(self, row: WorkoutEditorRow):
         """Remove row from table."""
         if row in self.rows:
@@ -232,13 +254,39 @@ class WorkoutEditorTable(ScrollWidget):
         if last_row:
             new_order.append(last_row)
 
+        self._reorder_rows(new_order)
+
+    def minimise_changeovers(self, warm_up: bool = False, cool_down: bool = False, workout_structure: str = "Random"):
+        """Reorder the workout rows to minimise equipment changes, preserving warm up/cool down if active.
+
+        In Sequence mode the category at every position is kept.
+        """
+        from robocross.changeover import minimise_changeovers
+
+        if len(self.rows) <= 2:
+            return  # Nothing to reorder
+
+        new_order = minimise_changeovers(
+            self.rows,
+            equipment=lambda row: row.workout.equipment,
+            category=lambda row: row.workout.aerobic_type.name,
+            pin_first=warm_up,
+            pin_last=cool_down,
+            keep_category_pattern=workout_structure == "Sequence",
+            key=lambda row: row.workout.name,
+        )
+        if new_order != self.rows:
+            self._reorder_rows(new_order)
+
+    def _reorder_rows(self, new_order: list[WorkoutEditorRow]):
+        """Lay the rows out in a new order."""
         self.rows = new_order
 
         # Remove all rows from layout (but keep them in memory)
         for row in self.rows:
             self.widget.layout().removeWidget(row)
 
-        # Re-add rows in new shuffled order
+        # Re-add rows in new order
         for i, row in enumerate(self.rows):
             # Insert at position i + 1 (skip header row at position 0)
             self.widget.layout().insertWidget(i + 1, row)
@@ -320,6 +368,49 @@ class WorkoutEditorTable(ScrollWidget):
 
             self.add_row(workout, current_rest)
 
+    @property
+    def has_pinned_rows(self) -> bool:
+        """True if any row is kept when the routine parameters change."""
+        return any(row.pinned for row in self.rows)
+
+    @property
+    def pinned_rows(self) -> list[bool]:
+        """Whether each row is pinned, in row order (saved with the session)."""
+        return [row.pinned for row in self.rows]
+
+    def get_slots(self) -> list[Slot]:
+        """The rows as routine slots, for Routine.reroll()."""
+        from robocross.catalog_cache import get_catalog
+
+        catalog = get_catalog()
+        return [Slot(record=catalog.get(row.workout.name), duration=row.workout.time, rest=row.rest_seconds,
+                     pinned=row.pinned) for row in self.rows]
+
+    def apply_slot_updates(self, updates: list[SlotUpdate]):
+        """Apply a re-roll: rows that are kept stay as they are, only the changed rows are updated.
+
+        Args:
+            updates: Routine.reroll() result for the slots from get_slots()
+        """
+        new_rows = []
+        for update in updates:
+            if update.source is None:
+                row = self._create_row(update.item.to_workout(), update.item.rest)
+            else:
+                row = self.rows[update.source]
+                if update.item is not None:
+                    row.set_scheduled_item(update.item)
+            new_rows.append(row)
+
+        kept = set(map(id, new_rows))
+        for row in self.rows:
+            if id(row) not in kept:
+                self.widget.layout().removeWidget(row)
+                row.deleteLater()
+        self._reorder_rows(new_rows)
+        for row in new_rows:
+            row.show()
+
     def get_workout_list(self) -> tuple[list[Workout], list[int]]:
         """
         Get current workout list and rest times from all rows.
@@ -343,13 +434,13 @@ class WorkoutEditorTable(ScrollWidget):
         """Insert blank row above target row."""
         index = self.rows.index(row)
         default_workout = self._create_default_workout()
-        self.add_row(default_workout, self.default_rest_time, index)
+        self.add_row(default_workout, self.default_rest_time, index, pinned=True)
 
     def on_insert_below(self, row: WorkoutEditorRow):
         """Insert blank row below target row."""
         index = self.rows.index(row)
         default_workout = self._create_default_workout()
-        self.add_row(default_workout, self.default_rest_time, index + 1)
+        self.add_row(default_workout, self.default_rest_time, index + 1, pinned=True)
 
     def on_move_up(self, row: WorkoutEditorRow):
         """Move row up one position in the list."""
@@ -1,11 +1,12 @@
 import logging
 import re
 
-from PySide6.QtWidgets import QWidget, QLineEdit, QCheckBox, QComboBox, QSpinBox, QGroupBox, QVBoxLayout, QGridLayout, QHBoxLayout, QLabel, QFormLayout, QMenu, QRadioButton
-from PySide6.QtCore import QSettings, Qt
+from PySide6.QtWidgets import QAbstractSpinBox, QWidget, QLineEdit, QCheckBox, QComboBox, QSpinBox, QGroupBox, QVBoxLayout, QGridLayout, QHBoxLayout, QLabel, QFormLayout, QMenu, QRadioButton
+from PySide6.QtCore import QSettings, Qt, Signal
 
 from core import APPLICATION_NAME, DEVELOPER
 from core.logging_utils import get_logger
+from robocross.intensity_profile import DEFAULT_PROFILE, PROFILES
 from widgets.form_widget import FormWidget
 
 
@@ -13,6 +14,7 @@ LOGGER: logging.Logger = get_logger(name=__name__, level=logging.DEBUG)
 
 
 class WorkoutForm(FormWidget):
+    parameters_changed = Signal()  # emitted when any routine parameter changes
     default_workout_length = 30
     default_interval_time = 120
     default_rest_time = 30
@@ -23,6 +25,9 @@ class WorkoutForm(FormWidget):
     rest_time_key = "rest time"
     warm_up_key = "warm_up"
     cool_down_key = "cool_down"
+    minimise_changeovers_key = "minimise_changeovers"
+    best_of_key = "best_of"
+    intensity_profile_key = "intensity_profile"
 
     def __init__(self, parent_widget: QWidget):
         super(WorkoutForm, self).__init__(title="Workout Parameters")
@@ -74,6 +79,15 @@ class WorkoutForm(FormWidget):
         self.rest_time_spin_box.setToolTip("Rest duration between exercises in seconds")
         left_form_layout.addRow("Approximate Rest Time (seconds):", self.rest_time_spin_box)
 
+        self.best_of_spin_box = QSpinBox()
+        self.best_of_spin_box.setMinimum(1)
+        self.best_of_spin_box.setMaximum(10000)
+        # Steps of one power of ten below the value (1 up to 100, then 10 up to 1000...), rather than 1 -> 101
+        self.best_of_spin_box.setStepType(QAbstractSpinBox.StepType.AdaptiveDecimalStepType)
+        self.best_of_spin_box.setToolTip("Generate this many candidate routines and keep the best: target coverage, "
+                                         "smooth intensity and few equipment changes (Random and Sequence)")
+        left_form_layout.addRow("Best Of (candidates):", self.best_of_spin_box)
+
         # Right column: Warm up, Cool down, Workout mode
         right_options_layout = QVBoxLayout()
         right_options_layout.setSpacing(10)
@@ -86,6 +100,10 @@ class WorkoutForm(FormWidget):
         self.cool_down_checkbox.setToolTip("Force last exercise to be flexibility")
         right_options_layout.addWidget(self.cool_down_checkbox)
 
+        self.minimise_changeovers_checkbox = QCheckBox("Fewer equipment changes")
+        self.minimise_changeovers_checkbox.setToolTip("Order exercises so that consecutive ones share equipment")
+        right_options_layout.addWidget(self.minimise_changeovers_checkbox)
+
         # Add spacing before workout mode radio buttons
         right_options_layout.addSpacing(15)
 
@@ -103,6 +121,22 @@ class WorkoutForm(FormWidget):
         self.sequence_radio.setToolTip("Cycle through selected categories in a random repeating pattern")
         right_options_layout.addWidget(self.sequence_radio)
 
+        self.balanced_radio = QRadioButton("Balanced")
+        self.balanced_radio.setToolTip("Space out repeats, cover every selected target and avoid long runs of "
+                                       "high intensity exercises")
+        right_options_layout.addWidget(self.balanced_radio)
+
+        profile_layout = QHBoxLayout()
+        self.profile_radio = QRadioButton("Profile")
+        self.profile_radio.setToolTip("Follow an intensity curve over the session")
+        profile_layout.addWidget(self.profile_radio)
+        self.intensity_profile_combo_box = QComboBox()
+        self.intensity_profile_combo_box.addItems(list(PROFILES))
+        self.intensity_profile_combo_box.setToolTip("Intensity curve of the Profile mode")
+        profile_layout.addWidget(self.intensity_profile_combo_box)
+        profile_layout.addStretch()
+        right_options_layout.addLayout(profile_layout)
+
         right_options_layout.addStretch()
 
         # Add both columns to columns layout
@@ -119,9 +153,8 @@ class WorkoutForm(FormWidget):
         # Category and target checkboxes (read from workout data)
         self.category_checkboxes: dict[str, QCheckBox] = {}
         self.target_checkboxes: dict[str, QCheckBox] = {}
-        from robocross.workout_data import WorkoutData
+        from robocross.catalog_cache import get_catalog
         from robocross.robocross_enums import Target
-        workout_data = WorkoutData()
         category_tooltips = {
             "cardio": "Include cardiovascular exercises (running, jumping, etc.)",
             "strength": "Include strength training exercises (weights, resistance, etc.)",
@@ -140,7 +173,7 @@ class WorkoutForm(FormWidget):
         categories_layout.addWidget(categories_label)
 
         # Read categories from workout data (top-level keys in JSON)
-        categories = sorted(workout_data.categories)
+        categories = sorted(get_catalog().categories)
         for category in categories:
             # Create horizontal row: [Checkbox] [Label] [SpinBox]
             row_layout = QHBoxLayout()
@@ -263,6 +296,16 @@ class WorkoutForm(FormWidget):
         """Return True if cool down is enabled (force last exercise to be flexibility)."""
         return self.cool_down_checkbox.isChecked()
 
+    @property
+    def minimise_changeovers(self) -> bool:
+        """Return True if exercises are ordered to minimise equipment changes."""
+        return self.minimise_changeovers_checkbox.isChecked()
+
+    @property
+    def best_of(self) -> int:
+        """Return the number of candidate routines the best is chosen from."""
+        return self.best_of_spin_box.value()
+
     @property
     def selected_targets(self) -> list[str]:
         """Return list of selected target names. Empty list means all targets."""
@@ -293,8 +336,19 @@ class WorkoutForm(FormWidget):
 
     @property
     def workout_structure(self) -> str:
-        """Return 'Random' or 'Sequence' based on radio button selection."""
-        return "Random" if self.random_radio.isChecked() else "Sequence"
+        """Return 'Random', 'Sequence', 'Balanced' or 'Profile' based on radio button selection."""
+        if self.sequence_radio.isChecked():
+            return "Sequence"
+        if self.balanced_radio.isChecked():
+            return "Balanced"
+        if self.profile_radio.isChecked():
+            return "Profile"
+        return "Random"
+
+    @property
+    def intensity_profile(self) -> str:
+        """Return the intensity curve of the Profile mode."""
+        return self.intensity_profile_combo_box.currentText()
 
     def _save_workout_name_to_settings(self):
         """Save workout name to settings."""
@@ -521,6 +575,7 @@ class WorkoutForm(FormWidget):
         self.length_spin_box.setValue(self.settings.value(self.length_key, self.default_workout_length))
         self.interval_spin_box.setValue(self.settings.value(self.interval_key, self.default_interval_time))
         self.rest_time_spin_box.setValue(self.settings.value(self.rest_time_key, self.default_rest_time))
+        self.best_of_spin_box.setValue(self.settings.value(self.best_of_key, 1, type=int))
         self.workout_cycles_spin_box.setValue(1)  # Always defaults to 1 (NOT saved to settings)
 
         # Initialize category checkboxes from settings
@@ -549,6 +604,10 @@ class WorkoutForm(FormWidget):
         workout_structure = self.settings.value("workout_structure", "Random", type=str)
         if workout_structure == "Sequence":
             self.sequence_radio.setChecked(True)
+        elif workout_structure == "Balanced":
+            self.balanced_radio.setChecked(True)
+        elif workout_structure == "Profile":
+            self.profile_radio.setChecked(True)
         else:
             self.random_radio.setChecked(True)
 
@@ -559,6 +618,17 @@ class WorkoutForm(FormWidget):
         self.sequence_radio.toggled.connect(
             lambda checked: self.settings.setValue("workout_structure", "Sequence") if checked else None
         )
+        self.balanced_radio.toggled.connect(
+            lambda checked: self.settings.setValue("workout_structure", "Balanced") if checked else None
+        )
+        self.profile_radio.toggled.connect(
+            lambda checked: self.settings.setValue("workout_structure", "Profile") if checked else None
+        )
+        intensity_profile = self.settings.value(self.intensity_profile_key, DEFAULT_PROFILE, type=str)
+        self.intensity_profile_combo_box.setCurrentText(intensity_profile if intensity_profile in PROFILES
+                                                        else DEFAULT_PROFILE)
+        self.intensity_profile_combo_box.currentTextChanged.connect(
+            lambda text: self.settings.setValue(self.intensity_profile_key, text))
 
         # Connect checkbox signals
         for category, checkbox in self.category_checkboxes.items():
@@ -604,14 +674,31 @@ class WorkoutForm(FormWidget):
         self.warm_up_checkbox.setChecked(warm_up_enabled)
         cool_down_enabled = self.settings.value(self.cool_down_key, False, type=bool)
         self.cool_down_checkbox.setChecked(cool_down_enabled)
+        self.minimise_changeovers_checkbox.setChecked(
+            self.settings.value(self.minimise_changeovers_key, False, type=bool))
 
         # Connect signals
         self.workout_name_line_edit.textChanged.connect(self._on_workout_name_changed)
         self.length_spin_box.valueChanged.connect(lambda: self.settings.setValue(self.length_key, self.length))
         self.interval_spin_box.valueChanged.connect(lambda: self.settings.setValue(self.interval_key, self.interval))
         self.rest_time_spin_box.valueChanged.connect(lambda: self.settings.setValue(self.rest_time_key, self.rest_time))
+        self.best_of_spin_box.valueChanged.connect(lambda: self.settings.setValue(self.best_of_key, self.best_of))
         self.warm_up_checkbox.stateChanged.connect(lambda: self.settings.setValue(self.warm_up_key, self.warm_up))
         self.cool_down_checkbox.stateChanged.connect(lambda: self.settings.setValue(self.cool_down_key, self.cool_down))
+        self.minimise_changeovers_checkbox.stateChanged.connect(
+            lambda: self.settings.setValue(self.minimise_changeovers_key, self.minimise_changeovers))
+
+        # Notify routine parameter changes
+        for spin_box in [self.length_spin_box, self.interval_spin_box, self.rest_time_spin_box, self.best_of_spin_box,
+                         *self.category_weight_spinboxes.values()]:
+            spin_box.valueChanged.connect(lambda *args: self.parameters_changed.emit())
+        for checkbox in [self.warm_up_checkbox, self.cool_down_checkbox, self.minimise_changeovers_checkbox,
+                         self.all_targets_checkbox, *self.category_checkboxes.values(),
+                         *self.target_checkboxes.values()]:
+            checkbox.stateChanged.connect(lambda *args: self.parameters_changed.emit())
+        for radio in (self.random_radio, self.sequence_radio, self.balanced_radio, self.profile_radio):
+            radio.toggled.connect(lambda checked: self.parameters_changed.emit() if checked else None)
+        self.intensity_profile_combo_box.currentTextChanged.connect(lambda *args: self.parameters_changed.emit())
 
     def _on_workout_name_changed(self):
         """Filter workout name input to only allow lowercase letters and underscores."""
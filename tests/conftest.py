@@ -0,0 +1,9 @@
+"""Make the project packages (core, robocross, widgets) importable from the tests."""
+import sys
+
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parents[1]
+
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
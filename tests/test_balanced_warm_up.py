@@ -0,0 +1,34 @@
+"""Balanced routines keep their hard constraints with warm up and cool down on."""
+import pytest
+
+from robocross.robocross_enums import AerobicType, Intensity
+from robocross.routine import Routine
+from robocross import REST_PERIOD
+
+SEEDS = range(50)
+REPEAT_SPACING = 4
+MAX_CONSECUTIVE_HIGH = 2
+
+
+def balanced_exercises(seed: int) -> list:
+    routine = Routine(workout_structure="Balanced", warm_up=True, cool_down=True, seed=seed,
+                      selected_categories=["cardio", "strength", "flexibility"],
+                      min_repeat_spacing=REPEAT_SPACING, max_consecutive_high=MAX_CONSECUTIVE_HIGH)
+    return [workout for workout in routine.balanced_workout if workout.name != REST_PERIOD]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_warm_up_cool_down_keep_constraints(seed):
+    exercises = balanced_exercises(seed)
+    assert exercises
+    assert exercises[0].aerobic_type is AerobicType.cardio
+    assert exercises[-1].aerobic_type is AerobicType.flexibility
+
+    last_seen = {}
+    run = 0
+    for position, exercise in enumerate(exercises):
+        previous = last_seen.get(exercise.name)
+        assert previous is None or position - previous > REPEAT_SPACING, f"{exercise.name} repeated too soon"
+        last_seen[exercise.name] = position
+        run = run + 1 if exercise.intensity is Intensity.high else 0
+        assert run <= MAX_CONSECUTIVE_HIGH, f"{run} high intensity exercises in a row at {position}"
@@ -0,0 +1,43 @@
+"""Bulk generation writes the same routines in the same order whatever the number of workers."""
+import io
+import json
+
+from robocross.bulk_generate import generate, main, make_jobs
+from robocross.sampling import spawn_seeds
+from robocross.schema import validate_session
+
+MATRIX = {"workout_length": [10, 20], "workout_structure": ["Random", "Balanced", "Profile"]}
+
+
+def sessions(text: str) -> list[dict]:
+    """Sessions without the time they were written."""
+    lines = [json.loads(line) for line in text.splitlines()]
+    for line in lines:
+        del line["saved_at"]
+    return lines
+
+
+def run(workers: int) -> list[dict]:
+    output = io.StringIO()
+    jobs = make_jobs(MATRIX, spawn_seeds(2024, 3))
+    assert generate(jobs, output, workers=workers, chunksize=2) == len(jobs) == 18
+    return sessions(output.getvalue())
+
+
+def test_workers_do_not_change_output():
+    single = run(workers=1)
+    assert run(workers=2) == single
+    assert [session["workout_name"] for session in single[:3]] == ["Random 10 min #0", "Random 10 min #1",
+                                                                   "Random 10 min #2"]
+    for session in single:
+        validation = validate_session(session)
+        assert not validation.issues and len(validation.schedule) == len(session["workouts"])
+
+
+def test_base_seed_reproduces_file(tmp_path):
+    args = ["--length", "10", "--structure", "Sequence", "--seeds", "4", "--seed", "7", "--workers", "1"]
+    main(args + ["-o", str(tmp_path / "a.jsonl")])
+    main(args + ["-o", str(tmp_path / "b.jsonl")])
+    first = sessions((tmp_path / "a.jsonl").read_text(encoding="utf-8"))
+    assert first == sessions((tmp_path / "b.jsonl").read_text(encoding="utf-8")) and len(first) == 4
+    assert len({session["routine"]["seed"] for session in first}) == 4
@@ -0,0 +1,86 @@
+"""Catalog snapshots round-trip the workout data exactly, and the cache falls back to the JSON when it must."""
+import hashlib
+import json
+
+import pytest
+
+from robocross import catalog_cache
+from robocross.catalog_snapshot import CatalogSnapshot, SnapshotError, SourceStamp, compile_snapshot
+from robocross.exercise_catalog import ExerciseCatalog
+from robocross.robocross_enums import Equipment, Intensity, Target
+
+LIBRARY = {
+    "cardio": {
+        "burpees": {"description": "jump", "equipment": [], "intensity": "high", "target": ["full_body"],
+                    "energy": 12},
+        "skipping": {"description": "skip", "equipment": ["jump_rope"], "intensity": "medium", "target": ["legs"],
+                     "sub_workouts": ["single unders", "double unders"], "energy": 11.5},
+    },
+    "strength": {
+        # As written by workout_data.convert_to_data_file()
+        "curls": {"description": "curl", "equipment": ["dumbbell"], "intensity": "low", "target": ["arms"],
+                  "time": 45, "energy": 6},
+        "plank": {"intensity": "low", "description": "hold", "notes": {"cue": "brace"}},
+    },
+}
+STAMP = SourceStamp(mtime_ns=1, size=2, sha256=bytes(32))
+
+
+@pytest.fixture
+def snapshot(tmp_path) -> CatalogSnapshot:
+    path = tmp_path / "library.rxcs"
+    path.write_bytes(compile_snapshot(LIBRARY, STAMP))
+    return CatalogSnapshot(path)
+
+
+def test_raw_data_round_trips_with_unknown_keys(snapshot):
+    catalog = ExerciseCatalog.from_snapshot(snapshot)
+    assert json.dumps(catalog.hierarchical_data, default=dict) == json.dumps(LIBRARY)
+    assert list(catalog.hierarchical_data["strength"]["curls"]) == list(LIBRARY["strength"]["curls"])
+
+
+def test_records_decode(snapshot):
+    skipping = snapshot.records[1]
+    assert (skipping.name, skipping.category, skipping.intensity) == ("skipping", "cardio", Intensity.medium)
+    assert skipping.equipment == (Equipment.jump_rope,) and skipping.target == (Target.legs,)
+    assert skipping.sub_workouts == ("single unders", "double unders") and skipping.energy == 11.5
+    assert snapshot.records[0].energy == 12 and isinstance(snapshot.records[0].energy, int)
+    assert snapshot.records[2].name == "curls" and snapshot.source_stamp == STAMP
+
+
+def test_truncated_snapshot_is_rejected(tmp_path):
+    path = tmp_path / "library.rxcs"
+    path.write_bytes(compile_snapshot(LIBRARY, STAMP)[:-10])
+    with pytest.raises(SnapshotError):
+        CatalogSnapshot(path)
+
+
+def test_cache_compiles_then_reuses_snapshot(tmp_path, monkeypatch):
+    source = tmp_path / "workout_data.json"
+    source.write_text(json.dumps(LIBRARY))
+    snapshot_path = tmp_path / "cache.rxcs"
+    monkeypatch.setattr(catalog_cache, "snapshot_path_for", lambda path: snapshot_path)
+    catalog_cache.invalidate()
+
+    catalog = catalog_cache.get_catalog(source)
+    assert catalog.snapshot is not None and snapshot_path.exists()
+    assert CatalogSnapshot(snapshot_path).source_stamp.sha256 == hashlib.sha256(source.read_bytes()).digest()
+
+    catalog_cache.invalidate()
+    assert catalog_cache.get_catalog(source).snapshot is not None  # Warm start from the snapshot
+    catalog_cache.invalidate()
+
+
+def test_cache_falls_back_to_json(tmp_path, monkeypatch):
+    source = tmp_path / "workout_data.json"
+    source.write_text(json.dumps(LIBRARY))
+    snapshot_path = tmp_path / "cache.rxcs"
+    snapshot_path.mkdir()  # Cannot be written
+    monkeypatch.setattr(catalog_cache, "snapshot_path_for", lambda path: snapshot_path)
+    catalog_cache.invalidate()
+
+    catalog = catalog_cache.get_catalog(source)
+    assert catalog.snapshot is None
+    assert [record.name for record in catalog.records] == ["burpees", "skipping", "curls", "plank"]
+    assert catalog.hierarchical_data["strength"]["curls"]["time"] == 45
+    catalog_cache.invalidate()
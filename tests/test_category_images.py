@@ -0,0 +1,75 @@
+"""Recolouring kernels match PIL, and batch renders are skipped once up to date (skipped images included)."""
+import numpy as np
+import pytest
+
+from PIL import Image
+
+from core.image_utils import fill_background_pixels, fill_foreground_pixels, tint_pixels
+from robocross import category_images
+from robocross.category_images import is_up_to_date, make_jobs, render, render_all
+
+RGB = (52, 152, 219)
+
+
+@pytest.fixture
+def rgba() -> np.ndarray:
+    pixels = np.random.default_rng(0).integers(0, 256, size=(64, 64, 4), dtype=np.uint8)
+    pixels[:8, :, 3] = 0
+    pixels[8:16, :, 3] = 255
+    return pixels
+
+
+@pytest.mark.parametrize("factor", [0.0, 0.3, 0.5, 1.0])
+def test_tint_matches_blend(rgba, factor):
+    rgb = np.ascontiguousarray(rgba[..., :3])
+    image = Image.fromarray(rgb)
+    expected = Image.blend(image, Image.new("RGB", image.size, RGB), factor)
+    assert np.array_equal(tint_pixels(rgb, RGB, factor), np.asarray(expected))
+
+
+def test_fill_background_matches_alpha_composite(rgba):
+    image = Image.fromarray(rgba)
+    expected = Image.alpha_composite(Image.new("RGBA", image.size, (*RGB, 255)), image)
+    assert np.array_equal(fill_background_pixels(rgba, RGB), np.asarray(expected))
+
+
+def test_fill_foreground(rgba):
+    result = fill_foreground_pixels(rgba, RGB)
+    visible = rgba[..., 3] > 0
+    assert (result[visible] == (*RGB, 255)).all()
+    assert np.array_equal(result[~visible], rgba[~visible])
+
+
+def grey_icon() -> Image.Image:
+    image = Image.new("RGBA", (16, 16))
+    image.paste((90, 90, 90, 255), (4, 4, 12, 12))
+    return image
+
+
+def test_extension_is_kept_in_output_name(tmp_path):
+    source = tmp_path / "images"
+    source.mkdir()
+    grey_icon().save(source / "foo.png")
+    grey_icon().convert("RGB").save(source / "foo.jpg")
+    outputs = {job.output.name for job in make_jobs([source], tmp_path / "out", colors={"cardio": "#3498DB"})}
+    assert outputs == {"foo.png.png", "foo.jpg.png"}
+
+
+def test_monochrome_skip_is_remembered(tmp_path, monkeypatch):
+    source = tmp_path / "images"
+    source.mkdir()
+    grey_icon().save(source / "icon.png")
+    Image.fromarray(np.full((16, 16, 4), (200, 10, 10, 255), dtype=np.uint8)).save(source / "photo.png")
+    jobs = make_jobs([source], tmp_path / "out", colors={"cardio": "#3498DB"}, monochrome_only=True)
+    assert render_all(jobs, workers=1) == 1
+    icon, photo = sorted(jobs, key=lambda job: job.source.name)
+    assert icon.output.exists() and not photo.output.exists() and photo.skip_marker.exists()
+    assert all(map(is_up_to_date, jobs))
+
+    analysed = []
+    monkeypatch.setattr(category_images, "render", lambda job: analysed.append(job) or render(job))
+    assert render_all(jobs, workers=1) == 0 and analysed == []
+
+    # A different colour is a different render, whatever the marker says
+    recoloured = make_jobs([source], tmp_path / "out", colors={"cardio": "#FF0000"}, monochrome_only=True)
+    assert not any(map(is_up_to_date, recoloured))
@@ -0,0 +1,36 @@
+"""Changeover minimisation keeps copies of an exercise apart."""
+from robocross.changeover import minimise_changeovers, total_changeover_cost
+from robocross.robocross_enums import Equipment
+
+DUMBBELL = (Equipment.dumbbell,)
+STATIONS = [("swing", DUMBBELL), ("run", ()), ("swing", DUMBBELL), ("jump", ()), ("goblet squat", DUMBBELL),
+            ("run", ())]
+
+
+def names(stations: list) -> list[str]:
+    return [name for name, _ in stations]
+
+
+def adjacent_copies(stations: list) -> int:
+    return sum(a == b for a, b in zip(names(stations), names(stations)[1:]))
+
+
+def test_equipment_only_order_groups_copies():
+    ordered = minimise_changeovers(STATIONS, equipment=lambda station: station[1])
+    assert total_changeover_cost(frozenset(equipment) for _, equipment in ordered) == 1
+    assert adjacent_copies(ordered) > 0
+
+
+def test_key_keeps_copies_apart():
+    ordered = minimise_changeovers(STATIONS, equipment=lambda station: station[1], key=lambda station: station[0])
+    assert sorted(ordered) == sorted(STATIONS)
+    assert adjacent_copies(ordered) == 0
+    assert total_changeover_cost(frozenset(equipment) for _, equipment in ordered) == 1
+
+
+def test_key_keeps_pinned_stations():
+    stations = [("run", ())] + STATIONS + [("swing", DUMBBELL)]
+    ordered = minimise_changeovers(stations, equipment=lambda station: station[1], pin_first=True, pin_last=True,
+                                   key=lambda station: station[0])
+    assert ordered[0] == stations[0] and ordered[-1] == stations[-1]
+    assert adjacent_copies(ordered) == 0
@@ -0,0 +1,51 @@
+"""Catalog queries (bitmask columns) match the set logic they replaced, from JSON and from a snapshot."""
+import json
+
+import numpy as np
+import pytest
+
+from core.core_paths import DATA_FILE_PATH
+from robocross.catalog_snapshot import CatalogSnapshot, SourceStamp, compile_snapshot
+from robocross.exercise_catalog import ExerciseCatalog
+from robocross.robocross_enums import Equipment, Intensity, Target
+from robocross.schema import validate_catalog
+
+DATA = validate_catalog(json.loads(DATA_FILE_PATH.read_text(encoding="utf-8"))).data
+
+
+@pytest.fixture(params=["json", "snapshot"])
+def catalog(request, tmp_path) -> ExerciseCatalog:
+    if request.param == "json":
+        return ExerciseCatalog.from_json_data(DATA)
+    path = tmp_path / "catalog.rxcs"
+    path.write_bytes(compile_snapshot(DATA, SourceStamp(mtime_ns=0, size=0, sha256=bytes(32))))
+    return ExerciseCatalog.from_snapshot(CatalogSnapshot(path))
+
+
+def expected_ids(catalog, nope_list=(), equipment_filter=(), categories=None, targets=None, intensities=None):
+    """The filters as plain set membership over the records."""
+    return [record.index for record in catalog.records
+            if record.name not in nope_list
+            and not set(record.equipment) & set(equipment_filter)
+            and (categories is None or record.category in categories)
+            and (not targets or set(record.target) & set(targets))
+            and (not intensities or record.intensity in intensities)]
+
+
+def test_random_filters_match_set_logic(catalog):
+    rng = np.random.default_rng(0)
+
+    def pick(items: list, most: int) -> list:
+        return [items[i] for i in rng.permutation(len(items))[:rng.integers(0, most + 1)]]
+
+    names = [record.name for record in catalog.records]
+    for _ in range(200):
+        kwargs = dict(nope_list=pick(names, 4), equipment_filter=pick(list(Equipment), 3),
+                      categories=None if rng.random() < 0.3 else pick(catalog.categories + ["unknown"], 2),
+                      targets=pick(list(Target), 2), intensities=pick(list(Intensity), 2))
+        assert catalog.query_ids(**kwargs) == expected_ids(catalog, **kwargs), kwargs
+
+
+def test_no_filters_returns_everything(catalog):
+    assert catalog.query_ids() == list(range(len(catalog)))
+    assert catalog.query(categories=[]) == []
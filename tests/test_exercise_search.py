@@ -0,0 +1,79 @@
+"""Search ranks name matches first and tolerates typos, finding what a scan of every term would."""
+import json
+
+import numpy as np
+
+from core.core_paths import DATA_FILE_PATH
+from robocross.exercise_catalog import ExerciseCatalog
+from robocross.exercise_search import (
+    EXACT_MATCH, FUZZY_MATCH, PREFIX_MATCH, ExerciseSearchIndex, _max_distance, _prefix_distance, tokenize)
+from robocross.schema import validate_catalog
+
+LIBRARY = {
+    "strength": {
+        "plank": {"description": "hold a straight line", "equipment": ["mat"], "intensity": "low", "target": ["core"]},
+        "squats": {"description": "bend the legs", "equipment": ["dumbbell"], "intensity": "medium",
+                   "target": ["legs"]},
+        "side plank": {"description": "hold on one elbow", "equipment": ["mat"], "intensity": "low",
+                       "target": ["core"]},
+        "wall sit": {"description": "squats against a wall, held", "equipment": [], "intensity": "low",
+                     "target": ["legs"]},
+    },
+    "combat": {
+        "front kicks": {"description": "snapping kicks", "equipment": [], "intensity": "high", "target": ["legs"],
+                        "sub_workouts": ["mae geri"]},
+    },
+}
+
+
+def names(index: ExerciseSearchIndex, query: str, **kwargs) -> list[str]:
+    return [index.names[result.index] for result in index.search(query, **kwargs)]
+
+
+def make_index(data: dict) -> ExerciseSearchIndex:
+    return ExerciseSearchIndex(ExerciseCatalog.from_json_data(data).records)
+
+
+def test_ranking():
+    index = make_index(LIBRARY)
+    assert names(index, "squats") == ["squats", "wall sit"]  # Name before description
+    assert names(index, "plank") == ["plank", "side plank"]  # Name prefix bonus
+    assert names(index, "geri") == ["front kicks"]  # Sub-workout
+    assert names(index, "mat") == ["plank", "side plank"]  # Equipment
+    assert names(index, "") == [] and names(index, "plank hold") == ["plank", "side plank"]
+    assert names(index, "plank", candidates={2}) == ["side plank"]
+
+
+def test_prefix_and_typo_tolerance():
+    index = make_index(LIBRARY)
+    assert names(index, "squ") == ["squats", "wall sit"]
+    assert names(index, "plnk") == ["plank", "side plank"]
+    assert names(index, "plk") == []  # Too short to correct
+    assert names(index, "qsuats") == []  # Fuzzy matches keep the first letter
+    assert names(index, "sqats") == ["squats", "wall sit"]
+    assert index.search("sqats")[0].score == 8 * FUZZY_MATCH[1]
+    assert names(index, "sqauts") == []  # A transposition is two edits, too many for a short word
+    assert FUZZY_MATCH[1] < PREFIX_MATCH < EXACT_MATCH
+
+
+def test_fuzzy_candidates_match_a_full_scan():
+    data = validate_catalog(json.loads(DATA_FILE_PATH.read_text(encoding="utf-8"))).data
+    index = make_index(data)
+    rng = np.random.default_rng(0)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    terms = [term for term in index.terms if len(term) >= 4]
+    for _ in range(200):
+        term = terms[rng.integers(len(terms))]
+        token = list(term[:rng.integers(4, 10)])
+        for _ in range(rng.integers(0, 3)):
+            position = rng.integers(1, len(token))  # Keep the first letter
+            token[position] = letters[rng.integers(len(letters))]
+        token = "".join(token)
+        if len(tokenize(token)) != 1:
+            continue
+        max_distance = _max_distance(token)
+        expected = {term for term in index.terms if term.startswith(token)
+                    or (term[0] == token[0] and _prefix_distance(token, term[:len(token) + max_distance],
+                                                                 max_distance) is not None)}
+        found = {i for term in expected for i in index.postings[term]}
+        assert set(index._match_token(token)) == found, token
@@ -0,0 +1,69 @@
+"""The SQLite store answers queries like the catalog, and the shared catalog follows its revision."""
+import json
+
+import numpy as np
+import pytest
+
+from core.core_paths import DATA_FILE_PATH
+from robocross import catalog_cache, exercise_store, workout_data
+from robocross.exercise_catalog import ExerciseCatalog
+from robocross.exercise_store import SqliteExerciseStore
+from robocross.robocross_enums import Equipment, Intensity, Target
+from robocross.schema import validate_catalog
+
+DATA = validate_catalog(json.loads(DATA_FILE_PATH.read_text(encoding="utf-8"))).data
+CURLS = {"description": "curl", "equipment": ["dumbbell"], "intensity": "low", "target": ["arms"]}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch) -> SqliteExerciseStore:
+    monkeypatch.setattr(catalog_cache, "snapshot_path_for", lambda path: tmp_path / "cache.rxcs")
+    catalog_cache.invalidate()
+    yield SqliteExerciseStore(tmp_path / "exercises.sqlite3", seed_path=DATA_FILE_PATH)
+    catalog_cache.invalidate()
+
+
+def test_sql_query_matches_catalog(store):
+    catalog = ExerciseCatalog.from_json_data(DATA)
+    rng = np.random.default_rng(0)
+
+    def pick(items: list, most: int) -> list:
+        return [items[i] for i in rng.permutation(len(items))[:rng.integers(0, most + 1)]]
+
+    names = [record.name for record in catalog.records]
+    for _ in range(100):
+        kwargs = dict(nope_list=pick(names, 4), equipment_filter=pick(list(Equipment), 3),
+                      categories=None if rng.random() < 0.3 else pick(catalog.categories, 2),
+                      targets=pick(list(Target), 2), intensities=pick(list(Intensity), 2))
+        assert store.query(**kwargs) == [record.name for record in catalog.query(**kwargs)], kwargs
+
+
+def test_edits_bump_revision(store):
+    store_id, revision = store.version()
+    store.upsert("strength", "curls", CURLS)
+    assert store.version() == (store_id, revision + 1)
+    assert not store.delete("strength", "missing")
+    assert store.version() == (store_id, revision + 1)
+    assert store.delete("strength", "curls")
+    assert store.version() == (store_id, revision + 2)
+
+
+def test_catalog_follows_revision(store):
+    catalog = catalog_cache.get_catalog(store.path)
+    assert catalog_cache.get_catalog(store.path) is catalog
+    store.upsert("strength", "curls", CURLS)
+    updated = catalog_cache.get_catalog(store.path)
+    assert updated is not catalog and "curls" in updated.by_name
+
+    catalog_cache.invalidate()
+    assert catalog_cache.get_catalog(store.path).snapshot is not None  # Warm start at the same revision
+
+
+def test_workout_data_queries_the_store(store, monkeypatch):
+    monkeypatch.setattr(workout_data, "get_store", lambda: store)
+    queries = []
+    monkeypatch.setattr(store, "query", lambda **filters: queries.append(filters) or ["burpees", "missing"])
+    records = workout_data.WorkoutData(selected_categories=["cardio"]).records
+    assert [record.name for record in records] == ["burpees"] and queries
+    assert records[0] is catalog_cache.get_catalog(store.path).records[records[0].index]
+    assert exercise_store.JsonExerciseStore.pushes_down_queries is False
@@ -0,0 +1,68 @@
+"""Image analysis matches PIL's bounding box and a per-pixel colour check."""
+import os
+
+import numpy as np
+import pytest
+
+from PIL import Image
+
+from core import image_analysis
+from core.image_analysis import analyse_image, analyse_image_file, analyse_pixels
+
+
+def random_icon(rng) -> np.ndarray:
+    """Grey or coloured artwork somewhere on a transparent background, possibly empty or full."""
+    height, width = rng.integers(1, 40, size=2)
+    rgba = np.zeros((height, width, 4), dtype=np.uint8)
+    top, left = rng.integers(0, height), rng.integers(0, width)
+    bottom, right = rng.integers(top, height + 1), rng.integers(left, width + 1)
+    grey = rng.integers(0, 256, size=(bottom - top, right - left, 1), dtype=np.uint8)
+    rgba[top:bottom, left:right, :3] = grey
+    rgba[top:bottom, left:right, 3] = rng.integers(0, 256, size=(bottom - top, right - left))
+    if rng.random() < 0.5:  # One coloured pixel, visible or not
+        y, x = rng.integers(0, height), rng.integers(0, width)
+        rgba[y, x, :3] = (200, 10, 10)
+    if rng.random() < 0.1:
+        rgba[..., 3] = 255
+    return rgba
+
+
+def reference_is_greyscale(rgba: np.ndarray) -> bool:
+    return all(r == g == b for row in rgba.tolist() for r, g, b, a in row if a > 0)
+
+
+@pytest.mark.parametrize("chunk_pixels", [1, 7, 1 << 17])
+def test_matches_pil_and_pixel_loop(monkeypatch, chunk_pixels):
+    monkeypatch.setattr(image_analysis, "CHUNK_PIXELS", chunk_pixels)  # Colour check across block boundaries
+    rng = np.random.default_rng(chunk_pixels)
+    for _ in range(300):
+        rgba = random_icon(rng)
+        analysis = analyse_pixels(rgba)
+        assert analysis.bounding_box == Image.fromarray(rgba).getchannel("A").getbbox()
+        assert analysis.has_transparency == bool((rgba[..., 3] == 0).any())
+        assert analysis.is_greyscale == reference_is_greyscale(rgba)
+
+
+def test_padding():
+    rgba = np.zeros((20, 30, 4), dtype=np.uint8)
+    rgba[2:15, 5:27] = (90, 90, 90, 255)
+    analysis = analyse_pixels(rgba)
+    assert analysis.padding == (2, 5, 5, 3) and analysis.has_padding(2) and not analysis.has_padding(4)
+    assert analysis.is_monochrome_transparent
+    assert analyse_pixels(np.zeros((4, 4, 4), dtype=np.uint8)).padding.minimum == 4
+
+
+def test_opaque_images():
+    assert analyse_image(Image.new("L", (8, 8), 120)).is_greyscale
+    analysis = analyse_image(Image.new("RGB", (8, 8), (1, 2, 3)))
+    assert not analysis.is_greyscale and not analysis.has_transparency and analysis.bounding_box == (0, 0, 8, 8)
+
+
+def test_file_analysis_follows_changes(tmp_path):
+    path = tmp_path / "icon.png"
+    Image.new("RGBA", (8, 8), (90, 90, 90, 255)).save(path)
+    assert analyse_image_file(path).is_greyscale
+    Image.new("RGBA", (8, 9), (200, 10, 10, 255)).save(path)
+    os.utime(path, ns=(1, 1))
+    assert not analyse_image_file(path).is_greyscale
+    assert analyse_image_file(tmp_path / "missing.png") is None
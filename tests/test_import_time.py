@@ -0,0 +1,41 @@
+"""Importing the robocross package stays cheap: the catalog and NumPy load on first use, not at import."""
+import os
+import subprocess
+import sys
+
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parents[1]
+IMPORT_BUDGET_US = 100_000  # Cumulative import time of the package, generous for slow machines
+DEFERRED_MODULES = ("robocross.catalog_cache", "robocross.exercise_catalog", "numpy")
+
+
+def import_times(statement: str) -> dict[str, int]:
+    """Cumulative import time (microseconds) of every module imported by statement, in a fresh interpreter."""
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_ROOT))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=PROJECT_ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def test_import_defers_catalog_and_numpy():
+    times = import_times("import robocross")
+    assert "robocross" in times
+    for module in DEFERRED_MODULES:
+        assert module not in times, f"import robocross imported {module}"
+
+
+def test_import_time_budget():
+    times = import_times("import robocross")
+    assert times["robocross"] < IMPORT_BUDGET_US, f"import robocross took {times['robocross'] / 1000:.1f} ms"
+
+
+def test_catalog_attribute_resolves_lazily():
+    times = import_times("import robocross; robocross.WORKOUT_CATEGORIES")
+    assert "robocross.catalog_cache" in times
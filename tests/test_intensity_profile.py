@@ -0,0 +1,51 @@
+"""The level plan is optimal within the capacities (checked against brute force) and follows the profiles."""
+import itertools
+
+import numpy as np
+import pytest
+
+from robocross.intensity_profile import LEVELS, PROFILES, ProfilePlanner, plan_levels, profile_curve, record_level
+from robocross.routine import Routine
+
+
+def cost(plan, targets) -> float:
+    return sum(abs(level - target) for level, target in zip(plan, targets) if level is not None)
+
+
+def brute_force(targets, capacities) -> float:
+    best = float("inf")
+    for plan in itertools.product(LEVELS, repeat=len(targets)):
+        if all(plan.count(level) <= capacities.get(level, 0) for level in LEVELS):
+            best = min(best, cost(plan, targets))
+    return best
+
+
+def test_plan_is_optimal():
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        count = int(rng.integers(1, 8))
+        targets = [float(target) for target in rng.choice([0, 0.5, 1, 1.5, 2, rng.random() * 2], size=count)]
+        capacities = {level: int(rng.integers(0, count + 1)) for level in LEVELS}
+        if sum(capacities.values()) < count:
+            capacities[int(rng.choice(LEVELS))] += count - sum(capacities.values())
+        plan = plan_levels(targets, capacities)
+        assert None not in plan and all(plan.count(level) <= capacities[level] for level in LEVELS)
+        assert cost(plan, targets) == pytest.approx(brute_force(targets, capacities)), (targets, capacities)
+
+
+def test_plan_beyond_capacity_leaves_out_lowest_targets():
+    targets = [2.0, 0.0, 1.0, 0.5, 1.5]
+    plan = plan_levels(targets, {0: 1, 2: 2})
+    assert plan == [2, None, 0, None, 2]
+    assert plan_levels(targets, {}) == [None] * 5
+
+
+@pytest.mark.parametrize("profile", list(PROFILES))
+def test_routine_follows_profile(profile):
+    routine = Routine(workout_structure="Profile", intensity_profile=profile, workout_length=30, seed=5)
+    routine.get_workout_list()
+    levels = [record_level(item.spec) for item in routine.schedule]
+    targets = profile_curve(profile, len(levels))
+    assert all(min(LEVELS) <= target <= max(LEVELS) for target in targets)
+    planner = ProfilePlanner(routine.pools.by_category, min_repeat_spacing=routine.min_repeat_spacing)
+    assert cost(levels, targets) == pytest.approx(cost(planner.levels(targets), targets))
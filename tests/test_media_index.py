@@ -0,0 +1,62 @@
+"""The media index picks movies over animations over images, falling back to a default image."""
+import pytest
+
+from robocross.media_index import MediaIndex, MediaSource
+
+
+@pytest.fixture
+def root(tmp_path):
+    for directory in ("movies", "animations", "images"):
+        (tmp_path / directory).mkdir()
+    return tmp_path
+
+
+def make_index(root) -> MediaIndex:
+    return MediaIndex(sources=(MediaSource(root / "movies", (".mp4", ".mov", ".avi")),
+                               MediaSource(root / "animations", (".gif",)),
+                               MediaSource(root / "images", (".png", ".jpg", ".jpeg"))), root=root)
+
+
+def touch(path):
+    path.write_bytes(b"")
+    return path
+
+
+def test_priority(root):
+    movie = touch(root / "movies" / "push_ups.avi")
+    touch(root / "animations" / "push_ups.gif")
+    touch(root / "images" / "push_ups.png")
+    gif = touch(root / "animations" / "squats.gif")
+    touch(root / "images" / "squats.png")
+    jpg = touch(root / "images" / "lunges.jpg")
+    index = make_index(root)
+    assert (index.find("push ups"), index.find("squats"), index.find("lunges")) == (movie, gif, jpg)
+    assert len(index) == 3 and index.find("plank") is None
+
+    mp4 = touch(root / "movies" / "push_ups.mp4")  # Extension priority within a directory
+    index.refresh(root / "movies")
+    assert index.find("push ups") == mp4
+
+
+def test_names_and_extensions_ignore_case(root):
+    movie = touch(root / "movies" / "Bent_Over_Rows.MP4")
+    touch(root / "images" / "bent_over_rows.png")
+    touch(root / "images" / "notes.txt")
+    index = make_index(root)
+    assert index.find("Bent Over Rows") == movie and index.find("notes") is None
+
+
+def test_default_images(root):
+    defaults = {touch(root / "images" / f"default_image_{i}.png") for i in range(3)}
+    touch(root / "images" / "default_image_3.jpg")  # Only PNG defaults
+    index = make_index(root)
+    assert {index.find("unknown exercise") for _ in range(50)} == defaults
+
+
+def test_missing_directories(tmp_path):
+    index = make_index(tmp_path)
+    assert len(index) == 0 and index.find("squats") is None
+    (tmp_path / "images").mkdir()
+    image = touch(tmp_path / "images" / "squats.png")
+    index.refresh(tmp_path)  # The root is watched while a directory is missing
+    assert index.find("squats") == image
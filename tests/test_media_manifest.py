@@ -0,0 +1,87 @@
+"""Manifest entries are reused while their file is unchanged and recomputed, or dropped, when it changes."""
+import json
+import os
+
+import pytest
+
+from PIL import Image
+
+from robocross import media_manifest
+from robocross.media_manifest import MANIFEST_VERSION, MediaManifest
+
+
+@pytest.fixture
+def media(tmp_path):
+    root = tmp_path / "media"
+    (root / "images").mkdir(parents=True)
+    Image.new("RGBA", (10, 10), (90, 90, 90, 255)).save(root / "images" / "plank.png")
+    Image.new("RGB", (6, 4), (200, 10, 10)).save(root / "images" / "squats.jpg")
+    (root / "movies").mkdir()
+    (root / "movies" / "burpees.mp4").write_bytes(b"not decoded")
+    return root
+
+
+@pytest.fixture
+def decoded(monkeypatch) -> list:
+    """Images decoded by the manifest."""
+    calls = []
+    analyse_image = media_manifest.analyse_image
+    monkeypatch.setattr(media_manifest, "analyse_image", lambda image: calls.append(image) or analyse_image(image))
+    return calls
+
+
+def test_update_analyses_only_changes(media, tmp_path, decoded):
+    path = tmp_path / "manifest.json"
+    manifest = MediaManifest(path=path, root=media)
+    assert manifest.update(workers=1) == 3 and len(decoded) == 2
+    assert manifest.get(media / "images" / "plank.png").is_greyscale
+    assert manifest.get(media / "movies" / "burpees.mp4").analysis is None
+
+    reloaded = MediaManifest.load(path=path, root=media)
+    assert reloaded.entries == manifest.entries
+    assert reloaded.update(workers=1) == 0
+
+    Image.new("RGBA", (12, 10), (200, 10, 10, 255)).save(media / "images" / "plank.png")
+    os.utime(media / "images" / "plank.png", ns=(1, 1))
+    (media / "images" / "squats.jpg").unlink()
+    assert reloaded.get(media / "images" / "plank.png") is None  # Outdated
+    assert reloaded.update(workers=1) == 1
+    assert not reloaded.get(media / "images" / "plank.png").is_greyscale
+    assert set(reloaded.entries) == {"images/plank.png", "movies/burpees.mp4"}
+
+
+def test_touched_file_keeps_traits_with_hashes(media, tmp_path, decoded):
+    manifest = MediaManifest(path=tmp_path / "manifest.json", root=media)
+    manifest.update(workers=1, hash_content=True)
+    before = manifest.get(media / "images" / "plank.png")
+    os.utime(media / "images" / "plank.png", ns=(1, 1))
+    decoded.clear()
+    assert manifest.update(workers=1, hash_content=True) == 1 and decoded == []
+    after = manifest.get(media / "images" / "plank.png")
+    assert after._replace(mtime_ns=before.mtime_ns) == before and after.mtime_ns == 1
+
+
+def test_unknown_files_are_recorded_and_saved_together(media, tmp_path):
+    path = tmp_path / "manifest.json"
+    manifest = MediaManifest(path=path, root=media)
+    assert manifest.analysis(media / "images" / "plank.png").is_greyscale
+    assert manifest.traits(media / "images" / "squats.jpg").width == 6
+    assert not path.exists()  # Waiting for the save timer
+    manifest.flush()
+    assert set(json.loads(path.read_text(encoding="utf-8"))["files"]) == {"images/plank.png", "images/squats.jpg"}
+
+    outside = tmp_path / "outside.png"
+    Image.new("RGBA", (4, 4)).save(outside)
+    assert manifest.key(outside) is None and manifest.analysis(outside).bounding_box is None
+    assert len(manifest) == 2
+
+
+def test_other_versions_are_ignored(media, tmp_path):
+    path = tmp_path / "manifest.json"
+    manifest = MediaManifest(path=path, root=media)
+    manifest.update(workers=1)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    path.write_text(json.dumps(dict(data, version=MANIFEST_VERSION + 1)), encoding="utf-8")
+    assert len(MediaManifest.load(path=path, root=media)) == 0
+    path.write_text("{", encoding="utf-8")
+    assert len(MediaManifest.load(path=path, root=media)) == 0
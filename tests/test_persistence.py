@@ -0,0 +1,66 @@
+"""Journaled documents: replay, compaction and recovery from interrupted writes."""
+import json
+
+import pytest
+
+from core import persistence
+from core.persistence import JournaledDocument, atomic_write_bytes
+
+
+@pytest.fixture
+def document(tmp_path) -> JournaledDocument:
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps({"cardio": {"burpees": {"intensity": "high"}}}))
+    return JournaledDocument(path, compact_after=4)
+
+
+def test_appends_are_replayed_without_rewriting_the_document(document):
+    original = document.path.read_bytes()
+    document.set(["cardio", "skipping"], {"intensity": "medium"})
+    document.delete(["cardio", "burpees"])
+    assert document.path.read_bytes() == original
+    assert document.load() == {"cardio": {"skipping": {"intensity": "medium"}}}
+
+
+def test_compaction_folds_the_journal_into_the_document(document):
+    for i in range(4):
+        document.set(["strength", f"exercise {i}"], i)
+    assert not document.journal_path.exists()
+    assert json.loads(document.path.read_text())["strength"] == {f"exercise {i}": i for i in range(4)}
+
+
+def test_partly_written_record_is_ignored(document):
+    document.set(["cardio", "skipping"], 1)
+    with document.journal_path.open("ab") as f:
+        f.write(b'{"ops": [["set", ["cardio", "rowing"]')  # Crash mid-append
+    assert "rowing" not in document.load()["cardio"]
+    document.set(["cardio", "rowing"], 2)
+    assert document.load()["cardio"] == {"burpees": {"intensity": "high"}, "skipping": 1, "rowing": 2}
+
+
+def test_journal_of_a_replaced_document_is_ignored(document):
+    document.set(["cardio", "skipping"], 1)
+    stale_journal = document.journal_path.read_bytes()
+    document.write({"combat": {}})
+    document.journal_path.write_bytes(stale_journal)  # Crash between writing the document and deleting the journal
+    assert document.load() == {"combat": {}}
+    document.set(["combat", "jab"], 3)
+    assert document.load() == {"combat": {"jab": 3}}
+
+
+def test_append_hashes_the_document_only_when_it_changes(document, monkeypatch):
+    calls = []
+    digest = persistence._document_digest
+    monkeypatch.setattr(persistence, "_document_digest", lambda data: calls.append(1) or digest(data))
+    document.set(["cardio", "a"], 1)
+    document.journal_path.unlink()
+    document.set(["cardio", "b"], 2)
+    document.set(["cardio", "c"], 3)
+    assert len(calls) == 1
+
+
+def test_atomic_write_leaves_no_temp_file(tmp_path):
+    path = tmp_path / "file.bin"
+    atomic_write_bytes(path, b"contents")
+    assert path.read_bytes() == b"contents"
+    assert [p.name for p in tmp_path.iterdir()] == ["file.bin"]
@@ -0,0 +1,71 @@
+"""Re-rolls draw again only the slots a parameter change invalidates, and run off the GUI thread like a build."""
+import pytest
+
+from robocross.reroll import Slot
+from robocross.robocross_enums import Equipment
+from robocross.routine import Routine
+from robocross.routine_builder import RoutineBuildTask, build_routine
+
+KWARGS = dict(interval=60, workout_length=20, rest_time=30, selected_categories=["cardio", "strength"], seed=3)
+
+
+@pytest.fixture
+def built() -> tuple[Routine, list[Slot]]:
+    routine = Routine(**KWARGS)
+    routine.get_workout_list()
+    return routine, [Slot(record=item.spec, duration=item.duration, rest=item.rest) for item in routine.schedule]
+
+
+def test_unchanged_params_keep_every_slot(built):
+    routine, slots = built
+    updates = Routine(**KWARGS).reroll(slots, previous_params=routine.params)
+    assert [(update.source, update.item) for update in updates] == [(i, None) for i in range(len(slots))]
+
+
+def test_equipment_filter_redraws_only_slots_using_it(built):
+    routine, slots = built
+    equipment = next(record.equipment[0] for record, *_ in slots if record.equipment)
+    updates = Routine(**KWARGS, equipment_filter=[equipment]).reroll(slots, previous_params=routine.params)
+    assert [update.source for update in updates] == list(range(len(slots)))
+    for update, slot in zip(updates, slots):
+        assert (update.item is None) == (equipment not in slot.record.equipment)
+        if update.item is not None:
+            assert equipment not in update.item.spec.equipment
+
+
+def test_pinned_slots_are_kept(built):
+    routine, slots = built
+    equipment = next(record.equipment[0] for record, *_ in slots if record.equipment)
+    slots = [slot._replace(pinned=equipment in slot.record.equipment) for slot in slots]
+    updates = Routine(**KWARGS, equipment_filter=[equipment]).reroll(slots, previous_params=routine.params)
+    assert all(update.item is None for update, slot in zip(updates, slots) if slot.pinned)
+
+
+def test_workout_length_resizes_at_the_end(built):
+    routine, slots = built
+    shorter = Routine(**dict(KWARGS, workout_length=10)).reroll(slots, previous_params=routine.params)
+    assert [update.source for update in shorter] == list(range(len(shorter))) and len(shorter) < len(slots)
+
+    longer = Routine(**dict(KWARGS, workout_length=30)).reroll(slots, previous_params=routine.params)
+    assert [update.source for update in longer[:len(slots)]] == list(range(len(slots)))
+    assert len(longer) > len(slots) and all(update.source is None for update in longer[len(slots):])
+
+
+def test_rebuild_redraws_unpinned_slots(built):
+    routine, slots = built
+    slots = [slot._replace(pinned=i == 0) for i, slot in enumerate(slots)]
+    result = build_routine(dict(KWARGS, seed=4), slots=slots)
+    assert result.workout_list == [] and result.updates[0].item is None
+    assert any(update.item is not None for update in result.updates[1:])
+
+
+def test_build_task_reroll(built):
+    routine, slots = built
+    task = RoutineBuildTask(dict(KWARGS, equipment_filter=[Equipment.mat]), slots=slots,
+                            previous_params=routine.params)
+    assert task.is_reroll and not RoutineBuildTask(KWARGS).is_reroll
+    results = []
+    task.signals.finished.connect(results.append)
+    task.run()
+    assert results[0].updates == Routine(**KWARGS, equipment_filter=[Equipment.mat]).reroll(
+        slots, previous_params=routine.params)
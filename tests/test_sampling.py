@@ -0,0 +1,62 @@
+"""Seeded streams are reproducible and independent, and the alias samplers draw in proportion to the weights."""
+import numpy as np
+import pytest
+
+from robocross.routine import Routine
+from robocross.sampling import SEED_BITS, AliasSampler, ItemSampler, RandomStreams, spawn_seeds
+
+
+def test_streams_are_reproducible_and_independent():
+    streams = RandomStreams(seed=42)
+    first = streams.stream("exercises").integers(1000, size=20)
+    assert np.array_equal(streams.stream("exercises").integers(1000, size=20), first)
+    assert not np.array_equal(streams.stream("rest").integers(1000, size=20), first)
+    assert not np.array_equal(RandomStreams(seed=43).stream("exercises").integers(1000, size=20), first)
+
+    rest = streams.stream("rest").integers(1000, size=20)
+    exercises = streams.stream("exercises")
+    exercises.integers(1000, size=500)  # More draws from one stream never shift another
+    assert np.array_equal(streams.stream("rest").integers(1000, size=20), rest)
+
+
+def test_spawned_seeds():
+    seeds = spawn_seeds(7, 100)
+    assert seeds == spawn_seeds(7, 100) and seeds[:10] == spawn_seeds(7, 10)
+    assert len(set(seeds)) == 100 and all(0 <= seed < 1 << SEED_BITS for seed in seeds)
+    assert seeds != spawn_seeds(8, 100)
+
+
+@pytest.mark.parametrize("structure", ["Random", "Sequence", "Balanced", "Profile"])
+def test_routines_are_reproducible_from_seed(structure):
+    def schedule(seed: int) -> list[str]:
+        return [str(item) for item in Routine(workout_structure=structure, seed=seed).get_workout_list()]
+
+    assert schedule(1) == schedule(1)
+    assert schedule(1) != schedule(2)
+
+
+def test_alias_sampler_frequencies():
+    weights = [0.0, 1.0, 2.0, 5.0, 0.5]
+    sampler = AliasSampler(weights, rng=np.random.default_rng(0))
+    counts = np.bincount(sampler.sample(200_000), minlength=len(weights))
+    expected = np.array(weights) / sum(weights)
+    assert counts[0] == 0
+    assert np.allclose(counts / counts.sum(), expected, atol=0.005)
+    singles = np.bincount([sampler.sample_one() for _ in range(20_000)], minlength=len(weights))
+    assert singles[0] == 0 and np.allclose(singles / singles.sum(), expected, atol=0.02)
+
+    for bad in ([], [0, 0], [1, -1]):
+        with pytest.raises(ValueError):
+            AliasSampler(bad)
+
+
+def test_item_sampler_weights_categories_then_items():
+    pools = {"a": ["a1", "a2"], "b": ["b1", "b2", "b3", "b4"], "empty": []}
+    sampler = ItemSampler(pools, category_weights={"a": 3, "b": 1},
+                          item_weight=lambda item: 0.0 if item == "b4" else 1.0, rng=np.random.default_rng(1))
+    draws = sampler.sample(120_000)
+    share = {item: draws.count(item) / len(draws) for item in sampler.items}
+    assert share["a1"] == pytest.approx(3 / 8, abs=0.01) and share["b1"] == pytest.approx(1 / 12, abs=0.01)
+    assert share["b4"] == 0
+    assert ItemSampler(pools, rng=np.random.default_rng(2)).sample(10, rng=np.random.default_rng(3)) == \
+        ItemSampler(pools).sample(10, rng=np.random.default_rng(3))
@@ -0,0 +1,61 @@
+"""Session and catalog validation: invalid entries are dropped, the rest are normalised and stay aligned."""
+from robocross import REST_PERIOD
+from robocross.robocross_enums import Equipment, Target
+from robocross.schema import validate_catalog, validate_session
+
+
+def workout(name: str, time: int = 40, **fields) -> dict:
+    return {"name": name, "description": "", "equipment": ["dumbbell"], "intensity": "medium",
+            "aerobic_type": "strength", "target": ["arms"], "time": time, **fields}
+
+
+def test_dropped_workout_keeps_rest_times_and_pins_aligned():
+    session = validate_session({
+        "workouts": [workout("curls"), workout("broken", time="long"), workout("rows"), workout("press")],
+        "rest_times": [10, 20, 30, 40],
+        "pinned": [False, True, True, False],
+    })
+    assert [item.spec.name for item in session.schedule] == ["curls", "rows", "press"]
+    assert [item.rest for item in session.schedule] == [10, 30, 40]
+    assert session.pinned == (False, True, False)
+    assert [issue.location for issue in session.issues] == ["workouts[1]/time"]
+
+
+def test_rest_periods_of_older_files():
+    session = validate_session({
+        "rest_time": 25,
+        "workouts": [workout("curls"), {"name": REST_PERIOD, "time": 15}, workout("rows", time=50)],
+    })
+    assert [(item.spec.name, item.duration, item.rest) for item in session.schedule] == \
+        [("curls", 40, 15), ("rows", 50, 25)]
+    assert session.pinned == (False, False)
+
+
+def test_invalid_fields_are_reported_and_defaulted():
+    session = validate_session({
+        "workout_cycles": -1, "rest_time": "x", "workout_name": 3, "rest_times": "x", "pinned": [1],
+        "routine": {"seed": "x"},
+        "workouts": [workout("curls", equipment=["dumbbell", "teleporter"], intensity="extreme"),
+                     workout("rows", target=["arms", "tail"]), 7],
+    })
+    assert (session.workout_cycles, session.rest_time, session.workout_name, session.routine) == (1, 30, "", None)
+    assert [item.spec.name for item in session.schedule] == ["rows"]
+    assert session.schedule[0].spec.target == (Target.arms,) and session.schedule[0].spec.equipment == \
+        (Equipment.dumbbell,)
+    locations = {issue.location for issue in session.issues}
+    assert {"workout_cycles", "rest_time", "workout_name", "rest_times", "pinned", "routine",
+            "workouts[0]/intensity", "workouts[1]/target[1]", "workouts[2]"} <= locations
+
+
+def test_catalog_validation_drops_and_normalises():
+    validation = validate_catalog({
+        "cardio": {
+            "burpees": {"description": "jump", "intensity": "high", "equipment": ["teleporter"], "energy": "lots"},
+            "mystery": {"intensity": "high"},
+        },
+        "strength": [],
+    })
+    assert validation.data == {"cardio": {"burpees": {"description": "jump", "intensity": "high",
+                                                      "equipment": []}}}
+    assert {issue.location for issue in validation.issues} == {
+        "cardio/burpees/equipment[0]", "cardio/burpees/energy", "cardio/mystery/description", "strength"}
@@ -0,0 +1,75 @@
+"""Tint cache levels stay within their byte budgets, and keys follow the source contents."""
+import os
+
+import numpy as np
+import pytest
+
+from PIL import Image
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtGui import QGuiApplication, QPixmap  # noqa: E402
+
+from robocross.tint_cache import PixmapLRU, TintCache, TintStore  # noqa: E402
+
+RGB = (52, 152, 219)
+
+
+@pytest.fixture(scope="module")
+def app() -> QGuiApplication:
+    return QGuiApplication.instance() or QGuiApplication([])
+
+
+def noise(size: int) -> np.ndarray:
+    """Incompressible RGBA pixels, so the PNG size grows with the image."""
+    return np.random.default_rng(size).integers(0, 256, size=(size, size, 4), dtype=np.uint8)
+
+
+def test_pixmap_lru_evicts_least_recently_used(app):
+    pixmaps = PixmapLRU(max_bytes=3 * 16 * 16 * 4)
+    for key in "abc":
+        pixmaps.put(key, QPixmap(16, 16))
+    assert pixmaps.get("a") is not None  # Now the most recently used
+    pixmaps.put("d", QPixmap(16, 16))
+    assert pixmaps.get("b") is None and all(pixmaps.get(key) is not None for key in "acd")
+    assert len(pixmaps) == 3 and pixmaps.size <= pixmaps.max_bytes
+
+    pixmaps.put("huge", QPixmap(64, 64))
+    assert pixmaps.get("huge") is None and len(pixmaps) == 3
+
+
+def test_tint_store_stays_within_cap(tmp_path):
+    TintStore(tmp_path).put("small", noise(8))
+    store = TintStore(tmp_path, max_bytes=(tmp_path / "small.png").stat().st_size * 5 // 2)
+    for key in ("a", "b"):
+        assert store.put(key, noise(8)) is not None
+    assert store.get("small") is None and store.size <= store.max_bytes
+    assert store.get("a") is not None  # Now the most recently used
+    store.put("c", noise(8))
+    assert store.get("b") is None and store.get("a") is not None and store.get("c") is not None
+
+    assert store.put("huge", noise(64)) is None  # Larger than the whole cap: not kept, nothing left over
+    assert not (tmp_path / "huge.png").exists() and store.size <= store.max_bytes
+    assert sorted(path.stem for path in tmp_path.glob("*.png")) == sorted(store.files)
+
+
+def test_key_follows_source_contents(tmp_path):
+    source = tmp_path / "icon.png"
+    Image.fromarray(noise(8)).save(source)
+    cache = TintCache(store=TintStore(tmp_path / "tinted"))
+    key = cache.key(source, RGB)
+    assert cache.key(source, RGB) == key and cache.key(source, (0, 0, 0)) != key
+
+    Image.fromarray(noise(9)).save(source)
+    os.utime(source, ns=(1, 1))  # Any change of size or modification time is noticed
+    assert cache.key(source, RGB) != key
+    assert cache.path(source, RGB).stem == cache.key(source, RGB)
+
+
+def test_oversized_image_is_tinted_without_storing(app, tmp_path):
+    source = tmp_path / "icon.png"
+    Image.fromarray(noise(32)).save(source)
+    cache = TintCache(store=TintStore(tmp_path / "tinted", max_bytes=16))
+    pixmap = cache.pixmap(source, RGB)
+    assert (pixmap.width(), pixmap.height()) == (32, 32)
+    assert cache.path(source, RGB) is None and cache.store.size == 0
@@ -1,10 +1,9 @@
-import json
 import shutil
 from pathlib import Path
 from functools import partial
 
 from PySide6.QtWidgets import QCheckBox, QTextEdit, QLineEdit, QFileDialog, QMessageBox
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, Signal
 
 from widgets.generic_widget import GenericWidget
 from widgets.button_bar import ButtonBar
@@ -12,7 +11,10 @@ from core.core_paths import image_path, MEDIA_ROOT, DATA_FILE_PATH
 from widgets.form_widget import FormWidget
 from core.core_enums import Alignment
 from widgets.image_label import ImageLabel
-from robocross import WORKOUT_CATEGORIES
+from robocross import get_workout_categories
+from robocross import catalog_cache
+from robocross.exercise_store import ExerciseStore, get_store
+from robocross.media_manifest import get_media_manifest
 from robocross.robocross_enums import Equipment, Target
 from robocross.exercise_picker_dialog import ExercisePickerDialog
 
@@ -24,8 +26,11 @@ BACKUP_DATA_FILE = DATA_FILE_PATH.parent / "workout_data_backup.json"
 
 
 class ExerciseEditor(GenericWidget):
-    def __init__(self):
+    catalog_changed = Signal()  # emitted after an exercise is saved or deleted, or the exercises are restored
+
+    def __init__(self, store: ExerciseStore | None = None):
         super().__init__(title="Exercise Editor")
+        self.store: ExerciseStore = store or get_store()
 
         # Current state
         self.current_category = None
@@ -50,7 +55,7 @@ class ExerciseEditor(GenericWidget):
         # Form section
         self.form: FormWidget = left_panel.add_widget(FormWidget())
         self.exercise_name_field = self.form.add_line_edit(label="Exercise Name", placeholder_text="lowercase and spaces only")
-        self.category_combo_box = self.form.add_combo_box(label="Category", items=WORKOUT_CATEGORIES)
+        self.category_combo_box = self.form.add_combo_box(label="Category", items=get_workout_categories())
 
         # Description field (text edit)
         self.description_field = QTextEdit()
@@ -170,12 +175,11 @@ class ExerciseEditor(GenericWidget):
     def _open_button_clicked(self):
         """Open exercise picker dialog."""
         # Load all exercises
-        with DATA_FILE_PATH.open("r") as f:
-            data = json.load(f)
-
-        exercises_by_category = {cat: list(exercises.keys()) for cat, exercises in data.items()}
+        catalog = catalog_cache.get_catalog(self.store.path)
+        data = catalog.hierarchical_data
 
-        dialog = ExercisePickerDialog(exercises_by_category, self.current_exercise_name, self)
+        dialog = ExercisePickerDialog(catalog.exercises_by_category, self.current_exercise_name, self,
+                                      search_index=catalog.search_index)
         if dialog.exec():
             exercise_name = dialog.selected_exercise
             if exercise_name:
@@ -218,25 +222,12 @@ class ExerciseEditor(GenericWidget):
             QMessageBox.warning(self, "Validation Error", "At least one target area must be selected")
             return
 
-        # Load current data
-        with DATA_FILE_PATH.open("r") as f:
-            data = json.load(f)
-
-        # If category changed, delete from old category
-        if self.current_category and self.current_category != category and self.current_exercise_name:
-            if self.current_category in data and self.current_exercise_name in data[self.current_category]:
-                del data[self.current_category][self.current_exercise_name]
-
-        # Ensure category exists
-        if category not in data:
-            data[category] = {}
-
-        # Save exercise
-        data[category][exercise_name] = exercise_data
-
-        # Write back to file
-        with DATA_FILE_PATH.open("w") as f:
-            json.dump(data, f, indent=4)
+        # Save exercise (removing it from its old category if the category changed)
+        replaces = None
+        if self.current_category and self.current_exercise_name:
+            replaces = (self.current_category, self.current_exercise_name)
+        self.store.upsert(category=category, name=exercise_name, exercise_data=exercise_data, replaces=replaces)
+        self._notify_catalog_changed()
 
         # Save media (copy to exercise-specific filename)
         self._save_media(exercise_name)
@@ -263,17 +254,8 @@ class ExerciseEditor(GenericWidget):
         )
 
         if reply == QMessageBox.StandardButton.Yes:
-            # Load data
-            with DATA_FILE_PATH.open("r") as f:
-                data = json.load(f)
-
-            # Delete exercise
-            if self.current_category in data and self.current_exercise_name in data[self.current_category]:
-                del data[self.current_category][self.current_exercise_name]
-
-                # Write back
-                with DATA_FILE_PATH.open("w") as f:
-                    json.dump(data, f, indent=4)
+            if self.store.delete(category=self.current_category, name=self.current_exercise_name):
+                self._notify_catalog_changed()
 
                 QMessageBox.information(self, "Success", f"Exercise '{self.current_exercise_name}' deleted")
                 self._clear_form()
@@ -292,10 +274,16 @@ class ExerciseEditor(GenericWidget):
         )
 
         if reply == QMessageBox.StandardButton.Yes:
-            shutil.copy2(BACKUP_DATA_FILE, DATA_FILE_PATH)
+            self.store.import_json(BACKUP_DATA_FILE)
+            self._notify_catalog_changed()
             QMessageBox.information(self, "Success", "Workout data restored from backup")
             self._clear_form()
 
+    def _notify_catalog_changed(self):
+        """Drop the shared catalog and let consumers refresh."""
+        catalog_cache.invalidate(self.store.path)
+        self.catalog_changed.emit()
+
     def _load_exercise(self, category: str, exercise_name: str, exercise_data: dict):
         """Load exercise data into form."""
         self.current_category = category
@@ -405,8 +393,9 @@ class ExerciseEditor(GenericWidget):
 
         dest_path = dest_dir / f"{filename_base}{suffix}"
 
-        # Copy file
+        # Copy file, and analyse it now rather than when the player first shows it
         shutil.copy2(self.current_media_path, dest_path)
+        get_media_manifest().record(dest_path)
 
     def _clear_form(self):
         """Clear all form fields."""
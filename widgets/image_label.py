@@ -45,13 +45,22 @@ DALEK: Path = Path.home() / "Dropbox/Technology/Python3/Projects/Maya2025/images
 class ImageLabel(QLabel):
     """Resizable image label widget."""
 
-    def __init__(self, path: Path = None) -> None:
-        """Init."""
+    def __init__(self, path: Path = None, pixmap: QPixmap = None) -> None:
+        """Init.
+
+        Args:
+            path: Image file.
+            pixmap: Image already loaded from path (e.g. from a cache), so the file is not read again.
+        """
         super().__init__()
         if path is None:
             raise ValueError("ImageLabel requires a valid path, got None. Check that the image file exists.")
         self.setWindowTitle(path.name)
-        self.path: Path = path
+        if pixmap is None:
+            self.path: Path = path
+        else:
+            self._path = path
+            self.pixmap = pixmap
         self.setFrameStyle(QFrame.StyledPanel)
         self.setSizePolicy(QSizePolicy.MinimumExpanding, QSizePolicy.MinimumExpanding)
 